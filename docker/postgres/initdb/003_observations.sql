@@ -0,0 +1,37 @@
+-- разобранные телеграммы (db/writer.py: COPY во временную таблицу + upsert)
+
+CREATE TABLE IF NOT EXISTS monthly_observations (
+    station_id INTEGER NOT NULL,
+    date       DATE NOT NULL,          -- YYYY-MM-01
+
+    p_station_hpa DOUBLE PRECISION,
+    p_sea_hpa     DOUBLE PRECISION,
+    t_mean_c      DOUBLE PRECISION,
+    t_daily_std_c DOUBLE PRECISION,
+    t_min_daily_c DOUBLE PRECISION,
+    t_max_daily_c DOUBLE PRECISION,
+    e_vapor_hpa   DOUBLE PRECISION,
+    precip_sum_mm        INTEGER,
+    precip_repeatability SMALLINT,
+    precip_days          SMALLINT,
+    sunshine_hours       SMALLINT,
+    sunshine_pct_norm    SMALLINT,
+
+    PRIMARY KEY (station_id, date)
+);
+
+CREATE TABLE IF NOT EXISTS decadal_observations (
+    station_id INTEGER NOT NULL,
+    date       DATE NOT NULL,          -- YYYY-MM-01 / 11 / 21
+    dekad_no   SMALLINT NOT NULL CHECK (dekad_no BETWEEN 1 AND 3),
+
+    p_station_hpa DOUBLE PRECISION,
+    p_sea_hpa     DOUBLE PRECISION,
+    t_mean_c      DOUBLE PRECISION,
+    e_vapor_hpa   DOUBLE PRECISION,
+    precip_sum_mm        INTEGER,
+    precip_repeatability SMALLINT,
+    precip_days          SMALLINT,
+
+    PRIMARY KEY (station_id, date, dekad_no)
+);
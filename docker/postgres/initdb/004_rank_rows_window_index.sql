@@ -0,0 +1,5 @@
+-- Покрывающий индекс для db.repository.fetch_window_aggregates:
+-- соединение с ключами (dataset, scale, month), группировка (metric, period),
+-- порядок array_agg (rank, id) и value - всё из индекса (index-only scan, без чтения таблицы)
+CREATE INDEX IF NOT EXISTS ix_rank_rows_window
+ON rank_rows(dataset, scale, month, metric, period, rank, id) INCLUDE (value);
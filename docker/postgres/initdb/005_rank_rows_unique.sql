@@ -0,0 +1,5 @@
+-- Ключ строки рангов: повторная загрузка не должна дублировать строки.
+-- Ранги плотные (равные значения делят rank), поэтому rank не уникален внутри окна - в ключе есть год.
+-- Перезаливка датасета - meteo-parser seed-ranks (db/seed.py)
+CREATE UNIQUE INDEX IF NOT EXISTS ux_rank_rows_key
+ON rank_rows(dataset, metric, scale, month, period, rank, year) NULLS NOT DISTINCT;
@@ -1,4 +1,6 @@
-from main import main
+import sys
+
+from meteo_parser.main import main
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+"""
+Генератор синтетического корпуса телеграмм CLIMAT / DEKADA для бенчмарков.
+
+Файлы похожи на настоящие бюллетени (см. data/murmansk.txt):
+- служебные строки (ZCZC / ЗЦЗЦ, CSRS / ЦСРС, номера), заголовки КЛИМАТ/CLIMAT MMyyy и ДЕКАДА/DEKADA MMd
+- ключевые слова кириллицей или латиницей, иногда строчными буквами, лишние пробелы
+- строки станций со всеми группами раздела; часть групп опущена или с пропусками '///'
+- переносы строк '\\n', '\\r\\n' или вперемешку (включая одиночный '\\r')
+
+Корпус детерминирован: те же параметры и seed дают те же байты.
+ensure_corpus() генерирует корпус один раз и переиспользует его, пока параметры не изменились (corpus.json).
+"""
+
+MANIFEST = "corpus.json"
+
+_MONTHS_RU = (
+    "ЯНВАРЬ", "ФЕВРАЛЬ", "МАРТ", "АПРЕЛЬ", "МАЙ", "ИЮНЬ",
+    "ИЮЛЬ", "АВГУСТ", "СЕНТЯБРЬ", "ОКТЯБРЬ", "НОЯБРЬ", "ДЕКАБРЬ",
+)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    Параметры корпуса
+
+    station_lines: всего строк станций (месячных и декадных)
+    lines_per_file: строк станций в одном файле
+    decadal_share: доля строк DEKADA
+    gap_rate: вероятность пропуска ('///') или отсутствия группы
+    cyrillic_rate: доля бюллетеней с кириллическими ключевыми словами
+    line_endings: "lf" | "crlf" | "mixed"
+    """
+    station_lines: int = 100_000
+    lines_per_file: int = 20_000
+    stations: int = 500
+    block_lines: int = 20
+    decadal_share: float = 0.5
+    gap_rate: float = 0.05
+    cyrillic_rate: float = 0.5
+    line_endings: str = "mixed"
+    encoding: str = "utf-8"
+    year: int = 2025
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class CorpusInfo:
+    directory: Path
+    spec: CorpusSpec
+    files: int
+    station_lines: int
+    bytes: int
+
+
+class CorpusGenerator:
+    """Построчный генератор бюллетеней по CorpusSpec"""
+
+    def __init__(self, spec: CorpusSpec) -> None:
+        if spec.line_endings not in ("lf", "crlf", "mixed"):
+            raise ValueError(f"line_endings: {spec.line_endings!r}")
+        self.spec = spec
+        self.rnd = random.Random(spec.seed)
+        self.station_ids = sorted(self.rnd.sample(range(20000, 40000), spec.stations))
+
+    def iter_files(self) -> Iterator[List[str]]:
+        """Строки файлов (без переносов), по lines_per_file строк станций в файле"""
+        left = self.spec.station_lines
+        while left > 0:
+            n = min(left, self.spec.lines_per_file)
+            yield list(self._file_lines(n))
+            left -= n
+
+    def join(self, lines: List[str]) -> str:
+        """Склейка строк файла с переносами по spec.line_endings"""
+        if self.spec.line_endings == "lf":
+            return "\n".join(lines) + "\n"
+        if self.spec.line_endings == "crlf":
+            return "\r\n".join(lines) + "\r\n"
+        choice = self.rnd.choices
+        ends = choice(("\n", "\r\n", "\r"), weights=(6, 6, 1), k=len(lines))
+        return "".join(line + end for line, end in zip(lines, ends))
+
+    # ---- бюллетени ----
+
+    def _file_lines(self, station_lines: int) -> Iterator[str]:
+        spec = self.spec
+        rnd = self.rnd
+        while station_lines > 0:
+            n = min(station_lines, rnd.randint(max(1, spec.block_lines // 2), spec.block_lines * 3 // 2 + 1))
+            month = rnd.randint(1, 12)
+            cyrillic = rnd.random() < spec.cyrillic_rate
+            if rnd.random() < spec.decadal_share:
+                yield from self._decadal_bulletin(n, month, rnd.randint(1, 3), cyrillic)
+            else:
+                yield from self._monthly_bulletin(n, month, cyrillic)
+            station_lines -= n
+
+    def _monthly_bulletin(self, n: int, month: int, cyrillic: bool) -> Iterator[str]:
+        rnd = self.rnd
+        if rnd.random() < 0.3:
+            yield f"КЛИМАТ МЕСЯЦ - 2 ЛИСТА  РАЗ В МЕСЯЦ , ДАННЫЕ ЗА {_MONTHS_RU[month - 1]} {self.spec.year % 100} ГОДА"
+        yield from self._service_lines(cyrillic)
+        yield self._keyword("КЛИМАТ" if cyrillic else "CLIMAT") + f" {month:02d}{self.spec.year % 1000:03d}"
+        for _ in range(n):
+            yield self._station_line(self._monthly_groups())
+        yield ""
+
+    def _decadal_bulletin(self, n: int, month: int, dekad: int, cyrillic: bool) -> Iterator[str]:
+        rnd = self.rnd
+        if rnd.random() < 0.3:
+            yield f"КЛИМАТ ДЕКАДА -2 ЛИСТА , 3 РАЗА В МЕСЯЦ ,ДАННЫЕ ЗА {_MONTHS_RU[month - 1]} {dekad} ДЕКАДА"
+        yield from self._service_lines(cyrillic)
+        yield self._keyword("ДЕКАДА" if cyrillic else "DEKADA") + f" {month:02d}{dekad}"
+        for _ in range(n):
+            yield self._station_line(self._decadal_groups())
+        yield ""
+
+    def _service_lines(self, cyrillic: bool) -> Iterator[str]:
+        rnd = self.rnd
+        zczc = "ЗЦЗЦ" if cyrillic else "ZCZC"
+        yield f"{zczc} {rnd.randint(1, 999):03d} {rnd.randint(0, 999999):06d}/="
+        if cyrillic:
+            yield f"Н{rnd.randint(100, 999)}={rnd.randint(0, 9999):04d}"
+            yield f"ЦСРС{rnd.randint(10, 99)} МУРМ {rnd.randint(0, 999999):06d}"
+        else:
+            yield f"CSRS{rnd.randint(10, 99)} RUMS {rnd.randint(0, 999999):06d}"
+
+    def _keyword(self, word: str) -> str:
+        return word.lower() if self.rnd.random() < 0.05 else word
+
+    def _station_line(self, groups: List[str]) -> str:
+        rnd = self.rnd
+        sep = "  " if rnd.random() < 0.05 else " "
+        line = sep.join([f"{rnd.choice(self.station_ids):05d}", *groups])
+        return line + "=" if rnd.random() < 0.9 else line
+
+    # ---- группы ----
+
+    def _gap(self) -> bool:
+        return self.rnd.random() < self.spec.gap_rate
+
+    def _signed(self, lo: int, hi: int) -> str:
+        v = self.rnd.randint(lo, hi)
+        return f"{1 if v < 0 else 0}{abs(v):03d}"
+
+    def _pressure(self, lo: int, hi: int) -> str:
+        return "////" if self._gap() else f"{self.rnd.randint(lo, hi) % 10000:04d}"
+
+    def _monthly_groups(self) -> List[str]:
+        rnd = self.rnd
+        t_mean = self._signed(-300, 250)
+        std = "///" if self._gap() else f"{rnd.randint(0, 80):03d}"
+        groups = [
+            "111",
+            "1" + self._pressure(9700, 10400),
+            "2" + self._pressure(9800, 10400),
+            "3" + t_mean + std,
+            "4" + self._signed(-250, 350) + self._signed(-400, 250),
+            "5" + ("///" if self._gap() else f"{rnd.randint(10, 250):03d}"),
+            "6" + f"{rnd.randint(0, 300):04d}{rnd.choice('0123456789/')}{rnd.randint(0, 31):02d}",
+            "7" + f"{rnd.randint(0, 400):03d}{rnd.randint(0, 200):03d}",
+        ]
+        return [g for i, g in enumerate(groups) if i < 2 or not self._gap()]
+
+    def _decadal_groups(self) -> List[str]:
+        rnd = self.rnd
+        groups = [
+            "1" + self._pressure(9700, 10400),
+            "2" + self._pressure(9800, 10400),
+            "3" + ("////" if self._gap() else self._signed(-300, 250)),
+            "5" + f"{rnd.randint(10, 250):03d}",
+            "6" + f"{rnd.randint(0, 150):04d}{rnd.choice('0123456789/')}{rnd.randint(0, 9)}",
+        ]
+        return [g for g in groups if not self._gap()]
+
+
+def generate_corpus(directory: Path, spec: CorpusSpec) -> CorpusInfo:
+    """Пишет корпус в directory (corpus_0000.txt, ...) и манифест corpus.json"""
+    directory.mkdir(parents=True, exist_ok=True)
+    for old in directory.glob("corpus_*.txt"):
+        old.unlink()
+
+    gen = CorpusGenerator(spec)
+    files = 0
+    size = 0
+    for lines in gen.iter_files():
+        data = gen.join(lines).encode(spec.encoding)
+        (directory / f"corpus_{files:04d}.txt").write_bytes(data)
+        files += 1
+        size += len(data)
+
+    info = CorpusInfo(directory=directory, spec=spec, files=files, station_lines=spec.station_lines, bytes=size)
+    manifest = {"spec": asdict(spec), "files": files, "bytes": size}
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return info
+
+
+def ensure_corpus(directory: Path, spec: CorpusSpec) -> CorpusInfo:
+    """Корпус из directory, если он собран с теми же параметрами; иначе генерирует заново"""
+    manifest = _read_manifest(directory)
+    if manifest is not None and manifest["spec"] == asdict(spec):
+        files = len(list(directory.glob("corpus_*.txt")))
+        if files == manifest["files"]:
+            return CorpusInfo(
+                directory=directory, spec=spec, files=files, station_lines=spec.station_lines, bytes=manifest["bytes"],
+            )
+    return generate_corpus(directory, spec)
+
+
+def _read_manifest(directory: Path) -> Optional[dict]:
+    path = directory / MANIFEST
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Синтетический корпус телеграмм CLIMAT/DEKADA")
+    ap.add_argument("directory", type=Path)
+    ap.add_argument("--lines", type=int, default=CorpusSpec.station_lines, help="строк станций всего")
+    ap.add_argument("--lines-per-file", type=int, default=CorpusSpec.lines_per_file)
+    ap.add_argument("--line-endings", choices=("lf", "crlf", "mixed"), default=CorpusSpec.line_endings)
+    ap.add_argument("--encoding", default=CorpusSpec.encoding)
+    ap.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    args = ap.parse_args(argv)
+
+    spec = CorpusSpec(
+        station_lines=args.lines,
+        lines_per_file=args.lines_per_file,
+        line_endings=args.line_endings,
+        encoding=args.encoding,
+        seed=args.seed,
+    )
+    info = generate_corpus(args.directory, spec)
+    print(f"{info.files} files, {info.station_lines} station lines, {info.bytes / 1e6:.1f} MB -> {info.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from typing import Callable, List, Optional, Tuple
+
+from meteo_parser.bench.timing import best_of
+from meteo_parser.core import decode
+from meteo_parser.core.decode import _invalid, _is_digits, _parse_int_or_none, _round, _sign, SCALE_0_1
+
+N_CODES = 200_000
+ROUNDS = 3
+
+
+def legacy_t_mean_deviation(code: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+    """decode_t_mean_deviation в исходном виде (для сравнения)"""
+    if _invalid(code, 7, allow_slash=True):
+        return None
+    t_raw = _parse_int_or_none(code[1:4])
+    s_raw = _parse_int_or_none(code[4:7])
+    t = None if t_raw is None else _sign(code[0]) * t_raw * SCALE_0_1
+    s = None if s_raw is None else s_raw * SCALE_0_1
+    return _round(t), _round(s)
+
+
+def legacy_t_daily(code: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+    """decode_t_daily в исходном виде (для сравнения)"""
+    if _invalid(code, 8) or not _is_digits(code):
+        return None
+    t_min = _sign(code[4]) * int(code[5:8]) * SCALE_0_1
+    t_max = _sign(code[0]) * int(code[1:4]) * SCALE_0_1
+    return _round(t_min), _round(t_max)
+
+
+def _codes(rnd: random.Random) -> dict:
+    """Правдоподобные группы (без лидирующей цифры): давления около 1000 гПа, температуры -30..+30 и т.п."""
+    def signed(lo: int, hi: int) -> str:
+        v = rnd.randint(lo, hi)
+        return f"{1 if v < 0 else 0}{abs(v):03d}"
+
+    return {
+        "decode_p_station_hpa": [f"{rnd.randint(9700, 10400) % 10000:04d}" for _ in range(N_CODES)],
+        "decode_p_sea_hpa": [f"{rnd.randint(9800, 10400) % 10000:04d}" for _ in range(N_CODES)],
+        "decode_p_water": [f"{rnd.randint(10, 250):03d}" for _ in range(N_CODES)],
+        "decode_t_mean_deviation": [signed(-300, 300) + f"{rnd.randint(0, 80):03d}" for _ in range(N_CODES)],
+        "decode_t_daily": [signed(-250, 350) + signed(-400, 250) for _ in range(N_CODES)],
+        "decode_precipitation": [
+            f"{rnd.randint(0, 300):04d}{rnd.choice('0123456789/')}{rnd.randint(0, 31):02d}" for _ in range(N_CODES)
+        ],
+        "decode_sunshine": [f"{rnd.randint(0, 400):03d}{rnd.randint(0, 200):03d}" for _ in range(N_CODES)],
+        "decode_t_mean_deviation_decade": [signed(-300, 300) for _ in range(N_CODES)],
+        "decode_precipitation_decade": [
+            f"{rnd.randint(0, 150):04d}{rnd.choice('0123456789/')}{rnd.randint(0, 9)}" for _ in range(N_CODES)
+        ],
+    }
+
+
+def _rate(fn: Callable[[str], object], codes: List[str]) -> float:
+    def run() -> None:
+        for code in codes:
+            fn(code)
+
+    _, best = best_of(run, ROUNDS)
+    return len(codes) / best
+
+
+def main() -> None:
+    codes = _codes(random.Random(42))
+    legacy = {
+        "decode_t_mean_deviation": legacy_t_mean_deviation,
+        "decode_t_daily": legacy_t_daily,
+    }
+
+    print(f"{'decoder':34} {'legacy, M/s':>12} {'cached, M/s':>12} {'x':>6}")
+    for name, sample in codes.items():
+        fn = getattr(decode, name)
+        old = legacy.get(name) or getattr(fn, "__wrapped__", fn)
+        assert [repr(old(c)) for c in sample[:20000]] == [repr(fn(c)) for c in sample[:20000]]
+
+        r_old = _rate(old, sample)
+        r_new = _rate(fn, sample)
+        print(f"{name:34} {r_old / 1e6:12.2f} {r_new / 1e6:12.2f} {r_new / r_old:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
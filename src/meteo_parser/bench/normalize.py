@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from meteo_parser.bench.timing import best_of
+from meteo_parser.config import AppConfig
+from meteo_parser.core.normalizer import TextNormalizer
+from meteo_parser.core.reader import DEFAULT_REPLACEMENTS
+
+REPEAT_TEXT = 20000  # ~20k копий тестового бюллетеня (несколько МБ)
+ROUNDS = 5
+
+def legacy_normalize(text: str, replacements: Dict[str, str]) -> List[str]:
+    """Построчная нормализация в исходном виде (для сравнения)"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+    out: List[str] = []
+    for raw in text.split("\n"):
+        line = raw.strip()
+        if not line:
+            continue
+
+        line = " ".join(line.split())
+        if line.endswith("="):
+            line = line[:-1].rstrip()
+
+        line = line.upper()
+        for src, dst in replacements.items():
+            line = line.replace(src, dst)
+
+        out.append(line)
+
+    return out
+
+
+def main() -> None:
+    cfg = AppConfig()
+    sample = next(iter(sorted(cfg.data_dir.glob(cfg.file_pattern))))
+    text = sample.read_text(encoding=cfg.encoding).replace("\n", "\r\n") * REPEAT_TEXT
+
+    normalizer = TextNormalizer(DEFAULT_REPLACEMENTS)
+    assert normalizer(text) == legacy_normalize(text, DEFAULT_REPLACEMENTS)
+
+    _, t_legacy = best_of(lambda: legacy_normalize(text, DEFAULT_REPLACEMENTS), ROUNDS)
+    _, t_new = best_of(lambda: normalizer(text), ROUNDS)
+
+    mb = len(text.encode(cfg.encoding)) / 1e6
+    print(f"text: {mb:.1f} MB")
+    print(f"legacy:     {t_legacy * 1000:8.1f} ms  {mb / t_legacy:7.1f} MB/s")
+    print(f"normalizer: {t_new * 1000:8.1f} ms  {mb / t_new:7.1f} MB/s")
+    print(f"speedup: x{t_legacy / t_new:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import meteo_parser
+from meteo_parser.bench.corpus import CorpusInfo, CorpusSpec, ensure_corpus
+from meteo_parser.bench.timing import best_of
+from meteo_parser.compare.batch import check_columns_batch
+from meteo_parser.compare.cache import RankWindowCache
+from meteo_parser.config import AppConfig
+from meteo_parser.core.columnar import ColumnarResult
+from meteo_parser.core.groups import DECADAL, GROUP_TABLE, MAX_KEY_LEN, MONTHLY
+from meteo_parser.core.models import Block, MonthlyBlock
+from meteo_parser.core.parser import TelegramParser
+from meteo_parser.core.reader import TelegramReader
+from meteo_parser.core.vectorized import HAS_NUMPY, BatchDecoder
+from meteo_parser.db.engine import make_session_factory
+from meteo_parser.db.seed import RankSeeder
+
+"""
+Бенчмарк стадий разбора и сравнения на синтетическом корпусе (bench/corpus.py).
+
+Стадии (каждая - на выходе предыдущей, подготовка входа в замер не входит):
+- normalize: TextNormalizer над текстом файлов            (строки)
+- split: разбиение нормализованных строк на блоки          (строки)
+- parse: TelegramParser.iter_records без raw_line          (записи)
+- decode: декодеры decode.py по всем группам строк станций (группы)
+- decode_vectorized: BatchDecoder.decode_blocks (если есть numpy) (записи)
+- compare: check_columns_batch для monthly и decadal; ранги - из SQLite в памяти,
+  засеянной RankSeeder из RANKS_DIR, через RankWindowCache (записи)
+- startup: холодный старт `python -m meteo_parser --help` в отдельном процессе (запуски, без пика памяти);
+  заодно проверяется, что --help не импортирует STARTUP_HEAVY (SQLAlchemy, numpy, разбор)
+
+Сравнения новых реализаций со старыми на повторённом data/ - отдельные скрипты того же пакета:
+bench/normalize.py, bench/decode.py, bench/vectorized.py (python -m meteo_parser.bench.<имя>).
+
+Время - лучшее из rounds прогонов (bench/timing.py), пик памяти - отдельный прогон под tracemalloc
+(память, выделенная самой стадией). Результат - JSON в results_dir; --baseline сравнивает
+с предыдущим результатом и отмечает стадии, ставшие медленнее threshold.
+"""
+
+DEFAULT_ROUNDS = 3
+DEFAULT_THRESHOLD = 0.10  # замедление > 10% - регрессия
+
+# модули, которые не должны загружаться при старте CLI (только внутри команд)
+STARTUP_HEAVY = ("sqlalchemy", "numpy", "meteo_parser.db.engine", "meteo_parser.core.parser")
+
+
+@dataclass
+class StageResult:
+    name: str
+    items: int
+    unit: str
+    seconds: float
+    peak_bytes: Optional[int]
+
+    @property
+    def per_sec(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+Stage = Tuple[str, str, Callable[[], int]]  # (имя, единица, функция -> число обработанных единиц)
+
+
+def _peak_bytes(fn: Callable[[], int]) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _group_codes(blocks: List[Block]) -> List[Tuple[Callable, str]]:
+    """(декодер, полезная часть группы) для каждой распознанной группы строк станций - как в apply_groups"""
+    out: List[Tuple[Callable, str]] = []
+    get = GROUP_TABLE.get
+    for block in blocks:
+        section = MONTHLY if isinstance(block, MonthlyBlock) else DECADAL
+        for line in block.station_lines:
+            for code in line.split()[1:]:
+                n = len(code)
+                rule = get((section, code[0], n if n < MAX_KEY_LEN else MAX_KEY_LEN))
+                if rule is not None:
+                    start, stop, decode, _setter, _fields = rule
+                    out.append((decode, code[start:stop]))
+    return out
+
+
+class BenchSuite:
+    """
+    Подготовка входов стадий и их замер
+
+    corpus: корпус (ensure_corpus)
+    cfg: ranks_dir, dataset, default_decadal_year
+    """
+
+    def __init__(self, corpus: CorpusInfo, cfg: AppConfig) -> None:
+        self.corpus = corpus
+        self.cfg = cfg
+        self.reader = TelegramReader(
+            directory=corpus.directory, pattern="corpus_*.txt", encoding=corpus.spec.encoding,
+        )
+        self.year = cfg.default_decadal_year
+
+    def stages(self) -> List[Stage]:
+        reader = self.reader
+        texts = [reader._read_text(path) for path in reader._iter_files()]
+        normalize = reader._normalizer
+        lines = [normalize(text) for text in texts]
+        blocks = [block for file_lines in lines for block in reader._iter_segments(file_lines)]
+        codes = _group_codes(blocks)
+        parser = TelegramParser(keep_raw_line=False)
+        columns = ColumnarResult.from_records(parser.iter_records(blocks, self.year))
+        session_factory = self._ranks_db()
+        dataset = self.cfg.dataset
+
+        def run_normalize() -> int:
+            return sum(len(normalize(text)) for text in texts)
+
+        def run_split() -> int:
+            for file_lines in lines:
+                for _block in reader._iter_segments(file_lines):
+                    pass
+            return sum(len(file_lines) for file_lines in lines)
+
+        def run_parse() -> int:
+            return sum(1 for _rec in parser.iter_records(blocks, self.year))
+
+        def run_decode() -> int:
+            for decode, code in codes:
+                decode(code)
+            return len(codes)
+
+        def run_decode_vectorized() -> int:
+            result = BatchDecoder().decode_blocks(blocks, self.year)
+            return len(result.monthly) + len(result.decadal)
+
+        def run_compare() -> int:
+            cache = RankWindowCache(session_factory, ttl=None)
+            n = 0
+            for scale, cols in (("monthly", columns.monthly), ("decadal", columns.decadal)):
+                matrix = check_columns_batch(
+                    columns=cols,
+                    windows_for=lambda month, scale=scale: cache.month_windows(dataset, scale, month),
+                )
+                n += len(matrix)
+            return n
+
+        stages: List[Stage] = [
+            ("normalize", "lines", run_normalize),
+            ("split", "lines", run_split),
+            ("parse", "records", run_parse),
+            ("decode", "groups", run_decode),
+        ]
+        if HAS_NUMPY:
+            stages.append(("decode_vectorized", "records", run_decode_vectorized))
+        stages.append(("compare", "records", run_compare))
+        return stages
+
+    def run(self, rounds: int = DEFAULT_ROUNDS, memory: bool = True) -> List[StageResult]:
+        results: List[StageResult] = []
+        for name, unit, fn in self.stages():
+            items, seconds = best_of(fn, rounds)
+            peak = _peak_bytes(fn) if memory else None
+            results.append(StageResult(name=name, items=items, unit=unit, seconds=seconds, peak_bytes=peak))
+        items, seconds = best_of(_start_cli, rounds)
+        results.append(StageResult(name="startup", items=items, unit="runs", seconds=seconds, peak_bytes=None))
+        return results
+
+    def _ranks_db(self) -> Callable:
+        """SQLite в памяти с rank_rows из ranks_dir (вместо PostgreSQL)"""
+        engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+        RankSeeder(engine, batch_size=self.cfg.seed_batch_size).seed(self.cfg.ranks_dir)
+        return make_session_factory(engine)
+
+
+# ---- холодный старт CLI ----
+
+def _cli_env() -> Dict[str, str]:
+    """Окружение дочернего процесса: тот же пакет meteo_parser, что у бенчмарка (и без установки)"""
+    env = dict(os.environ)
+    root = str(Path(meteo_parser.__file__).resolve().parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (root, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def _start_cli() -> int:
+    subprocess.run(
+        [sys.executable, "-m", "meteo_parser", "--help"],
+        env=_cli_env(), stdout=subprocess.DEVNULL, check=True,
+    )
+    return 1
+
+
+def startup_imports() -> List[str]:
+    """Модули, импортированные `python -m meteo_parser --help` (по -X importtime)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "meteo_parser", "--help"],
+        env=_cli_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True,
+    )
+    # "import time: self [us] | cumulative | imported package"
+    return [
+        line.rsplit("|", 1)[1].strip()
+        for line in proc.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    ]
+
+
+def heavy_startup_imports() -> List[str]:
+    """Модули из STARTUP_HEAVY (и их подмодули), загруженные при старте CLI"""
+    return sorted({
+        name for name in startup_imports()
+        for heavy in STARTUP_HEAVY
+        if name == heavy or name.startswith(heavy + ".")
+    })
+
+
+# ---- результаты ----
+
+def results_to_json(corpus: CorpusInfo, results: List[StageResult]) -> dict:
+    try:
+        import numpy
+        numpy_version: Optional[str] = numpy.__version__
+    except ImportError:
+        numpy_version = None
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy_version,
+        "corpus": {**asdict(corpus.spec), "files": corpus.files, "bytes": corpus.bytes},
+        "stages": {
+            r.name: {
+                "items": r.items,
+                "unit": r.unit,
+                "seconds": r.seconds,
+                "per_sec": r.per_sec,
+                "peak_bytes": r.peak_bytes,
+            }
+            for r in results
+        },
+    }
+
+
+def save_results(results_dir: Path, data: dict) -> Path:
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return path
+
+
+def latest_results(results_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    """Последний сохранённый результат (кроме exclude)"""
+    paths = [p for p in sorted(results_dir.glob("bench-*.json")) if p != exclude]
+    return paths[-1] if paths else None
+
+
+def compare_results(
+        baseline: dict,
+        current: dict,
+        threshold: float = DEFAULT_THRESHOLD,
+) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    (стадия, per_sec базы, per_sec текущего, изменение, регрессия) для стадий, которые есть в обоих результатах
+    изменение > 0 - быстрее; регрессия - медленнее больше чем на threshold
+    """
+    out = []
+    for name, cur in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None or not base["per_sec"]:
+            continue
+        change = cur["per_sec"] / base["per_sec"] - 1.0
+        out.append((name, base["per_sec"], cur["per_sec"], change, change < -threshold))
+    return out
+
+
+def _print_results(results: List[StageResult]) -> None:
+    for r in results:
+        peak = "" if r.peak_bytes is None else f"  peak {r.peak_bytes / 2**20:8.1f} MB"
+        print(f"{r.name:<18} {r.seconds * 1000:9.1f} ms  {r.per_sec / 1e3:10.1f} k {r.unit}/s{peak}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    cfg = AppConfig()
+    ap = argparse.ArgumentParser(description="Бенчмарк стадий разбора и сравнения")
+    ap.add_argument("--lines", type=int, default=CorpusSpec.station_lines, help="строк станций в корпусе")
+    ap.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    ap.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    ap.add_argument("--no-memory", action="store_true", help="без замера пика памяти (tracemalloc)")
+    ap.add_argument("--dir", type=Path, default=cfg.bench_dir, help="корпус и результаты")
+    ap.add_argument("--baseline", help="JSON для сравнения или 'latest' - предыдущий результат в --dir")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args(argv)
+
+    spec = CorpusSpec(station_lines=args.lines, seed=args.seed)
+    corpus = ensure_corpus(args.dir / f"corpus-{spec.station_lines}-{spec.seed}", spec)
+    print(f"corpus: {corpus.files} files, {corpus.station_lines} station lines, {corpus.bytes / 1e6:.1f} MB")
+
+    results = BenchSuite(corpus, cfg).run(rounds=args.rounds, memory=not args.no_memory)
+    _print_results(results)
+    heavy = heavy_startup_imports()
+    if heavy:
+        print(f"warning: --help imports {', '.join(heavy)}")
+
+    data = results_to_json(corpus, results)
+    saved = None
+    if not args.no_save:
+        saved = save_results(args.dir / "results", data)
+        print(f"saved: {saved}")
+
+    if args.baseline is None:
+        return 0
+    base_path = latest_results(args.dir / "results", exclude=saved) if args.baseline == "latest" else Path(args.baseline)
+    if base_path is None:
+        print("no baseline results")
+        return 0
+
+    baseline = json.loads(base_path.read_text(encoding="utf-8"))
+    if baseline["corpus"] != data["corpus"]:
+        print("warning: baseline corpus differs")
+    print(f"\nvs {base_path.name}:")
+    regressions = 0
+    for name, base, cur, change, regression in compare_results(baseline, data, args.threshold):
+        regressions += regression
+        mark = "  REGRESSION" if regression else ""
+        print(f"{name:<18} {base / 1e3:10.1f} -> {cur / 1e3:10.1f} k/s  {change:+7.1%}{mark}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
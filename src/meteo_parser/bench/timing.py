@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+"""
+Общий замер времени для bench/*: лучшее из rounds прогонов (минимум меньше всего зависит от фоновой нагрузки)
+"""
+
+
+def best_of(fn: Callable[[], T], rounds: int) -> Tuple[T, float]:
+    """(результат последнего прогона, лучшее время прогона в секундах)"""
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import List
+
+from meteo_parser.bench.timing import best_of
+from meteo_parser.config import AppConfig
+from meteo_parser.core.columnar import ColumnarResult
+from meteo_parser.core.models import Block
+from meteo_parser.core.parser import TelegramParser
+from meteo_parser.core.reader import TelegramReader
+from meteo_parser.core.vectorized import BatchDecoder
+
+REPEAT_BLOCKS = 5000  # блоки тестового бюллетеня, повторённые REPEAT_BLOCKS раз
+ROUNDS = 3
+
+
+def main() -> None:
+    cfg = AppConfig()
+    reader = TelegramReader(directory=cfg.data_dir, pattern=cfg.file_pattern, encoding=cfg.encoding, errors=cfg.errors)
+    blocks: List[Block] = list(reader.iter_blocks()) * REPEAT_BLOCKS
+    year = cfg.default_decadal_year
+
+    def scalar() -> ColumnarResult:
+        return ColumnarResult.from_records(TelegramParser(keep_raw_line=False).iter_records(blocks, year))
+
+    def vectorized() -> ColumnarResult:
+        return BatchDecoder().decode_blocks(blocks, year)
+
+    a, b = scalar(), vectorized()
+    for ca, cb in ((a.monthly, b.monthly), (a.decadal, b.decadal)):
+        assert ca.columns == cb.columns and ca.masks == cb.masks
+
+    lines = len(a.monthly) + len(a.decadal)
+    _, t_scalar = best_of(scalar, ROUNDS)
+    _, t_vector = best_of(vectorized, ROUNDS)
+    print(f"station lines: {lines}")
+    print(f"scalar:     {t_scalar * 1000:8.1f} ms  {lines / t_scalar / 1e6:6.2f} M lines/s")
+    print(f"vectorized: {t_vector * 1000:8.1f} ms  {lines / t_vector / 1e6:6.2f} M lines/s")
+    print(f"speedup: x{t_scalar / t_vector:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterator, Mapping, Optional, Sequence
+
+from meteo_parser.compare.comparator import in_min_max_range
+from meteo_parser.compare.models import CheckResult, RankWindow
+from meteo_parser.core import metrics
+from meteo_parser.core.columnar import DecadalColumns, RecordColumns
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без неё работает построчный цикл
+    np = None
+
+"""
+Пакетное сравнение с окнами рангов.
+
+Вход - столбцы значений (t_mean_c, precip_sum_mm) с масками и месяц/декада каждой строки,
+выход - CheckMatrix: коды статуса и границы [lo, hi] массивами (строка x проверка из CHECKS).
+Окна запрашиваются один раз на месяц, границы - один раз на (месяц, период).
+CheckResult и reason собираются только по запросу (result(), results(), failures()) и совпадают
+с check_monthly_record_with_windows / check_decadal_record_with_windows.
+"""
+
+# (metric, field) - в том же порядке, что в compare.checks
+CHECKS: tuple[tuple[str, str], ...] = (
+    ("warmest", "t_mean_c"),
+    ("coldest", "t_mean_c"),
+    ("wettest", "precip_sum_mm"),
+    ("driest", "precip_sum_mm"),
+)
+
+STATUS_OK = 0
+STATUS_OUT_OF_RANGE = 1
+STATUS_NO_VALUE = 2     # value is None
+STATUS_NO_WINDOW = 3    # no ranked values in DB
+
+Windows = Mapping[tuple[str, str], RankWindow]
+
+_PERIODS = 4  # 0 - "M", 1..3 - декада
+_NAN = float("nan")
+
+
+def period_name(period: int) -> str:
+    return "M" if period == 0 else f"{period}D"
+
+
+@dataclass
+class CheckMatrix:
+    """
+    Результаты пакетной проверки
+
+    status/lo/hi - плоские массивы длины len(self) * len(CHECKS) (строка за строкой),
+    lo/hi = nan, если окна нет
+    """
+    scale: str
+    months: array
+    periods: array
+    values: dict[str, array]
+    valid: dict[str, bytes]
+    status: array
+    lo: array
+    hi: array
+    windows: dict[int, Windows]
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def ok(self, i: int, j: int) -> bool:
+        return self.status[i * len(CHECKS) + j] == STATUS_OK
+
+    def counts(self) -> Counter:
+        """Число проверок по кодам статуса"""
+        return Counter(self.status)
+
+    def result(self, i: int, j: int) -> CheckResult:
+        """CheckResult строки i и проверки CHECKS[j]"""
+        metric, field = CHECKS[j]
+        month = self.months[i]
+        period = period_name(self.periods[i])
+        value = self.values[field][i] if self.valid[field][i] else None
+
+        window = self.windows[month].get((metric, period))
+        if window is None:
+            window = RankWindow(
+                dataset="", metric=metric, scale=self.scale, month=month, period=period,
+                values=(), min_value=None, max_value=None,
+            )
+        return in_min_max_range(window=window, field=field, value=value)
+
+    def results(self, i: int) -> list[CheckResult]:
+        return [self.result(i, j) for j in range(len(CHECKS))]
+
+    def failures(self) -> Iterator[tuple[int, CheckResult]]:
+        """(строка, CheckResult) только для непрошедших проверок"""
+        n = len(CHECKS)
+        for k, code in enumerate(self.status):
+            if code != STATUS_OK:
+                yield k // n, self.result(k // n, k % n)
+
+    def to_numpy(self):
+        """(status, lo, hi) формы (len, len(CHECKS)) без копирования"""
+        shape = (len(self), len(CHECKS))
+        return (
+            np.frombuffer(self.status, dtype=np.int8).reshape(shape),
+            np.frombuffer(self.lo, dtype=np.float64).reshape(shape),
+            np.frombuffer(self.hi, dtype=np.float64).reshape(shape),
+        )
+
+
+def check_batch(
+        *,
+        scale: str,
+        months: Sequence[int],
+        periods: Sequence[int],
+        t_mean: Sequence[float],
+        t_valid: Sequence[int],
+        precip: Sequence[float],
+        p_valid: Sequence[int],
+        windows_for: Callable[[int], Windows],
+) -> CheckMatrix:
+    """
+    Args:
+        scale: "monthly" | "decadal"
+        months: месяц каждой строки
+        periods: 0 для месячных строк, номер декады для декадных
+        t_mean, t_valid: t_mean_c и маска (0 - None)
+        precip, p_valid: precip_sum_mm и маска
+        windows_for: month -> окна (metric, period) -> RankWindow для scale
+            (RankWindowCache.month_windows / RankStore.month_windows / load_month_windows)
+    """
+    months = array("b", months)
+    periods = array("b", periods)
+    values = {"t_mean_c": array("d", t_mean), "precip_sum_mm": array("d", precip)}
+    valid = {"t_mean_c": bytes(t_valid), "precip_sum_mm": bytes(p_valid)}
+    n = len(months)
+
+    windows = {m: windows_for(m) for m in set(months)}
+    # (month * _PERIODS + period) -> границы каждой проверки
+    lo_table = [[_NAN] * len(CHECKS) for _ in range(13 * _PERIODS)]
+    hi_table = [[_NAN] * len(CHECKS) for _ in range(13 * _PERIODS)]
+    for month, month_windows in windows.items():
+        for period in range(_PERIODS):
+            k = month * _PERIODS + period
+            for j, (metric, _field) in enumerate(CHECKS):
+                w = month_windows.get((metric, period_name(period)))
+                if w is not None and w.values and w.min_value is not None and w.max_value is not None:
+                    lo_table[k][j] = float(w.min_value)
+                    hi_table[k][j] = float(w.max_value)
+
+    with metrics.stage("checks_batch") as st:
+        if np is not None:
+            status, lo, hi = _compare_numpy(months, periods, values, valid, lo_table, hi_table)
+        else:
+            status, lo, hi = _compare_rows(n, months, periods, values, valid, lo_table, hi_table)
+    if st:
+        st.count(records=n, checks=len(status), failed=len(status) - status.count(STATUS_OK))
+
+    return CheckMatrix(
+        scale=scale, months=months, periods=periods, values=values, valid=valid,
+        status=status, lo=lo, hi=hi, windows=windows,
+    )
+
+
+def check_columns_batch(*, columns: RecordColumns, windows_for: Callable[[int], Windows]) -> CheckMatrix:
+    """check_batch по столбцам ColumnarResult.monthly / .decadal"""
+    decadal = isinstance(columns, DecadalColumns)
+    return check_batch(
+        scale="decadal" if decadal else "monthly",
+        months=columns.months(),
+        periods=columns.column("dekad_no") if decadal else bytes(len(columns)),
+        t_mean=columns.column("t_mean_c"),
+        t_valid=columns.valid("t_mean_c"),
+        precip=columns.column("precip_sum_mm"),
+        p_valid=columns.valid("precip_sum_mm"),
+        windows_for=windows_for,
+    )
+
+
+def _compare_rows(
+        n: int,
+        months: array,
+        periods: array,
+        values: dict[str, array],
+        valid: dict[str, bytes],
+        lo_table: list[list[float]],
+        hi_table: list[list[float]],
+) -> tuple[array, array, array]:
+    status = array("b")
+    lo = array("d")
+    hi = array("d")
+    for i in range(n):
+        k = months[i] * _PERIODS + periods[i]
+        row_lo = lo_table[k]
+        row_hi = hi_table[k]
+        for j, (_metric, field) in enumerate(CHECKS):
+            l, h = row_lo[j], row_hi[j]
+            lo.append(l)
+            hi.append(h)
+            if not valid[field][i]:
+                status.append(STATUS_NO_VALUE)
+            elif l != l:  # nan
+                status.append(STATUS_NO_WINDOW)
+            else:
+                v = values[field][i]
+                status.append(STATUS_OK if l <= v <= h else STATUS_OUT_OF_RANGE)
+    return status, lo, hi
+
+
+def _compare_numpy(
+        months: array,
+        periods: array,
+        values: dict[str, array],
+        valid: dict[str, bytes],
+        lo_table: list[list[float]],
+        hi_table: list[list[float]],
+) -> tuple[array, array, array]:
+    key = np.frombuffer(months, dtype=np.int8).astype(np.int64) * _PERIODS + np.frombuffer(periods, dtype=np.int8)
+    lo = np.array(lo_table, dtype=np.float64)[key]
+    hi = np.array(hi_table, dtype=np.float64)[key]
+
+    v = np.stack([np.frombuffer(values[field], dtype=np.float64) for _metric, field in CHECKS], axis=1)
+    ok_value = np.stack([np.frombuffer(valid[field], dtype=np.uint8) != 0 for _metric, field in CHECKS], axis=1)
+    with np.errstate(invalid="ignore"):
+        inside = (lo <= v) & (v <= hi)
+    status = np.where(
+        ~ok_value, STATUS_NO_VALUE,
+        np.where(np.isnan(lo), STATUS_NO_WINDOW, np.where(inside, STATUS_OK, STATUS_OUT_OF_RANGE)),
+    ).astype(np.int8)
+
+    return array("b", status.tobytes()), array("d", lo.tobytes()), array("d", hi.tobytes())
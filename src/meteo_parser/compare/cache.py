@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
+
+from sqlalchemy.orm import Session
+
+from meteo_parser.compare.models import RankWindow
+from meteo_parser.db.repository import fetch_rank_values_for_dataset
+
+"""
+Кэш окон RankWindow в памяти процесса.
+
+- датасет грузится целиком одним запросом (fetch_rank_values_for_dataset) при первом обращении или preload()
+- снимок датасета неизменяемый (MappingProxyType, values - кортежи): его можно отдавать наружу и между потоками
+- снимок живёт ttl секунд; датасетов в памяти не больше max_datasets (вытесняется давно не использованный)
+- после пересидирования rank_rows - invalidate(dataset) / invalidate()
+"""
+
+WindowKey = tuple[str, str]  # (metric, period)
+Windows = Mapping[WindowKey, RankWindow]
+
+_EMPTY: Windows = MappingProxyType({})
+
+
+@dataclass
+class WindowCacheStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass(frozen=True)
+class DatasetWindows:
+    """Снимок окон одного датасета"""
+    dataset: str
+    loaded_at: float
+    windows: Mapping[tuple[str, int], Windows]  # (scale, month) -> окна
+
+    def month(self, scale: str, month: int) -> Windows:
+        return self.windows.get((scale, month), _EMPTY)
+
+
+def build_dataset_windows(
+        dataset: str,
+        raw: Mapping[tuple[str, int, str, str], list[float]],
+        loaded_at: float,
+) -> DatasetWindows:
+    """Снимок из результата fetch_rank_values_for_dataset"""
+    by_month: dict[tuple[str, int], dict[WindowKey, RankWindow]] = defaultdict(dict)
+    for (scale, month, metric, period), values in raw.items():
+        by_month[(scale, month)][(metric, period)] = RankWindow.from_values(
+            dataset=dataset,
+            metric=metric,
+            scale=scale,
+            month=month,
+            period=period,
+            values=tuple(values),
+        )
+    windows = {key: MappingProxyType(w) for key, w in by_month.items()}
+    return DatasetWindows(dataset=dataset, loaded_at=loaded_at, windows=MappingProxyType(windows))
+
+
+class RankWindowCache:
+    """
+    Окна рангов по датасетам
+
+    - month_windows(dataset, scale, month): то же, что load_month_windows, но без запроса в БД на попадании
+    - snapshot(dataset): весь снимок датасета
+    - preload(*datasets), invalidate(dataset=None)
+    - stats: попадания/промахи/загрузки/вытеснения
+
+    session_factory: фабрика сессий (db.engine.make_session_factory) - сессия открывается только на загрузку
+    ttl: время жизни снимка, сек (None - бессрочно)
+    max_datasets: сколько датасетов держать одновременно
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            *,
+            ttl: Optional[float] = 300.0,
+            max_datasets: int = 8,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_datasets = max_datasets
+        self.clock = clock
+        self.stats = WindowCacheStats()
+
+        self._snapshots: "OrderedDict[str, DatasetWindows]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def month_windows(self, dataset: str, scale: str, month: int) -> Windows:
+        return self.snapshot(dataset).month(scale, month)
+
+    def snapshot(self, dataset: str) -> DatasetWindows:
+        with self._lock:
+            snap = self._snapshots.get(dataset)
+            if snap is not None and self._expired(snap):
+                del self._snapshots[dataset]
+                self.stats.expirations += 1
+                snap = None
+
+            if snap is not None:
+                self.stats.hits += 1
+                self._snapshots.move_to_end(dataset)
+                return snap
+
+            self.stats.misses += 1
+            return self._load(dataset)
+
+    def preload(self, *datasets: str) -> None:
+        with self._lock:
+            for dataset in datasets:
+                self._load(dataset)
+
+    def invalidate(self, dataset: Optional[str] = None) -> None:
+        """Сбрасывает снимок датасета (или все снимки), например после пересидирования rank_rows"""
+        with self._lock:
+            if dataset is None:
+                self.stats.invalidations += len(self._snapshots)
+                self._snapshots.clear()
+            elif self._snapshots.pop(dataset, None) is not None:
+                self.stats.invalidations += 1
+
+    def _load(self, dataset: str) -> DatasetWindows:
+        with self.session_factory() as session:
+            raw = fetch_rank_values_for_dataset(session, dataset=dataset)
+        snap = build_dataset_windows(dataset, raw, loaded_at=self.clock())
+        self.stats.loads += 1
+
+        self._snapshots[dataset] = snap
+        self._snapshots.move_to_end(dataset)
+        while len(self._snapshots) > max(1, self.max_datasets):
+            self._snapshots.popitem(last=False)
+            self.stats.evictions += 1
+        return snap
+
+    def _expired(self, snap: DatasetWindows) -> bool:
+        return self.ttl is not None and self.clock() - snap.loaded_at >= self.ttl
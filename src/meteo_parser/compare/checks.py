@@ -1,69 +1,98 @@
 from __future__ import annotations
 
-from src.meteo_parser.compare.comparator import in_min_max_range
-from src.meteo_parser.compare.models import CheckResult, RankWindow
-from src.meteo_parser.core.models import MonthlyRecord, DecadalRecord
+import time
+from typing import Callable, Iterator, Mapping, Optional
+
+from meteo_parser.compare.comparator import in_min_max_range
+from meteo_parser.compare.models import CheckResult, RankWindow
+from meteo_parser.core import metrics
+from meteo_parser.core.columnar import DecadalColumns, RecordColumns
+from meteo_parser.core.models import MonthlyRecord, DecadalRecord
 
 
 def check_monthly_record_with_windows(
         *,
         rec: MonthlyRecord,
-        windows: dict[tuple[str, str], RankWindow],  # (scale="monthly", month=rec.date.month)
+        windows: Mapping[tuple[str, str], RankWindow],  # (scale="monthly", month=rec.date.month)
 ) -> list[CheckResult]:
-    period = "M"
-    results: list[CheckResult] = []
+    return _check_values(
+        scale="monthly", month=rec.date.month, period="M",
+        t_mean=rec.t_mean_c, precip=rec.precip_sum_mm, windows=windows,
+    )
 
-    # t_mean_c vs warmest/coldest
-    for metric in ("warmest", "coldest"):
-        w = windows.get((metric, period))
-        if w is None:
-            results.append(
-                in_min_max_range(window=_empty_window(metric, "monthly", rec.date.month, period), field="t_mean_c",
-                                 value=rec.t_mean_c))
-        else:
-            results.append(in_min_max_range(window=w, field="t_mean_c", value=rec.t_mean_c))
 
-    # precip_sum_mm vs wettest/driest
-    v_precip = None if rec.precip_sum_mm is None else float(rec.precip_sum_mm)
-    for metric in ("wettest", "driest"):
-        w = windows.get((metric, period))
-        if w is None:
-            results.append(
-                in_min_max_range(window=_empty_window(metric, "monthly", rec.date.month, period), field="precip_sum_mm",
-                                 value=v_precip))
-        else:
-            results.append(in_min_max_range(window=w, field="precip_sum_mm", value=v_precip))
+def check_decadal_record_with_windows(
+        *,
+        rec: DecadalRecord,
+        windows: Mapping[tuple[str, str], RankWindow],  # (scale="decadal", month=rec.date.month)
+) -> list[CheckResult]:
+    return _check_values(
+        scale="decadal", month=rec.date.month, period=f"{rec.dekad_no}D",
+        t_mean=rec.t_mean_c, precip=rec.precip_sum_mm, windows=windows,
+    )
 
-    return results
 
+def check_columns_with_windows(
+        *,
+        columns: RecordColumns,
+        windows_for: Callable[[int], Mapping[tuple[str, str], RankWindow]],  # month -> окна (scale по виду столбцов)
+) -> Iterator[tuple[int, list[CheckResult]]]:
+    """
+    Проверка столбцового результата без сборки записей: (номер строки, результаты проверок).
+    windows_for вызывается один раз на месяц
+    """
+    scale = "decadal" if isinstance(columns, DecadalColumns) else "monthly"
+    t_mean = columns.column("t_mean_c")
+    t_valid = columns.valid("t_mean_c")
+    precip = columns.column("precip_sum_mm")
+    p_valid = columns.valid("precip_sum_mm")
+    dekad = columns.column("dekad_no") if scale == "decadal" else None
+
+    windows_by_month: dict[int, Mapping[tuple[str, str], RankWindow]] = {}
+    for i, month in enumerate(columns.months()):
+        windows = windows_by_month.get(month)
+        if windows is None:
+            windows = windows_by_month[month] = windows_for(month)
+        yield i, _check_values(
+            scale=scale,
+            month=month,
+            period="M" if dekad is None else f"{dekad[i]}D",
+            t_mean=t_mean[i] if t_valid[i] else None,
+            precip=precip[i] if p_valid[i] else None,
+            windows=windows,
+        )
 
-def check_decadal_record_with_windows(
+
+def _check_values(
         *,
-        rec: DecadalRecord,
-        windows: dict[tuple[str, str], RankWindow],  # (scale="decadal", month=rec.date.month)
+        scale: str,
+        month: int,
+        period: str,
+        t_mean: Optional[float],
+        precip: Optional[int],
+        windows: Mapping[tuple[str, str], RankWindow],
 ) -> list[CheckResult]:
-    period = f"{rec.dekad_no}D"
+    m = metrics.current
+    t0 = time.perf_counter() if m is not None else 0.0
     results: list[CheckResult] = []
 
+    # t_mean_c vs warmest/coldest
     for metric in ("warmest", "coldest"):
         w = windows.get((metric, period))
         if w is None:
-            results.append(
-                in_min_max_range(window=_empty_window(metric, "decadal", rec.date.month, period), field="t_mean_c",
-                                 value=rec.t_mean_c))
-        else:
-            results.append(in_min_max_range(window=w, field="t_mean_c", value=rec.t_mean_c))
+            w = _empty_window(metric, scale, month, period)
+        results.append(in_min_max_range(window=w, field="t_mean_c", value=t_mean))
 
-    v_precip = None if rec.precip_sum_mm is None else float(rec.precip_sum_mm)
+    # precip_sum_mm vs wettest/driest
+    v_precip = None if precip is None else float(precip)
     for metric in ("wettest", "driest"):
         w = windows.get((metric, period))
         if w is None:
-            results.append(
-                in_min_max_range(window=_empty_window(metric, "decadal", rec.date.month, period), field="precip_sum_mm",
-                                 value=v_precip))
-        else:
-            results.append(in_min_max_range(window=w, field="precip_sum_mm", value=v_precip))
+            w = _empty_window(metric, scale, month, period)
+        results.append(in_min_max_range(window=w, field="precip_sum_mm", value=v_precip))
 
+    if m is not None:
+        m.add("checks", time.perf_counter() - t0, records=1, checks=len(results), failed=sum(not r.ok for r in results))
     return results
 
 
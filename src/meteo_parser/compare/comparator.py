@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 
-from src.meteo_parser.compare.models import CheckResult, RankWindow
+from meteo_parser.compare.models import CheckResult, RankWindow
 
 
 def in_min_max_range(
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from src.meteo_parser.compare.models import RankWindow
-from src.meteo_parser.db.repository import fetch_rank_values_for_month
+from typing import TYPE_CHECKING, Iterable
+
+from meteo_parser.compare.models import RankWindow
+from meteo_parser.db.repository import fetch_rank_values_for_month, fetch_window_aggregates
 from sqlalchemy.orm import Session
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
 
 def load_month_windows(
     session: Session,
@@ -18,17 +23,71 @@ def load_month_windows(
       windows[("coldest","3D")] -> RankWindow(...)
     """
     raw = fetch_rank_values_for_month(session, dataset=dataset, scale=scale, month=month)
+    return month_windows_from_values(dataset=dataset, scale=scale, month=month, raw=raw)
+
+
+async def load_many_month_windows(
+    session_factory: async_sessionmaker,
+    keys: Iterable[tuple[str, str, int]],
+    *,
+    concurrency: int = 8,
+) -> dict[tuple[str, str, int], dict[tuple[str, str], RankWindow]]:
+    """
+    load_month_windows сразу для многих (dataset, scale, month) - запросы идут параллельно
+    (db.async_repository.fetch_rank_values_for_months, не больше concurrency одновременно)
+    """
+    # async-часть sqlalchemy (greenlet) нужна только здесь
+    from meteo_parser.db.async_repository import fetch_rank_values_for_months
+
+    raw = await fetch_rank_values_for_months(session_factory, keys, concurrency=concurrency)
+    return {
+        (dataset, scale, month): month_windows_from_values(dataset=dataset, scale=scale, month=month, raw=values)
+        for (dataset, scale, month), values in raw.items()
+    }
+
+
+def load_windows_bulk(
+    session: Session,
+    *,
+    keys: Iterable[tuple[str, str, int]],
+) -> dict[tuple[str, str, int], dict[tuple[str, str], RankWindow]]:
+    """
+    load_month_windows для многих (dataset, scale, month) одним запросом
+    (min/max окон посчитаны в БД, см. db.repository.fetch_window_aggregates)
+    """
+    out: dict[tuple[str, str, int], dict[tuple[str, str], RankWindow]] = {}
+    for (dataset, scale, month), windows in fetch_window_aggregates(session, keys=keys).items():
+        out[(dataset, scale, month)] = {
+            (metric, period): RankWindow(
+                dataset=dataset,
+                metric=metric,
+                scale=scale,
+                month=month,
+                period=period,
+                values=agg.values,
+                min_value=agg.min_value,
+                max_value=agg.max_value,
+            )
+            for (metric, period), agg in windows.items()
+        }
+    return out
 
+
+def month_windows_from_values(
+    *,
+    dataset: str,
+    scale: str,
+    month: int,
+    raw: dict[tuple[str, str], list[float]],
+) -> dict[tuple[str, str], RankWindow]:
     out: dict[tuple[str, str], RankWindow] = {}
     for (metric, period), values in raw.items():
-        out[(metric, period)] = RankWindow(
+        out[(metric, period)] = RankWindow.from_values(
             dataset=dataset,
             metric=metric,
             scale=scale,
             month=month,
             period=period,
             values=values,
-            min_value=min(values) if values else None,
-            max_value=max(values) if values else None,
         )
     return out
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
 
 
 @dataclass(frozen=True)
@@ -11,11 +11,34 @@ class RankWindow:
     scale: str
     month: int
     period: str
-    values: list[float]
+    values: Sequence[float]
 
     min_value: Optional[float]
     max_value: Optional[float]
 
+    @classmethod
+    def from_values(
+            cls,
+            *,
+            dataset: str,
+            metric: str,
+            scale: str,
+            month: int,
+            period: str,
+            values: Sequence[float],
+    ) -> "RankWindow":
+        """Окно по значениям рангов (min/max считаются здесь)"""
+        return cls(
+            dataset=dataset,
+            metric=metric,
+            scale=scale,
+            month=month,
+            period=period,
+            values=values,
+            min_value=min(values) if values else None,
+            max_value=max(values) if values else None,
+        )
+
 
 @dataclass(frozen=True)
 class CheckResult:
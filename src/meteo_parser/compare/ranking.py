@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Mapping, Optional, Sequence
+
+from meteo_parser.compare.batch import CHECKS, CheckMatrix, Windows, period_name
+from meteo_parser.compare.models import RankWindow
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без неё - bisect по строкам
+    np = None
+
+"""
+Место нового значения в окне рангов ("новый 3-й самый тёплый июнь").
+
+- warmest/wettest: 1-е место - наибольшее значение, coldest/driest - наименьшее
+- ранги плотные, как в docker/ranks: равные значения делят ранг, следующее значение - следующий ранг
+- ключи окна (различные значения, для убывающих метрик - со знаком минус) сортируются один раз,
+  место значения - bisect за O(log n)
+- place_batch / place_matrix - то же для массивов значений (numpy.searchsorted по группам месяц/период)
+"""
+
+DESCENDING = frozenset({"warmest", "wettest"})
+
+
+def _key(metric: str, value: float) -> float:
+    return -value if metric in DESCENDING else value
+
+
+def rank_keys(metric: str, values: Sequence[float]) -> tuple[float, ...]:
+    """Различные значения окна по возрастанию ключа (1-е - рекорд)"""
+    return tuple(sorted({_key(metric, float(v)) for v in values}))
+
+
+@dataclass(frozen=True)
+class Placement:
+    """
+    Attributes:
+        rank: место значения (1 - рекорд); None - нет значения или окно пустое
+        tie: такое значение уже есть в окне (ранг общий)
+        beats_record: строго лучше текущего 1-го места
+        ranks: сколько рангов в окне (значение попадает в окно при rank <= ranks)
+    """
+    metric: str
+    period: str
+    value: Optional[float]
+    rank: Optional[int]
+    tie: bool
+    beats_record: bool
+    ranks: int
+
+    @property
+    def in_window(self) -> bool:
+        return self.rank is not None and self.rank <= self.ranks
+
+
+def place(metric: str, period: str, keys: Sequence[float], value: Optional[float]) -> Placement:
+    """Место value среди ключей rank_keys(metric, ...)"""
+    if value is None or not keys:
+        return Placement(metric, period, None if value is None else float(value), None, False, False, len(keys))
+
+    k = _key(metric, float(value))
+    i = bisect_left(keys, k)
+    tie = i < len(keys) and keys[i] == k
+    return Placement(metric, period, float(value), i + 1, tie, i == 0 and not tie, len(keys))
+
+
+def place_in_window(window: RankWindow, value: Optional[float]) -> Placement:
+    return place(window.metric, window.period, rank_keys(window.metric, window.values), value)
+
+
+@dataclass
+class RankArrays:
+    """
+    Пакетный результат по одной метрике
+
+    rank: 0 - нет места (нет значения/окна); tie, beats_record - по байту 0/1 на строку
+    """
+    metric: str
+    rank: array
+    tie: bytearray
+    beats_record: bytearray
+    ranks: array
+
+    def __len__(self) -> int:
+        return len(self.rank)
+
+    def new_records(self) -> list[int]:
+        """Номера строк, где значение - новый рекорд"""
+        return [i for i, b in enumerate(self.beats_record) if b]
+
+
+class RankPlacer:
+    """
+    Места значений в окнах одного scale
+
+    windows_for: month -> окна (metric, period) -> RankWindow (как в compare.batch.check_batch)
+    Ключи окон считаются один раз на (month, metric, period)
+    """
+
+    def __init__(self, windows_for: Callable[[int], Windows]) -> None:
+        self.windows_for = windows_for
+        self._windows: dict[int, Windows] = {}
+        self._keys: dict[tuple[int, str, str], tuple[float, ...]] = {}
+
+    def keys(self, month: int, metric: str, period: str) -> tuple[float, ...]:
+        k = (month, metric, period)
+        keys = self._keys.get(k)
+        if keys is None:
+            windows = self._windows.get(month)
+            if windows is None:
+                windows = self._windows[month] = self.windows_for(month)
+            w = windows.get((metric, period))
+            keys = self._keys[k] = rank_keys(metric, w.values) if w is not None else ()
+        return keys
+
+    def place(self, month: int, period: str, metric: str, value: Optional[float]) -> Placement:
+        return place(metric, period, self.keys(month, metric, period), value)
+
+    def place_batch(
+            self,
+            *,
+            metric: str,
+            months: Sequence[int],
+            periods: Sequence[int],
+            values: Sequence[float],
+            valid: Sequence[int],
+    ) -> RankArrays:
+        """
+        Args:
+            metric: warmest/coldest/wettest/driest
+            months, periods: месяц и период (0 - "M", 1..3 - декада) каждой строки
+            values, valid: значения и маска (0 - None)
+        """
+        if np is not None:
+            return self._place_batch_numpy(metric, months, periods, values, valid)
+
+        n = len(months)
+        rank = array("h", bytes(2 * n))
+        tie = bytearray(n)
+        beats = bytearray(n)
+        ranks = array("h", bytes(2 * n))
+        for i in range(n):
+            keys = self.keys(months[i], metric, period_name(periods[i]))
+            if not valid[i] or not keys:
+                continue
+            p = place(metric, "", keys, values[i])
+            rank[i] = p.rank
+            tie[i] = p.tie
+            beats[i] = p.beats_record
+            ranks[i] = len(keys)
+
+        return RankArrays(metric=metric, rank=rank, tie=tie, beats_record=beats, ranks=ranks)
+
+    def place_matrix(self, matrix: CheckMatrix) -> Mapping[str, RankArrays]:
+        """Места для всех метрик compare.batch.CHECKS по строкам CheckMatrix"""
+        return {
+            metric: self.place_batch(
+                metric=metric,
+                months=matrix.months,
+                periods=matrix.periods,
+                values=matrix.values[field],
+                valid=matrix.valid[field],
+            )
+            for metric, field in CHECKS
+        }
+
+    def _place_batch_numpy(
+            self,
+            metric: str,
+            months: Sequence[int],
+            periods: Sequence[int],
+            values: Sequence[float],
+            valid: Sequence[int],
+    ) -> RankArrays:
+        group = np.asarray(months, dtype=np.int64) * 4 + np.asarray(periods, dtype=np.int64)
+        v = np.asarray(values, dtype=np.float64)
+        if metric in DESCENDING:
+            v = -v
+        ok = np.frombuffer(bytes(valid), dtype=np.uint8) != 0
+
+        rank = np.zeros(len(group), dtype=np.int16)
+        tie = np.zeros(len(group), dtype=bool)
+        ranks = np.zeros(len(group), dtype=np.int16)
+        for g in np.unique(group).tolist():
+            keys = self.keys(g // 4, metric, period_name(g % 4))
+            if not keys:
+                continue
+            rows = np.flatnonzero((group == g) & ok)
+            sorted_keys = np.array(keys, dtype=np.float64)
+            pos = np.searchsorted(sorted_keys, v[rows], side="left")
+            rank[rows] = pos + 1
+            tie[rows] = (pos < len(keys)) & (sorted_keys[np.minimum(pos, len(keys) - 1)] == v[rows])
+            ranks[rows] = len(keys)
+
+        return RankArrays(
+            metric=metric,
+            rank=array("h", rank.tobytes()),
+            tie=bytearray(tie.astype(np.uint8).tobytes()),
+            beats_record=bytearray(((rank == 1) & ~tie).astype(np.uint8).tobytes()),
+            ranks=array("h", ranks.tobytes()),
+        )
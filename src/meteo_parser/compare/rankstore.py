@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from meteo_parser.compare.models import RankWindow
+
+"""
+Ранги без БД: хранилище, собранное прямо из docker/ranks/<dataset>/*.jsonl.
+
+- индекс (dataset, metric, scale, month, period) -> значения по возрастанию rank
+  (порядок как у fetch_rank_values_for_month: rank, затем порядок строк в файлах)
+- fetch_rank_values_for_month / load_month_windows / month_windows - те же ответы, что у db.repository,
+  compare.loader и compare.cache.RankWindowCache, так что compare.checks работает без БД
+- save()/load(): компактный бинарный снимок (заголовок JSON + массивы значений и годов),
+  load_or_build() пересобирает снимок, только если изменились исходные JSONL
+"""
+
+MAGIC = b"RNKS"
+SNAPSHOT_VERSION = 1
+
+# (dataset, metric, scale, month, period)
+RankKey = tuple[str, str, str, int, str]
+
+_HEAD = struct.Struct("<4sII")  # magic, version, длина JSON-заголовка
+
+
+def _jsonl_files(ranks_dir: Path) -> list[Path]:
+    """Все *.jsonl под ranks_dir в порядке сортировки путей (как в 002_seed_rank_rows.sh)"""
+    return sorted(ranks_dir.rglob("*.jsonl"))
+
+
+def _sources(ranks_dir: Path) -> list[list]:
+    """Отпечаток исходных файлов: [путь, size, mtime_ns]"""
+    out = []
+    for path in _jsonl_files(ranks_dir):
+        st = path.stat()
+        out.append([path.relative_to(ranks_dir).as_posix(), st.st_size, st.st_mtime_ns])
+    return out
+
+
+class RankStore:
+    """
+    Ранги в памяти процесса
+
+    - from_jsonl(ranks_dir) / load(snapshot) / load_or_build(ranks_dir, snapshot)
+    - values(dataset, metric, scale, month, period) -> значения по rank
+    - fetch_rank_values_for_month(...), load_month_windows(...), month_windows(...) - замена доступа к БД
+    """
+
+    def __init__(
+            self,
+            index: Mapping[RankKey, tuple[float, ...]],
+            years: Optional[Mapping[RankKey, tuple[Optional[int], ...]]] = None,
+            sources: Optional[list[list]] = None,
+    ) -> None:
+        self._index = dict(index)
+        self._years = dict(years or {})
+        self.sources = sources or []
+
+        # (dataset, scale, month) -> ключи окон месяца
+        self._by_month: dict[tuple[str, str, int], list[RankKey]] = defaultdict(list)
+        for key in sorted(self._index):
+            dataset, _metric, scale, month, _period = key
+            self._by_month[(dataset, scale, month)].append(key)
+        self._windows: dict[tuple[str, str, int], Mapping[tuple[str, str], RankWindow]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> Iterable[RankKey]:
+        return self._index.keys()
+
+    def values(self, dataset: str, metric: str, scale: str, month: int, period: str) -> tuple[float, ...]:
+        return self._index.get((dataset, metric, scale, month, period), ())
+
+    def years(self, dataset: str, metric: str, scale: str, month: int, period: str) -> tuple[Optional[int], ...]:
+        """Годы рангов в том же порядке, что values()"""
+        return self._years.get((dataset, metric, scale, month, period), ())
+
+    # ---- замена db.repository / compare.loader / RankWindowCache ----
+
+    def fetch_rank_values_for_month(
+            self,
+            *,
+            dataset: str,
+            scale: str,
+            month: int,
+            metrics: tuple[str, ...] = ("warmest", "coldest", "wettest", "driest"),
+    ) -> dict[tuple[str, str], list[float]]:
+        out: dict[tuple[str, str], list[float]] = {}
+        for key in self._by_month.get((dataset, scale, month), ()):
+            _dataset, metric, _scale, _month, period = key
+            if metric in metrics:
+                out[(metric, period)] = list(self._index[key])
+        return out
+
+    def load_month_windows(self, *, dataset: str, scale: str, month: int) -> dict[tuple[str, str], RankWindow]:
+        return dict(self.month_windows(dataset, scale, month))
+
+    def month_windows(self, dataset: str, scale: str, month: int) -> Mapping[tuple[str, str], RankWindow]:
+        """Неизменяемые окна месяца (собираются один раз)"""
+        key = (dataset, scale, month)
+        windows = self._windows.get(key)
+        if windows is None:
+            out: dict[tuple[str, str], RankWindow] = {}
+            for k in self._by_month.get(key, ()):
+                _dataset, metric, _scale, _month, period = k
+                out[(metric, period)] = RankWindow.from_values(
+                    dataset=dataset, metric=metric, scale=scale, month=month, period=period,
+                    values=self._index[k],
+                )
+            windows = self._windows[key] = MappingProxyType(out)
+        return windows
+
+    # ---- сборка и снимки ----
+
+    @classmethod
+    def from_jsonl(cls, ranks_dir: Path) -> "RankStore":
+        """Читает все ranks_dir/**/*.jsonl (строки как в rank_rows: dataset, metric, scale, month, period, rank, ...)"""
+        rows: dict[RankKey, list[tuple[int, int, float, Optional[int]]]] = defaultdict(list)
+        seq = 0
+        for path in _jsonl_files(ranks_dir):
+            with path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    obj = json.loads(line)
+                    key = (obj["dataset"], obj["metric"], obj["scale"], int(obj["month"]), obj["period"])
+                    year = obj.get("year")
+                    rows[key].append((int(obj["rank"]), seq, float(obj["value"]), None if year is None else int(year)))
+                    seq += 1
+
+        index: dict[RankKey, tuple[float, ...]] = {}
+        years: dict[RankKey, tuple[Optional[int], ...]] = {}
+        for key, items in rows.items():
+            items.sort()
+            index[key] = tuple(v for _rank, _seq, v, _year in items)
+            years[key] = tuple(y for _rank, _seq, _v, y in items)
+        return cls(index, years, sources=_sources(ranks_dir))
+
+    def save(self, path: Path) -> None:
+        """Бинарный снимок: заголовок (ключи, смещения, исходники) + array('d') значений + array('i') годов"""
+        keys = sorted(self._index)
+        values = array("d")
+        years = array("i")
+        entries = []
+        for key in keys:
+            vals = self._index[key]
+            ys = self._years.get(key) or (None,) * len(vals)
+            entries.append([*key, len(values), len(vals)])
+            values.extend(vals)
+            years.extend(-1 if y is None else y for y in ys)
+
+        header = json.dumps({"keys": entries, "sources": self.sources}, ensure_ascii=False).encode("utf-8")
+        tmp = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as fh:
+            fh.write(_HEAD.pack(MAGIC, SNAPSHOT_VERSION, len(header)))
+            fh.write(header)
+            fh.write(values.tobytes())
+            fh.write(years.tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "RankStore":
+        data = path.read_bytes()
+        magic, version, header_len = _HEAD.unpack_from(data)
+        if magic != MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: not a rank snapshot (version {SNAPSHOT_VERSION})")
+
+        pos = _HEAD.size
+        header = json.loads(data[pos:pos + header_len])
+        pos += header_len
+        n = sum(count for *_key, _offset, count in header["keys"])
+        values = array("d")
+        values.frombytes(data[pos:pos + n * values.itemsize])
+        pos += n * values.itemsize
+        years = array("i")
+        years.frombytes(data[pos:pos + n * years.itemsize])
+
+        index: dict[RankKey, tuple[float, ...]] = {}
+        year_index: dict[RankKey, tuple[Optional[int], ...]] = {}
+        for dataset, metric, scale, month, period, offset, count in header["keys"]:
+            key = (dataset, metric, scale, month, period)
+            index[key] = tuple(values[offset:offset + count])
+            year_index[key] = tuple(None if y < 0 else y for y in years[offset:offset + count])
+        return cls(index, year_index, sources=header["sources"])
+
+    @classmethod
+    def load_or_build(cls, ranks_dir: Path, snapshot: Optional[Path] = None) -> "RankStore":
+        """Снимок, если он есть и собран из тех же JSONL; иначе сборка из JSONL (и запись снимка)"""
+        if snapshot is not None and snapshot.exists():
+            try:
+                store = cls.load(snapshot)
+            except (ValueError, struct.error):
+                store = None
+            if store is not None and store.sources == _sources(ranks_dir):
+                return store
+
+        store = cls.from_jsonl(ranks_dir)
+        if snapshot is not None:
+            store.save(snapshot)
+        return store
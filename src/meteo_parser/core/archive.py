@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from meteo_parser.core import metrics
+from meteo_parser.core.columnar import ColumnarResult, DecadalColumns, MonthlyColumns, RecordColumns
+from meteo_parser.core.index import StationIndex
+from meteo_parser.core.models import Record
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без неё битовые маски пакуются таблицей
+    np = None
+
+"""
+Столбцовый архив разобранных записей: один файл, открывается через mmap без разбора телеграмм.
+
+Файл - заголовок и последовательность чанков; чанк - записи одного вида за один период
+(месяц для monthly, декада для decadal), отсортированные по station_id:
+
+    файл:  MAGIC, версия                                       (_FILE_HEAD, 8 байт)
+    чанк:  "CHNK", длина JSON-заголовка, длина данных           (_CHUNK_HEAD, 16 байт)
+           JSON: scale, period (ordinal даты), rows, stations [min, max], byteorder,
+                 columns: [name, typecode, itemsize, offset, mask_offset|null]
+           данные: столбцы фиксированной ширины (typecode как в core.columnar.*_SCHEMA)
+                   и битовые маски валидности (бит i - строка i, младший бит первым);
+                   каждый блок выровнен на 8 байт, смещения - от начала данных чанка
+
+- чтение: ArchiveChunk.column(name) - memoryview прямо в mmap (без копирования), to_numpy - так же
+- append(result): новые чанки дописываются в конец файла; если период уже есть, его записи сливаются
+  с новыми (при повторе station_id побеждает новая запись) и пишется новый чанк, старый остаётся
+  в файле мёртвым до compact(); читатели видят только последний чанк каждого (scale, period)
+- недописанный хвост (обрыв при записи) при чтении пропускается, при следующем append - обрезается
+- query(): записи по станциям, диапазону периодов, месяцу, декаде. Станции ищутся по индексу
+  (core/index.py, файл <архив>.idx, обновляется в append), периоды - bisect по отсортированным
+  периодам чанков; данные чанков без подходящих записей не читаются (только их заголовки при открытии)
+"""
+
+MAGIC = b"MTCA"
+ARCHIVE_VERSION = 1
+
+_FILE_HEAD = struct.Struct("<4sHxx")  # magic, версия
+_CHUNK_HEAD = struct.Struct("<4sIQ")  # "CHNK", длина JSON-заголовка, длина данных
+_CHUNK_MAGIC = b"CHNK"
+_ALIGN = 8
+
+SCALES = ("monthly", "decadal")
+_COLUMNS_CLS = {"monthly": MonthlyColumns, "decadal": DecadalColumns}
+
+# байт битовой маски -> 8 байт 0/1 (младший бит первым)
+_UNPACK = [bytes((b >> k) & 1 for k in range(8)) for b in range(256)]
+# 8 байт 0/1 (little-endian int) * _GATHER >> 56 -> байт маски
+_GATHER = 0x0102040810204080
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+def pack_bits(mask: bytes) -> bytes:
+    """Маска по байту 0/1 на строку -> битовая маска (младший бит первым, как numpy.packbits(bitorder="little"))"""
+    if np is not None:
+        return np.packbits(np.frombuffer(mask, dtype=np.uint8), bitorder="little").tobytes()
+    mask = bytes(mask) + bytes(_pad(len(mask)))
+    return bytes(
+        (int.from_bytes(mask[i:i + 8], "little") * _GATHER >> 56) & 0xFF
+        for i in range(0, len(mask), 8)
+    )
+
+
+def unpack_bits(bits: bytes, n: int) -> bytes:
+    """Битовая маска -> n байт 0/1"""
+    if np is not None:
+        return np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=n, bitorder="little").tobytes()
+    return b"".join([_UNPACK[b] for b in bits])[:n]
+
+
+@dataclass
+class AppendStats:
+    chunks: int = 0
+    rows: int = 0
+    merged: int = 0  # чанков, слитых с уже бывшим в архиве периодом
+    bytes: int = 0
+
+
+class ArchiveChunk:
+    """
+    Чанк архива: записи одного вида за один период
+
+    - column(name): memoryview значений (typecode столбца) прямо в mmap архива
+    - valid(name): битовая маска (memoryview) или None для полей без пропусков
+    - value(name, i) / row(i) / iter(chunk): значения и записи по требованию
+    """
+
+    def __init__(self, buf: memoryview, offset: int, header: dict, data_offset: int, size: int) -> None:
+        self.offset = offset  # начало чанка в файле
+        self.size = size  # длина чанка в файле целиком
+        self.scale: str = header["scale"]
+        self.period = date.fromordinal(header["period"])
+        self.rows: int = header["rows"]
+        self.station_min, self.station_max = header["stations"]
+        self.record_cls = _COLUMNS_CLS[self.scale].record_cls
+        self.schema = _COLUMNS_CLS[self.scale].schema
+
+        self._columns: Dict[str, memoryview] = {}
+        self._masks: Dict[str, memoryview] = {}
+        for name, code, itemsize, pos, mask_pos in header["columns"]:
+            if array(code).itemsize != itemsize:
+                raise ValueError(f"column {name!r}: typecode {code!r} is {array(code).itemsize} bytes here, {itemsize} in archive")
+            start = data_offset + pos
+            self._columns[name] = buf[start:start + self.rows * itemsize].cast(code)
+            if mask_pos is not None:
+                start = data_offset + mask_pos
+                self._masks[name] = buf[start:start + (self.rows + 7) // 8]
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.scale, self.period.toordinal()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __iter__(self) -> Iterator[Record]:
+        for i in range(self.rows):
+            yield self.row(i)
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    def valid(self, name: str) -> Optional[memoryview]:
+        return self._masks.get(name)
+
+    def is_valid(self, name: str, i: int) -> bool:
+        mask = self._masks.get(name)
+        return mask is None or bool(mask[i >> 3] >> (i & 7) & 1)
+
+    def value(self, name: str, i: int) -> Any:
+        if not self.is_valid(name, i):
+            return None
+        v = self._columns[name][i]
+        return date.fromordinal(v) if name == "date" else v
+
+    def row(self, i: int) -> Record:
+        return self.record_cls(**{name: self.value(name, i) for name, _, _ in self.schema})
+
+    @property
+    def dekad_no(self) -> Optional[int]:
+        """Номер декады периода (None для monthly)"""
+        return (self.period.day - 1) // 10 + 1 if self.scale == "decadal" else None
+
+    def to_numpy(self, name: str):
+        """(values, mask): values - представление numpy без копирования; mask - bool-массив (распакованный) или None"""
+        values = np.frombuffer(self._columns[name], dtype=self._columns[name].format)
+        mask = self._masks.get(name)
+        if mask is None:
+            return values, None
+        return values, np.unpackbits(np.frombuffer(mask, dtype=np.uint8), count=self.rows, bitorder="little").view(np.bool_)
+
+    def to_columns(self, keep_raw_line: bool = False) -> RecordColumns:
+        """Копия чанка в RecordColumns (raw_line в архиве не хранится - пустые строки)"""
+        cols = _COLUMNS_CLS[self.scale](keep_raw_line)
+        cols.extend_columns(
+            self.rows,
+            {name: self._columns[name].tobytes() for name, _, _ in self.schema},
+            {name: unpack_bits(mask, self.rows) for name, mask in self._masks.items()},
+        )
+        return cols
+
+
+class ColumnarArchive:
+    """
+    Архив записей в одном файле (создаётся при первом append)
+
+    - chunks(scale=None): живые чанки (последние для каждого периода) по scale и периоду
+    - iter_records(scale=None): все записи
+    - read(scale): копия всех живых записей scale в RecordColumns
+    - append(result): дописать ColumnarResult (по чанку на вид записи и период)
+    - compact(): переписать файл без мёртвых чанков
+    - query(...): выборка по станциям и периодам; index(): индекс станций
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._all: List[ArchiveChunk] = []
+        self._live: Dict[Tuple[str, int], ArchiveChunk] = {}
+        self._end = 0  # конец последнего целого чанка
+        self._index: Optional[StationIndex] = None
+        self._periods: Dict[str, List[int]] = {}
+        self.refresh()
+
+    def __enter__(self) -> "ColumnarArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Отпускает mmap; memoryview из column() держат его, пока живы"""
+        self._mm = None
+        self._all = []
+        self._live = {}
+        self._index = None
+        self._periods = {}
+
+    # ---- чтение ----
+
+    def refresh(self) -> None:
+        """Перечитать заголовки чанков (после записи в файл другим процессом)"""
+        self.close()
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            self._end = 0
+            return
+
+        with self.path.open("rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEAD.unpack_from(mm)
+        if magic != MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{self.path}: not a columnar archive (version {ARCHIVE_VERSION})")
+
+        buf = memoryview(mm)
+        pos = _FILE_HEAD.size
+        size = len(mm)
+        while pos + _CHUNK_HEAD.size <= size:
+            magic, header_len, data_len = _CHUNK_HEAD.unpack_from(mm, pos)
+            data_offset = pos + _CHUNK_HEAD.size + header_len + _pad(header_len)
+            end = data_offset + data_len
+            if magic != _CHUNK_MAGIC or end > size:
+                break  # недописанный хвост
+            header = json.loads(bytes(buf[pos + _CHUNK_HEAD.size:pos + _CHUNK_HEAD.size + header_len]))
+            if header.get("byteorder", sys.byteorder) != sys.byteorder:
+                raise ValueError(f"{self.path}: written on a {header['byteorder']}-endian machine")
+            chunk = ArchiveChunk(buf, pos, header, data_offset, end - pos)
+            self._all.append(chunk)
+            self._live[chunk.key] = chunk
+            pos = end
+
+        self._mm = mm
+        self._end = pos
+
+    def __len__(self) -> int:
+        return sum(c.rows for c in self._live.values())
+
+    def chunks(self, scale: Optional[str] = None) -> List[ArchiveChunk]:
+        return sorted(
+            (c for c in self._live.values() if scale is None or c.scale == scale),
+            key=lambda c: (SCALES.index(c.scale), c.period),
+        )
+
+    def chunk(self, scale: str, period: date) -> Optional[ArchiveChunk]:
+        return self._live.get((scale, period.toordinal()))
+
+    def iter_records(self, scale: Optional[str] = None) -> Iterator[Record]:
+        for chunk in self.chunks(scale):
+            yield from chunk
+
+    def read(self, scale: str) -> RecordColumns:
+        cols = _COLUMNS_CLS[scale]()
+        for chunk in self.chunks(scale):
+            cols.extend_columns(
+                chunk.rows,
+                {name: chunk.column(name).tobytes() for name, _, _ in cols.schema},
+                {name: unpack_bits(chunk.valid(name), chunk.rows) for name, _, nullable in cols.schema if nullable},
+            )
+        return cols
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".idx")
+
+    def index(self) -> StationIndex:
+        """Индекс станций из <архив>.idx; если файла нет или он отстал от архива - пересборка и запись"""
+        if self._index is None:
+            index = StationIndex.load(self.index_path, self._end, len(self._live))
+            if index is None:
+                index = StationIndex.build(self.chunks())
+                if self._end:
+                    index.save(self.index_path, self._end, len(self._live))
+            self._index = index
+        return self._index
+
+    def query(
+            self,
+            *,
+            stations: Optional[Iterable[int]] = None,
+            start: Optional[date] = None,
+            stop: Optional[date] = None,
+            scale: Optional[str] = None,
+            month: Optional[int] = None,
+            dekad_no: Optional[int] = None,
+    ) -> Iterator[Record]:
+        """
+        Записи, период которых (начало месяца/декады) в [start, stop]
+
+        stations: только эти station_id (поиск по индексу, O(log n) на станцию); None - все
+        month / dekad_no: месяц периода (в любом году) / номер декады (только decadal)
+        Порядок: monthly, затем decadal; внутри - по станции и дате (stations) или по дате и станции
+        """
+        lo = start.toordinal() if start is not None else 1
+        hi = stop.toordinal() if stop is not None else date.max.toordinal()
+        scales = [scale] if scale is not None else list(SCALES)
+        if dekad_no is not None:
+            scales = [s for s in scales if s == "decadal"]
+
+        def wanted(chunk: ArchiveChunk) -> bool:
+            return (month is None or chunk.period.month == month) and (dekad_no is None or chunk.dekad_no == dekad_no)
+
+        for sc in scales:
+            if stations is None:
+                periods = self._scale_periods(sc)
+                for period in periods[bisect_left(periods, lo):bisect_right(periods, hi)]:
+                    chunk = self._live[(sc, period)]
+                    if wanted(chunk):
+                        yield from chunk
+                continue
+
+            index = self.index()
+            for station_id in sorted(set(stations)):
+                for period, row in index.lookup(sc, station_id, lo, hi):
+                    chunk = self._live[(sc, period)]
+                    if wanted(chunk):
+                        yield chunk.row(row)
+
+    def _scale_periods(self, scale: str) -> List[int]:
+        periods = self._periods.get(scale)
+        if periods is None:
+            periods = self._periods[scale] = sorted(p for s, p in self._live if s == scale)
+        return periods
+
+    def stats(self) -> dict:
+        return {
+            "chunks": len(self._live),
+            "dead_chunks": len(self._all) - len(self._live),
+            "monthly": sum(c.rows for c in self.chunks("monthly")),
+            "decadal": sum(c.rows for c in self.chunks("decadal")),
+            "bytes": self._end,
+        }
+
+    # ---- запись ----
+
+    def append(self, result: ColumnarResult) -> AppendStats:
+        """Дописывает записи result; все чанки одного вызова - одной записью в файл и fsync"""
+        stats = AppendStats()
+        parts: List[bytes] = []
+        written: List[Tuple[str, int]] = []
+        with metrics.stage("archive") as st:
+            for scale, cols in (("monthly", result.monthly), ("decadal", result.decadal)):
+                for period, rows in sorted(_group_by_period(cols).items()):
+                    old = self._live.get((scale, period))
+                    if old is not None:
+                        merged = old.to_columns()
+                        stats.merged += 1
+                    else:
+                        merged = _COLUMNS_CLS[scale]()
+                    merged.extend_columns(*_take(cols, rows))
+
+                    # последняя запись каждой станции, по возрастанию station_id
+                    last = {sid: i for i, sid in enumerate(merged.columns["station_id"])}
+                    order = [last[sid] for sid in sorted(last)]
+                    parts.append(_encode_chunk(scale, period, merged, order))
+                    written.append((scale, period))
+                    stats.chunks += 1
+                    stats.rows += len(order)
+
+            if parts:
+                self._write(parts, written)
+                stats.bytes = sum(len(part) for part in parts)
+        if st:
+            st.count(chunks=stats.chunks, rows=stats.rows, bytes=stats.bytes)
+        return stats
+
+    def _write(self, parts: List[bytes], written: List[Tuple[str, int]]) -> None:
+        index = self.index()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("r+b" if self.path.exists() else "wb") as fh:
+            if self._end == 0:
+                fh.write(_FILE_HEAD.pack(MAGIC, ARCHIVE_VERSION))
+            else:
+                fh.seek(self._end)
+            for part in parts:
+                fh.write(part)
+            fh.truncate()  # хвост, оставшийся от оборванной записи
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.refresh()
+
+        # индекс - вслед за архивом: строки переписанных периодов заменяются строками новых чанков
+        index.update(self._live[key] for key in written)
+        index.save(self.index_path, self._end, len(self._live))
+        self._index = index
+
+    def compact(self) -> int:
+        """Переписывает архив только с живыми чанками (tmp + replace); возвращает освобождённые байты"""
+        if self._mm is None:
+            return 0
+        index = self.index()
+        before = self._end
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as fh:
+            fh.write(_FILE_HEAD.pack(MAGIC, ARCHIVE_VERSION))
+            for chunk in self.chunks():
+                fh.write(self._mm[chunk.offset:chunk.offset + chunk.size])
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.close()
+        os.replace(tmp, self.path)
+        self.refresh()
+        # строки внутри чанков не меняются - индекс тот же, но для новой длины архива
+        index.save(self.index_path, self._end, len(self._live))
+        self._index = index
+        return before - self._end
+
+
+def _group_by_period(cols: RecordColumns) -> Dict[int, List[int]]:
+    """ordinal даты -> номера строк (даты записей - начало месяца/декады, т.е. сам период)"""
+    groups: Dict[int, List[int]] = {}
+    for i, o in enumerate(cols.columns["date"]):
+        rows = groups.get(o)
+        if rows is None:
+            groups[o] = [i]
+        else:
+            rows.append(i)
+    return groups
+
+
+def _take(cols: RecordColumns, rows: List[int]) -> Tuple[int, Dict[str, bytes], Dict[str, bytes]]:
+    """Аргументы extend_columns для строк rows из cols"""
+    values = {}
+    masks = {}
+    if np is not None:
+        idx = np.asarray(rows, dtype=np.intp)
+        for name, code, nullable in cols.schema:
+            values[name] = np.frombuffer(cols.columns[name], dtype=code)[idx].tobytes()
+            if nullable:
+                masks[name] = np.frombuffer(cols.masks[name], dtype=np.uint8)[idx].tobytes()
+        return len(rows), values, masks
+
+    for name, code, nullable in cols.schema:
+        col = cols.columns[name]
+        values[name] = array(code, [col[i] for i in rows]).tobytes()
+        if nullable:
+            mask = cols.masks[name]
+            masks[name] = bytes([mask[i] for i in rows])
+    return len(rows), values, masks
+
+
+def _encode_chunk(scale: str, period: int, cols: RecordColumns, order: List[int]) -> bytes:
+    n, values, masks = _take(cols, order)
+    body = bytearray()
+    columns = []
+    for name, code, nullable in cols.schema:
+        pos = len(body)
+        body += values[name]
+        body += bytes(_pad(len(body)))
+        mask_pos = None
+        if nullable:
+            mask_pos = len(body)
+            body += pack_bits(masks[name])
+            body += bytes(_pad(len(body)))
+        columns.append([name, code, cols.columns[name].itemsize, pos, mask_pos])
+
+    stations = cols.columns["station_id"]
+    header = json.dumps({
+        "scale": scale,
+        "period": period,
+        "rows": n,
+        "stations": [stations[order[0]], stations[order[-1]]],
+        "byteorder": sys.byteorder,
+        "columns": columns,
+    }).encode("utf-8")
+    return b"".join((
+        _CHUNK_HEAD.pack(_CHUNK_MAGIC, len(header), len(body)),
+        header,
+        bytes(_pad(len(header))),
+        bytes(body),
+    ))
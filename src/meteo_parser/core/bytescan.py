@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import codecs
+import re
+from typing import Iterable, Optional, Sequence
+
+"""
+Работа с сырыми байтами телеграмм (для режима mmap в TelegramReader).
+
+- detect_encoding(): определение кодировки файла (UTF-8 / CP1251 / KOI8-R)
+- relevant_bytes(): вырезает из файла только строки, которые могут попасть в блоки
+  (заголовки CLIMAT/DEKADA, строки станций, любые не-ASCII строки), не декодируя остальное
+
+Строки станций - ASCII во всех поддерживаемых кодировках, поэтому кодировка
+нужна только для строк с не-ASCII байтами (КЛИМАТ, ДЕКАДА, ...).
+"""
+
+DEFAULT_ENCODINGS = ("utf-8", "cp1251", "koi8-r")
+
+SAMPLE_SIZE = 64 * 1024
+
+# частоты букв русского языка (%), для выбора между однобайтовыми кодировками
+_RU_FREQ = {
+    "о": 10.97, "е": 8.45, "а": 8.01, "и": 7.35, "н": 6.70, "т": 6.26, "с": 5.47, "р": 4.73,
+    "в": 4.54, "л": 4.40, "к": 3.49, "м": 3.21, "д": 2.98, "п": 2.81, "у": 2.62, "я": 2.01,
+    "ы": 1.90, "ь": 1.74, "г": 1.70, "з": 1.65, "б": 1.59, "ч": 1.44, "й": 1.21, "х": 0.97,
+    "ж": 0.94, "ш": 0.73, "ю": 0.64, "ц": 0.48, "щ": 0.36, "э": 0.32, "ф": 0.26, "ъ": 0.04,
+    "ё": 0.04,
+}
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+# пробелы ASCII в смысле str.split()
+_WS = rb"[ \t\r\x0b\x0c\x1c-\x1f]*"
+
+
+def _is_utf8(encoding: str) -> bool:
+    return codecs.lookup(encoding).name == "utf-8"
+
+
+def _cyrillic_score(text: str) -> float:
+    """Средняя частота не-ASCII символов как русских букв (мусор даёт низкий балл)"""
+    total = 0
+    score = 0.0
+    for ch in text:
+        if ch.isascii():
+            continue
+        total += 1
+        score += _RU_FREQ.get(ch.lower(), 0.0)
+    return score / total if total else 0.0
+
+
+def detect_encoding(data: bytes, candidates: Sequence[str] = DEFAULT_ENCODINGS) -> str:
+    """
+    Определяет кодировку по образцу байтов
+
+    - чистый ASCII -> первая кандидатура
+    - UTF-8, если образец корректно декодируется как UTF-8
+    - иначе однобайтовая кодировка с лучшим "русским" частотным баллом
+
+    Args:
+        data: образец (начало файла или строки с не-ASCII байтами)
+        candidates: кодировки в порядке предпочтения
+
+    Returns:
+        имя кодировки из candidates
+    """
+    m = _NON_ASCII.search(data)
+    if m is None:
+        return candidates[0]
+    sample = data[max(0, m.start() - 1024): m.start() + SAMPLE_SIZE]
+
+    best: Optional[str] = None
+    best_score = -1.0
+    for enc in candidates:
+        try:
+            # final=False: образец может обрываться посреди многобайтового символа
+            text = codecs.getincrementaldecoder(enc)("strict").decode(sample, final=False)
+        except UnicodeDecodeError:
+            continue
+        if _is_utf8(enc):
+            return enc
+        score = _cyrillic_score(text)
+        if score > best_score:
+            best, best_score = enc, score
+
+    return best if best is not None else candidates[0]
+
+
+def _relevant_line_re(keywords: Iterable[str]) -> "re.Pattern[bytes]":
+    """
+    Строка нужна, если:
+    - station: первая группа начинается с 5 цифр (кандидат в строку станции)
+    - other: содержит не-ASCII байты или ASCII-ключевое слово (CLIMAT, DEKADA, ASCII-ключи замен)
+    Строки с не-ASCII байтами оставляются всегда: в них может быть заголовок, пробел-NBSP и т.п.
+    """
+    words = sorted({w.encode("ascii") for w in keywords if w and w.isascii()}, key=len, reverse=True)
+    alternatives = b"|".join(re.escape(w) for w in words)
+    return re.compile(
+        rb"^(?P<station>" + _WS + rb"[0-9]{5}[^\n]*)"
+        rb"|^(?P<other>[^\n]*?(?:[\x80-\xff]|" + alternatives + rb")[^\n]*)",
+        re.MULTILINE | re.IGNORECASE,
+    )
+
+
+class ByteScanner:
+    """Сборщик нужных строк из байтов файла; регулярка компилируется один раз на reader"""
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self._line_re = _relevant_line_re(["CLIMAT", "DEKADA", *keywords])
+
+    def relevant_bytes(self, buf) -> Optional[bytes]:
+        """
+        Возвращает нужные строки файла, склеенные через b'\\n'
+        (строки станций до первого возможного заголовка отбрасываются).
+        None - если в файле есть одиночные '\\r' и построчный отбор невозможен
+        """
+        if _LONE_CR.search(buf) is not None:
+            return None
+
+        out = []
+        seen_header = False
+        for m in self._line_re.finditer(buf):
+            if m.lastgroup == "other":
+                seen_header = True
+            elif not seen_header:
+                continue
+            out.append(m.group())
+
+        return b"\n".join(out)
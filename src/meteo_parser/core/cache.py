@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+"""
+Дисковый кэш результатов разбора по содержимому файла.
+
+- ключ: sha256(версия парсера и настройки чтения TelegramReader.fingerprint() + содержимое файла) -
+  одинаковые бюллетени в разных папках и под разными именами дают одно попадание
+- значение: FileParseResult.to_rows(), pickle + zlib
+- бюджет по размеру: при превышении max_bytes удаляются давно не использованные записи (LRU по mtime файла,
+  mtime обновляется при каждом попадании)
+- битая/недописанная или удалённая параллельным процессом запись - промах, а не ошибка разбора
+"""
+
+HASH_CHUNK = 1024 * 1024
+STALE_TMP_SECONDS = 3600  # tmp старше этого - от убитого процесса (свежий может дописываться параллельным put)
+
+
+def file_sha256(path: Path, salt: bytes = b"") -> str:
+    """sha256 содержимого файла (читается кусками), опционально с префиксом salt"""
+    h = hashlib.sha256(salt)
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+
+class ParseCache:
+    """
+    Кэш FileParseResult.to_rows() в директории cache_dir
+
+    - key(path, version): ключ файла с учётом версии парсера и настроек чтения
+    - get(key) / put(key, rows)
+    - stats: счётчики попаданий/промахов/вытеснений
+    - auto_evict=False: put не вытесняет (копии кэша в воркерах), бюджет соблюдает rescan() в родителе
+    - rescan(): перечитать размеры с диска (записи других процессов) и вытеснить лишнее
+    """
+
+    SUFFIX = ".bin"
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 256 * 1024 * 1024, auto_evict: bool = True) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.auto_evict = auto_evict
+        self.stats = CacheStats()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # key -> размер файла, от давно использованных к недавним
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._scan()
+        self._evict()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def key(self, path: Path, version: str) -> str:
+        return file_sha256(path, salt=f"{version}\0".encode())
+
+    def get(self, key: str) -> Optional[Any]:
+        """Значение по ключу; нет файла, битый или недописанный файл - промах (битый удаляется)"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            rows = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            self._forget(key)
+            self.stats.misses += 1
+            return None
+        except (zlib.error, pickle.UnpicklingError, EOFError):
+            path.unlink(missing_ok=True)
+            self._forget(key)
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # вытеснен другим процессом после чтения
+            self._forget(key)
+            return rows
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        return rows
+
+    def put(self, key: str, rows: Any) -> None:
+        data = zlib.compress(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        self._forget(key)
+        self._lru[key] = len(data)
+        self._total += len(data)
+        self.stats.writes += 1
+        if self.auto_evict:
+            self._evict()
+
+    def rescan(self) -> None:
+        self._lru.clear()
+        self._total = 0
+        self._scan()
+        self._evict()
+
+    def clear(self) -> None:
+        for key in list(self._lru):
+            self._path(key).unlink(missing_ok=True)
+        self._lru.clear()
+        self._total = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def _scan(self) -> None:
+        """Восстанавливает LRU-порядок по mtime файлов кэша; удаляет *.tmp, брошенные прерванными put"""
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}.*.tmp"):
+            try:
+                if time.time() - path.stat().st_mtime > STALE_TMP_SECONDS:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # вытеснен параллельным процессом
+                continue
+            entries.append((st.st_mtime_ns, path.stem, st.st_size))
+        for _mtime, key, size in sorted(entries):
+            self._lru[key] = size
+            self._total += size
+
+    def _forget(self, key: str) -> None:
+        size = self._lru.pop(key, None)
+        if size is not None:
+            self._total -= size
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and len(self._lru) > 1:
+            key, size = self._lru.popitem(last=False)
+            self._total -= size
+            self._path(key).unlink(missing_ok=True)
+            self.stats.evictions += 1
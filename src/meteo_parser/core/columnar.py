@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from meteo_parser.core.models import DecadalRecord, MonthlyRecord, Record
+
+"""
+Столбцовое представление результата разбора.
+
+Вместо списка дата-классов - по одному типизированному массиву (array.array) на поле
+и маска валидности (bytearray, 1 - значение есть) для полей, которые могут быть None.
+
+- date хранится как date.toordinal()
+- raw_line по умолчанию не хранится (keep_raw_line=True - список строк)
+- row(i) / iter() собирают MonthlyRecord/DecadalRecord по требованию
+- to_numpy(name) отдаёт (values, mask) как представления numpy без копирования (если numpy установлен)
+"""
+
+# (поле, typecode array.array, может ли быть None)
+Schema = Tuple[Tuple[str, str, bool], ...]
+
+MONTHLY_SCHEMA: Schema = (
+    ("date", "i", False),
+    ("station_id", "i", False),
+    ("p_station_hpa", "d", True),
+    ("p_sea_hpa", "d", True),
+    ("t_mean_c", "d", True),
+    ("t_daily_std_c", "d", True),
+    ("t_min_daily_c", "d", True),
+    ("t_max_daily_c", "d", True),
+    ("e_vapor_hpa", "d", True),
+    ("precip_sum_mm", "i", True),
+    ("precip_repeatability", "i", True),
+    ("precip_days", "i", True),
+    ("sunshine_hours", "i", True),
+    ("sunshine_pct_norm", "i", True),
+)
+
+DECADAL_SCHEMA: Schema = (
+    ("date", "i", False),
+    ("dekad_no", "b", False),
+    ("station_id", "i", False),
+    ("p_station_hpa", "d", True),
+    ("p_sea_hpa", "d", True),
+    ("t_mean_c", "d", True),
+    ("e_vapor_hpa", "d", True),
+    ("precip_sum_mm", "i", True),
+    ("precip_repeatability", "i", True),
+    ("precip_days", "i", True),
+)
+
+
+class RecordColumns:
+    """
+    Записи одного вида в столбцах
+
+    - append(rec) / extend(records): добавить записи
+    - column(name): array.array значений (для None на месте значения 0)
+    - valid(name): маска валидности (None для полей без пропусков)
+    - value(name, i): значение поля строки i (None, если пропуск)
+    - row(i): запись целиком, iter(columns): все записи по очереди
+    """
+
+    record_cls: Type[Any] = MonthlyRecord
+    schema: Schema = MONTHLY_SCHEMA
+
+    def __init__(self, keep_raw_line: bool = False) -> None:
+        self.keep_raw_line = keep_raw_line
+        self.columns: Dict[str, array] = {name: array(code) for name, code, _ in self.schema}
+        self.masks: Dict[str, bytearray] = {name: bytearray() for name, _, nullable in self.schema if nullable}
+        self.raw_lines: Optional[List[str]] = [] if keep_raw_line else None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self._size):
+            yield self.row(i)
+
+    def append(self, rec: Any) -> None:
+        columns = self.columns
+        masks = self.masks
+        for name, _code, nullable in self.schema:
+            value = getattr(rec, name)
+            if name == "date":
+                value = value.toordinal()
+            if nullable:
+                if value is None:
+                    masks[name].append(0)
+                    value = 0
+                else:
+                    masks[name].append(1)
+            columns[name].append(value)
+        if self.raw_lines is not None:
+            self.raw_lines.append(rec.raw_line)
+        self._size += 1
+
+    def extend(self, records: Iterable[Any]) -> None:
+        for rec in records:
+            self.append(rec)
+
+    def extend_columns(
+            self,
+            n: int,
+            values: Dict[str, bytes],
+            masks: Dict[str, bytes],
+            raw_lines: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Добавляет n строк сразу столбцами (например, из vectorized.BatchDecoder)
+
+        values[name] - байты значений в формате typecode столбца (array.tobytes() / ndarray.tobytes()),
+        на месте пропусков 0; masks[name] - по байту 0/1 на строку для полей с пропусками
+        """
+        for name, _code, nullable in self.schema:
+            if len(values[name]) != n * self.columns[name].itemsize or (nullable and len(masks[name]) != n):
+                raise ValueError(f"column {name!r}: expected {n} values")
+
+        for name, _code, nullable in self.schema:
+            self.columns[name].frombytes(values[name])
+            if nullable:
+                self.masks[name].extend(masks[name])
+        if self.raw_lines is not None:
+            self.raw_lines.extend(raw_lines if raw_lines is not None else [""] * n)
+        self._size += n
+
+    def column(self, name: str) -> array:
+        return self.columns[name]
+
+    def valid(self, name: str) -> Optional[bytearray]:
+        return self.masks.get(name)
+
+    def value(self, name: str, i: int) -> Any:
+        mask = self.masks.get(name)
+        if mask is not None and not mask[i]:
+            return None
+        v = self.columns[name][i]
+        return date.fromordinal(v) if name == "date" else v
+
+    def row(self, i: int) -> Any:
+        values = {name: self.value(name, i) for name, _, _ in self.schema}
+        if self.raw_lines is not None:
+            values["raw_line"] = self.raw_lines[i]
+        return self.record_cls(**values)
+
+    def iter_rows(self, names: Optional[Iterable[str]] = None) -> Iterator[tuple]:
+        """Кортежи значений выбранных полей (None на месте пропусков), без создания записей"""
+        names = tuple(names) if names is not None else tuple(n for n, _, _ in self.schema)
+        for i in range(self._size):
+            yield tuple(self.value(n, i) for n in names)
+
+    def months(self) -> array:
+        """Номер месяца каждой строки (даты внутри блока одинаковые, fromordinal считается один раз на дату)"""
+        cache: Dict[int, int] = {}
+        out = array("b")
+        for o in self.columns["date"]:
+            m = cache.get(o)
+            if m is None:
+                m = cache[o] = date.fromordinal(o).month
+            out.append(m)
+        return out
+
+    def to_numpy(self, name: str):
+        """(values, mask) - numpy-представления столбца без копирования; mask=None для полей без пропусков"""
+        import numpy as np
+
+        values = np.frombuffer(self.columns[name], dtype=self.columns[name].typecode)
+        mask = self.masks.get(name)
+        return values, (np.frombuffer(mask, dtype=np.bool_) if mask is not None else None)
+
+
+class MonthlyColumns(RecordColumns):
+    record_cls = MonthlyRecord
+    schema = MONTHLY_SCHEMA
+
+
+class DecadalColumns(RecordColumns):
+    record_cls = DecadalRecord
+    schema = DECADAL_SCHEMA
+
+
+@dataclass
+class ColumnarResult:
+    monthly: MonthlyColumns = field(default_factory=MonthlyColumns)
+    decadal: DecadalColumns = field(default_factory=DecadalColumns)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Record], keep_raw_line: bool = False) -> "ColumnarResult":
+        """Собирает столбцы из потока записей (например, TelegramParser.iter_records), не держа сами записи"""
+        res = cls(MonthlyColumns(keep_raw_line), DecadalColumns(keep_raw_line))
+        for rec in records:
+            if isinstance(rec, MonthlyRecord):
+                res.monthly.append(rec)
+            else:
+                res.decadal.append(rec)
+        return res
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
+from functools import lru_cache
 from typing import Optional, Tuple
 
 """
@@ -20,19 +21,30 @@ from typing import Optional, Tuple
 - температура: C
 - осадки: мм
 - солнечное сияние: часы, проценты
+
+Декодеры групп мемоизированы (lru_cache): область значений маленькая и фиксированной ширины
+(4 цифры давления, 3 цифры упругости пара, знак + 3 цифры температуры), поэтому после прогрева
+каждая группа - это один поиск в кэше с уже округлённым результатом.
+Составные температурные группы собираются из тех же кэшированных частей.
+Месячные осадки и солнечное сияние не кэшируются: комбинаций слишком много, кэш бы вытеснялся.
 """
 
 ROUND_VAL = 2
 SCALE_0_1 = 0.1
 
+DECODE_CACHE_SIZE = 1 << 14  # > 10000 (все 4-значные коды) + запас на мусорные коды
+
 
+@lru_cache(maxsize=4096)
 def month_start(year: int, month: int) -> date:
     """
     Возвращает дату начала месяца для месячных записей (YYYY-MM-01).
+    Один и тот же объект date на все вызовы с теми же аргументами (записи разделяют даты)
     """
     return date(year, month, 1)
 
 
+@lru_cache(maxsize=4096)
 def dekad_start(year: int, month: int, dekad_no: int) -> date:
     """
     Возвращает дату начала декады:
@@ -94,6 +106,7 @@ def _parse_int_or_none(s: str, missing: str = "///") -> Optional[int]:
 
 # Monthly decoders
 
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
 def decode_p_station_hpa(code: str) -> Optional[float]:
     """PPPP: давление на уровне станции (гПа)"""
     if _invalid(code, 4) or not _is_digits(code):
@@ -104,6 +117,7 @@ def decode_p_station_hpa(code: str) -> Optional[float]:
     return _round(res)
 
 
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
 def decode_p_sea_hpa(code: str) -> Optional[float]:
     """PPPP: давление на уровне моря (гПа)"""
     if _invalid(code, 4) or not _is_digits(code):
@@ -132,17 +146,8 @@ def decode_t_mean_deviation(code: str) -> Optional[Tuple[Optional[float], Option
     if _invalid(code, 7, allow_slash=True):
         return None
 
-    sn = code[0]
-    ttt = code[1:4]
-    sss = code[4:7]
-
-    t_raw = _parse_int_or_none(ttt)
-    s_raw = _parse_int_or_none(sss)
-
-    t = None if t_raw is None else _sign(sn) * t_raw * SCALE_0_1
-    s = None if s_raw is None else s_raw * SCALE_0_1
-
-    return _round(t), _round(s)
+    # SnTTT - как декадная средняя, SSS - как eee (десятые, '///' -> None)
+    return decode_t_mean_deviation_decade(code[:4]), decode_p_water(code[4:])
 
 
 def decode_t_daily(code: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
@@ -152,17 +157,11 @@ def decode_t_daily(code: str) -> Optional[Tuple[Optional[float], Optional[float]
     if _invalid(code, 8) or not _is_digits(code):
         return None
 
-    sn_max = code[0]
-    tx = int(code[1:4])
-    sn_min = code[4]
-    tn = int(code[5:8])
-
-    t_min = _sign(sn_min) * tn * SCALE_0_1
-    t_max = _sign(sn_max) * tx * SCALE_0_1
-
-    return _round(t_min), _round(t_max)
+    # (min, max): вторая и первая половины SnTTT
+    return decode_t_mean_deviation_decade(code[4:]), decode_t_mean_deviation_decade(code[:4])
 
 
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
 def decode_p_water(code: str) -> Optional[float]:
     """eee: парциальное давление водяного пара (гПа)."""
     if _invalid(code, 3) or not _is_digits(code):
@@ -215,6 +214,7 @@ def decode_sunshine(code: str) -> Optional[Tuple[Optional[int], Optional[int]]]:
 
 # Decadal
 
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
 def decode_t_mean_deviation_decade(code: str) -> Optional[float]:
     """SnTTT: средняя температура декады (C)."""
     if _invalid(code, 4, allow_slash=True):
@@ -229,6 +229,7 @@ def decode_t_mean_deviation_decade(code: str) -> Optional[float]:
     return _round(_sign(sn) * t_raw * SCALE_0_1)
 
 
+@lru_cache(maxsize=DECODE_CACHE_SIZE)
 def decode_precipitation_decade(code: str) -> Optional[Tuple[int, Optional[int], Optional[int]]]:
     """
     Осадки декадные
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from meteo_parser.core.decode import decode_p_station_hpa, decode_p_sea_hpa, decode_t_mean_deviation, \
+    decode_t_daily, decode_p_water, decode_precipitation, decode_sunshine, decode_t_mean_deviation_decade, \
+    decode_precipitation_decade
+
+"""
+Таблица разбора групп кодов CLIMAT / DEKADA.
+
+Ключ - (раздел, первая цифра группы, длина группы), значение - GroupRule:
+- какую часть группы передать в декодер (code[start:stop])
+- какой декодер из decode.py вызвать
+- в какие поля записи положить результат
+
+Длины >= MAX_KEY_LEN сводятся к одному ключу, поэтому правила вида "длина не меньше N"
+регистрируются для всех длин N..MAX_KEY_LEN, и на каждую группу приходится ровно один поиск в словаре.
+Новый тип группы добавляется одной строкой register(...), без новых веток в парсере.
+"""
+
+MONTHLY = "monthly"
+DECADAL = "decadal"
+
+MAX_KEY_LEN = 10  # больше самой длинной группы с точной длиной (4SnTTTSnTTT - 9)
+
+SECTION_MARKER = "111"  # начало раздела 1 CLIMAT, не группа данных
+
+Setter = Callable[[Any, Any], None]
+# (start, stop, decode, setter, fields)
+GroupRule = Tuple[int, Optional[int], Callable[[str], Any], Setter, Tuple[str, ...]]
+
+GROUP_TABLE: Dict[Tuple[str, str, int], GroupRule] = {}
+
+
+def _setter(fields: Sequence[str]) -> Setter:
+    """
+    Одно поле - результат декодера присваивается как есть (в т.ч. None).
+    Несколько полей - кортеж раскладывается по полям, None не меняет запись
+    """
+    if len(fields) == 1:
+        name = fields[0]
+
+        def set_value(rec: Any, value: Any) -> None:
+            setattr(rec, name, value)
+
+        return set_value
+
+    names = tuple(fields)
+
+    def set_values(rec: Any, value: Any) -> None:
+        if value is not None:
+            for name, v in zip(names, value):
+                setattr(rec, name, v)
+
+    return set_values
+
+
+def register(
+        section: str,
+        lead: str,
+        lengths: Iterable[int],
+        decode: Callable[[str], Any],
+        fields: Sequence[str],
+        start: int = 1,
+        stop: Optional[int] = None,
+) -> None:
+    """Регистрирует правило для группы section/lead с каждой из длин lengths"""
+    rule: GroupRule = (start, stop, decode, _setter(fields), tuple(fields))
+    for n in lengths:
+        GROUP_TABLE[(section, lead, min(n, MAX_KEY_LEN))] = rule
+
+
+def _at_least(n: int) -> range:
+    return range(n, MAX_KEY_LEN + 1)
+
+
+# CLIMAT (месячные); группа '111' не зарегистрирована и пропускается
+register(MONTHLY, "1", _at_least(5), decode_p_station_hpa, ("p_station_hpa",), stop=5)
+register(MONTHLY, "2", _at_least(5), decode_p_sea_hpa, ("p_sea_hpa",), stop=5)
+register(MONTHLY, "3", _at_least(8), decode_t_mean_deviation, ("t_mean_c", "t_daily_std_c"))
+register(MONTHLY, "4", (9,), decode_t_daily, ("t_min_daily_c", "t_max_daily_c"))
+register(MONTHLY, "5", (4,), decode_p_water, ("e_vapor_hpa",))
+register(MONTHLY, "6", (8,), decode_precipitation, ("precip_sum_mm", "precip_repeatability", "precip_days"))
+register(MONTHLY, "7", (7,), decode_sunshine, ("sunshine_hours", "sunshine_pct_norm"))
+
+# DEKADA (декадные)
+register(DECADAL, "1", (5,), decode_p_station_hpa, ("p_station_hpa",))
+register(DECADAL, "2", (5,), decode_p_sea_hpa, ("p_sea_hpa",))
+register(DECADAL, "3", (5,), decode_t_mean_deviation_decade, ("t_mean_c",))
+register(DECADAL, "5", (4,), decode_p_water, ("e_vapor_hpa",))
+register(DECADAL, "6", (7,), decode_precipitation_decade, ("precip_sum_mm", "precip_repeatability", "precip_days"))
+
+
+def apply_groups(rec: Any, section: str, groups: Iterable[str]) -> int:
+    """
+    Расшифровывает группы строки станции и заполняет поля записи rec
+    :return: число отброшенных групп (нет правила для раздела/первой цифры/длины; '111' не считается)
+    """
+    get = GROUP_TABLE.get
+    rejected = 0
+    for code in groups:
+        n = len(code)
+        rule = get((section, code[0], n if n < MAX_KEY_LEN else MAX_KEY_LEN))
+        if rule is None:
+            if code != SECTION_MARKER:
+                rejected += 1
+            continue
+        start, stop, decode, setter, _fields = rule
+        setter(rec, decode(code[start:stop]))
+    return rejected
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без неё сортировка - sorted()
+    np = None
+
+if TYPE_CHECKING:
+    from meteo_parser.core.archive import ArchiveChunk
+
+"""
+Индекс станций столбцового архива (core/archive.py): (station_id, период) -> строка в чанке.
+
+- по виду записи - два параллельных отсортированных массива: ключ station_id << 32 | ordinal периода ('q')
+  и номер строки в чанке периода ('i'); диапазон дат одной станции - два bisect по ключам
+- файл <архив>.idx: заголовок (MAGIC, версия, длина архива и число чанков, для которых он собран) + массивы
+  (выровнены на 8 байт); открывается через mmap без копирования. Индекс для архива другой длины
+  считается устаревшим и пересобирается
+- update(chunks): записи переписанных периодов заменяются строками новых чанков (ColumnarArchive.append)
+"""
+
+MAGIC = b"MTCI"
+INDEX_VERSION = 1
+
+_HEAD = struct.Struct("<4sHxxQQ")  # magic, версия, длина архива, число чанков
+_COUNT = struct.Struct("<Q")
+_PERIOD_BITS = 32
+_PERIOD_MASK = (1 << _PERIOD_BITS) - 1
+
+SCALES = ("monthly", "decadal")
+
+
+def station_key(station_id: int, period: int) -> int:
+    return station_id << _PERIOD_BITS | period
+
+
+class StationIndex:
+    """
+    (scale, station_id, период) -> номер строки в чанке (scale, период)
+
+    - build(chunks) / load(path, end, chunks) / save(path, end, chunks)
+    - lookup(scale, station_id, start, stop): (ordinal периода, строка) для периодов start..stop включительно
+    - update(chunks): перестроить записи периодов этих чанков
+    """
+
+    def __init__(
+            self,
+            keys: Optional[Dict[str, Sequence[int]]] = None,
+            rows: Optional[Dict[str, Sequence[int]]] = None,
+    ) -> None:
+        self.keys: Dict[str, Sequence[int]] = keys or {scale: array("q") for scale in SCALES}
+        self.rows: Dict[str, Sequence[int]] = rows or {scale: array("i") for scale in SCALES}
+
+    def __len__(self) -> int:
+        return sum(len(k) for k in self.keys.values())
+
+    @classmethod
+    def build(cls, chunks: Iterable[ArchiveChunk]) -> "StationIndex":
+        index = cls()
+        index.update(chunks)
+        return index
+
+    def lookup(self, scale: str, station_id: int, start: int, stop: int) -> Iterator[Tuple[int, int]]:
+        keys = self.keys[scale]
+        rows = self.rows[scale]
+        lo = bisect_left(keys, station_key(station_id, start))
+        hi = bisect_right(keys, station_key(station_id, stop))
+        for i in range(lo, hi):
+            yield keys[i] & _PERIOD_MASK, rows[i]
+
+    def stations(self, scale: str) -> Iterator[int]:
+        """station_id по возрастанию (без повторов)"""
+        keys = self.keys[scale]
+        i = 0
+        while i < len(keys):
+            station_id = keys[i] >> _PERIOD_BITS
+            yield station_id
+            i = bisect_left(keys, station_key(station_id + 1, 0), i)
+
+    def update(self, chunks: Iterable[ArchiveChunk]) -> None:
+        by_scale: Dict[str, list] = {scale: [] for scale in SCALES}
+        for chunk in chunks:
+            by_scale[chunk.scale].append(chunk)
+
+        for scale, written in by_scale.items():
+            if not written:
+                continue
+            periods = {c.period.toordinal() for c in written}
+            old_keys = self.keys[scale]
+            old_rows = self.rows[scale]
+            keys = array("q", (k for k in old_keys if k & _PERIOD_MASK not in periods))
+            rows = array("i", (r for k, r in zip(old_keys, old_rows) if k & _PERIOD_MASK not in periods))
+            for chunk in written:
+                period = chunk.period.toordinal()
+                keys.extend(station_key(s, period) for s in chunk.column("station_id"))
+                rows.extend(range(chunk.rows))
+            self.keys[scale], self.rows[scale] = _sort(keys, rows)
+
+    # ---- файл ----
+
+    def save(self, path: Path, end: int, chunks: int) -> None:
+        """Атомарная запись (tmp + replace) для архива длины end с chunks живыми чанками"""
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as fh:
+            fh.write(_HEAD.pack(MAGIC, INDEX_VERSION, end, chunks))
+            for scale in SCALES:
+                fh.write(_COUNT.pack(len(self.keys[scale])))
+                fh.write(array("q", self.keys[scale]).tobytes())
+                fh.write(array("i", self.rows[scale]).tobytes())
+                fh.write(bytes(_pad(4 * len(self.rows[scale]))))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, end: int, chunks: int) -> Optional["StationIndex"]:
+        """Индекс из файла, если он собран для архива той же длины; иначе None"""
+        try:
+            with path.open("rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # ValueError - пустой файл
+            return None
+        if len(mm) < _HEAD.size:
+            return None
+        magic, version, index_end, index_chunks = _HEAD.unpack_from(mm)
+        if magic != MAGIC or version != INDEX_VERSION or index_end != end or index_chunks != chunks:
+            return None
+
+        buf = memoryview(mm)
+        pos = _HEAD.size
+        keys: Dict[str, Sequence[int]] = {}
+        rows: Dict[str, Sequence[int]] = {}
+        for scale in SCALES:
+            (n,) = _COUNT.unpack_from(mm, pos)
+            pos += _COUNT.size
+            keys[scale] = buf[pos:pos + 8 * n].cast("q")
+            pos += 8 * n
+            rows[scale] = buf[pos:pos + 4 * n].cast("i")
+            pos += 4 * n + _pad(4 * n)
+        return cls(keys, rows)
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+def _sort(keys: array, rows: array) -> Tuple[array, array]:
+    if np is not None:
+        k = np.frombuffer(keys, dtype=np.int64)
+        order = np.argsort(k, kind="stable")
+        return array("q", k[order].tobytes()), array("i", np.frombuffer(rows, dtype=np.int32)[order].tobytes())
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return array("q", [keys[i] for i in order]), array("i", [rows[i] for i in order])
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import heapq
+import json
+import itertools
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+"""
+Встроенные замеры стадий разбора и сравнения.
+
+Выключено по умолчанию: current = None, и точки замера стоят одну проверку на None
+(stage() отдаёт общий пустой контекст, счётчики в него не пишутся).
+enable() включает сбор в глобальный Metrics, disable() выключает и возвращает собранное.
+
+Стадии (имена в отчёте):
+- read: чтение и декодирование файла (reader)            files, chars
+- normalize: нормализация текста (reader)                lines
+- split: поиск заголовков CLIMAT/DEKADA (reader)         lines, blocks
+- decode: разбор строк станций по группам (parser)       lines, groups, rejected
+- decode_vectorized: BatchDecoder.decode_blocks          lines
+- rank_fetch: запросы рангов (db.repository)             queries, rows
+- checks / checks_batch: сравнение с окнами (compare)     records, checks, failed
+- output: запись пачек NDJSON/CSV (output/writers.py)    rows
+- archive: дозапись столбцового архива (core/archive.py)  chunks, rows, bytes
+
+Отчёт: to_dict()/write(path) - JSON (*.json) или текстовый файл Prometheus (*.prom, для node_exporter).
+Опционально: trace_memory - пик памяти по стадиям (tracemalloc), profile - cProfile всего прогона в файл.
+"""
+
+SLOWEST_FILES = 20
+
+
+@dataclass
+class StageStats:
+    seconds: float = 0.0
+    calls: int = 0
+    counters: Dict[str, int] = field(default_factory=dict)
+    peak_bytes: Optional[int] = None  # только с trace_memory
+
+    def count(self, **counts: int) -> None:
+        c = self.counters
+        for name, n in counts.items():
+            c[name] = c.get(name, 0) + n
+
+
+class _NullStage:
+    """Контекст стадии при выключенных замерах: ничего не делает и ложен (if st: ...)"""
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def count(self, **counts: int) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageTimer:
+    def __init__(self, metrics: "Metrics", stats: StageStats) -> None:
+        self.metrics = metrics
+        self.stats = stats
+        self.t0 = 0.0
+        self.mem0 = 0
+
+    def __enter__(self) -> StageStats:
+        if self.metrics.trace_memory:
+            self.mem0 = self.metrics._mem_enter()
+        self.t0 = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc) -> None:
+        stats = self.stats
+        stats.seconds += time.perf_counter() - self.t0
+        stats.calls += 1
+        if self.metrics.trace_memory:
+            peak = self.metrics._mem_exit() - self.mem0
+            stats.peak_bytes = peak if stats.peak_bytes is None else max(stats.peak_bytes, peak)
+
+
+class Metrics:
+    """
+    Сборщик замеров одного прогона
+
+    - stage(name): контекст замера стадии (время, вызовы), внутри - stats.count(lines=..., ...)
+    - add(name, seconds, **counts): то же без контекста (для горячих мест)
+    - file(path, seconds, **counts): время чтения+нормализации файла (в отчёте - самые медленные файлы)
+    """
+
+    def __init__(self, trace_memory: bool = False, profile: Optional[Path] = None) -> None:
+        self.trace_memory = trace_memory
+        self.profile_path = profile
+        self.stages: Dict[str, StageStats] = {}
+        self.started = time.perf_counter()
+        self.seconds: Optional[float] = None
+
+        self._files: List[Tuple[float, int, str, Dict[str, int]]] = []  # куча самых медленных файлов
+        self._file_seq = itertools.count()
+        self._peak_traced = 0
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def stage(self, name: str) -> _StageTimer:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return _StageTimer(self, stats)
+
+    def add(self, name: str, seconds: float, **counts: int) -> None:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        stats.seconds += seconds
+        stats.calls += 1
+        stats.count(**counts)
+
+    def file(self, path: Path, seconds: float, **counts: int) -> None:
+        item = (seconds, next(self._file_seq), str(path), counts)
+        if len(self._files) < SLOWEST_FILES:
+            heapq.heappush(self._files, item)
+        elif seconds > self._files[0][0]:
+            heapq.heapreplace(self._files, item)
+
+    # ---- запуск / остановка ----
+
+    def start(self) -> None:
+        # cProfile и tracemalloc (тянет pickle) - только при включённых замерах, не при импорте
+        import tracemalloc
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile_path is not None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        import tracemalloc
+
+        self.seconds = time.perf_counter() - self.started
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_path.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(str(self.profile_path))
+            self._profiler = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            self._peak_traced = max(self._peak_traced, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+    def _mem_enter(self) -> int:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak_traced = max(self._peak_traced, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _mem_exit(self) -> int:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return 0
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak_traced = max(self._peak_traced, peak)
+        return peak
+
+    # ---- отчёт ----
+
+    def to_dict(self) -> dict:
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self.started
+        return {
+            "seconds": seconds,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "peak_traced_bytes": self._peak_traced if self.trace_memory else None,
+            "stages": {
+                name: {
+                    "seconds": s.seconds,
+                    "calls": s.calls,
+                    **s.counters,
+                    **({"peak_bytes": s.peak_bytes} if s.peak_bytes is not None else {}),
+                }
+                for name, s in self.stages.items()
+            },
+            "slowest_files": [
+                {"path": path, "seconds": sec, **counts}
+                for sec, _seq, path, counts in sorted(self._files, reverse=True)
+            ],
+        }
+
+    def to_prometheus(self, prefix: str = "meteo_parser") -> str:
+        out: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Iterator[Tuple[str, float]]) -> None:
+            samples = list(samples)
+            if not samples:
+                return
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {kind}")
+            out.extend(f"{prefix}_{name}{labels} {value}" for labels, value in samples)
+
+        stages = sorted(self.stages.items())
+        metric("stage_seconds_total", "counter", "Wall time spent in stage",
+               ((f'{{stage="{n}"}}', s.seconds) for n, s in stages))
+        metric("stage_calls_total", "counter", "Stage invocations",
+               ((f'{{stage="{n}"}}', s.calls) for n, s in stages))
+        metric("stage_items_total", "counter", "Items processed by stage (lines, groups, rejected, ...)",
+               ((f'{{stage="{n}",item="{k}"}}', v) for n, s in stages for k, v in sorted(s.counters.items())))
+        metric("stage_peak_bytes", "gauge", "Peak traced memory allocated inside stage",
+               ((f'{{stage="{n}"}}', s.peak_bytes) for n, s in stages if s.peak_bytes is not None))
+        rss = peak_rss_bytes()
+        metric("peak_rss_bytes", "gauge", "Peak resident set size of the process",
+               iter([("", rss)] if rss is not None else []))
+        return "\n".join(out) + "\n"
+
+    def write(self, path: Path) -> None:
+        """*.prom - текстовый формат Prometheus, иначе JSON (запись атомарная: tmp + replace)"""
+        text = self.to_prometheus() if path.suffix == ".prom" else json.dumps(self.to_dict(), indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - КБ, macOS - байты
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+# ---- глобальное включение ----
+
+current: Optional[Metrics] = None
+
+
+def enable(trace_memory: bool = False, profile: Optional[Path] = None) -> Metrics:
+    global current
+    if current is not None:
+        current.stop()
+    current = Metrics(trace_memory=trace_memory, profile=profile)
+    current.start()
+    return current
+
+
+def disable() -> Optional[Metrics]:
+    """Выключает сбор; возвращает собранные замеры (или None, если сбор не был включён)"""
+    global current
+    m, current = current, None
+    if m is not None:
+        m.stop()
+    return m
+
+
+def stage(name: str):
+    """Контекст замера стадии; при выключенных замерах - общий пустой контекст"""
+    m = current
+    return _NULL_STAGE if m is None else m.stage(name)
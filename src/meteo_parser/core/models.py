@@ -1,25 +1,28 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import date
-from typing import Optional
+from typing import Optional, Union
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
 """
 - Reader возвращает MonthlyBlock/DecadalBlock
 - Parser преобразует блоки в MonthlyRecord/DecadalRecord
+
+Все классы со __slots__ (без __dict__): записей миллионы, и на каждой экономится словарь атрибутов.
+Записи одного блока разделяют один объект date
 """
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedTelegram:
     source_path: Path
-    raw_text: str
+    raw_text: Optional[str]  # None, если исходный текст не сохраняется (TelegramReader.load_telegrams(keep_raw_text=False))
     lines: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class MonthlyBlock:
     month: int
     year: int
@@ -27,7 +30,7 @@ class MonthlyBlock:
     header: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DecadalBlock:
     month: int
     dekad_no: int
@@ -35,7 +38,7 @@ class DecadalBlock:
     header: str
 
 
-@dataclass
+@dataclass(slots=True)
 class MonthlyRecord:
     """
     Запись месячных данных по одной станции за один месяц
@@ -62,7 +65,7 @@ class MonthlyRecord:
         sunshine_hours: суммарная продолжительность солнечного сияния (часы)
         sunshine_pct_norm: % от нормы (проценты)
 
-        raw_line: исходная строка станции (после нормализации)
+        raw_line: исходная строка станции (после нормализации); "" при TelegramParser(keep_raw_line=False)
     """
     date: date
     station_id: int
@@ -88,7 +91,7 @@ class MonthlyRecord:
     raw_line: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class DecadalRecord:
     """
     Запись декадных данных по одной станции за одну декаду
@@ -108,7 +111,7 @@ class DecadalRecord:
         precip_repeatability: повторяемость (цифра) или None если '/'
         precip_days: число суток повторяемости (в декадном формате 1 цифра)
 
-        raw_line: исходная строка станции (после нормализации)
+        raw_line: исходная строка станции (после нормализации); "" при TelegramParser(keep_raw_line=False)
     """
     date: date
     dekad_no: int
@@ -125,3 +128,11 @@ class DecadalRecord:
     precip_days: Optional[int] = None
 
     raw_line: str = ""
+
+
+Block = Union[MonthlyBlock, DecadalBlock]
+Record = Union[MonthlyRecord, DecadalRecord]
+
+# порядок полей записей - для компактной передачи записей кортежами (MonthlyRecord(*row))
+MONTHLY_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(MonthlyRecord))
+DECADAL_FIELDS: Tuple[str, ...] = tuple(f.name for f in fields(DecadalRecord))
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+"""
+Нормализатор текста телеграмм, собираемый один раз на TelegramReader.
+
+Даёт ровно тот же список строк, что и построчная нормализация
+(strip, схлопывание пробелов, удаление '=', upper, замены), но:
+- split/join/upper выполняются одним list comprehension без промежуточных strip/endswith
+- '\\r\\n' не переписывается во всём тексте: '\\r' в конце строки уходит вместе с пробелами в split()
+- если все ключи замен не-ASCII (КЛИМАТ, ДЕКАДА, ...), замены применяются только к не-ASCII строкам,
+  а строки станций (чистый ASCII) их пропускают
+"""
+
+
+class TextNormalizer:
+    """
+    Скомпилированная нормализация текста в список строк
+
+    - переносы строк приводятся к '\\n'
+    - пустые строки удаляются
+    - повторные пробелы схлопываются
+    - завершающий '=' удаляется
+    - строка приводится в UPPERCASE
+    - ключевые слова заменяются по replacements (в порядке словаря)
+    """
+
+    def __init__(self, replacements: Dict[str, str]) -> None:
+        self.replacements: Tuple[Tuple[str, str], ...] = tuple(replacements.items())
+        # ASCII-строка не может содержать не-ASCII ключ
+        self.skip_ascii_lines = all(not src.isascii() for src, _ in self.replacements)
+
+    def __call__(self, text: str) -> List[str]:
+        if "\r" in text and text.count("\r") != text.count("\r\n"):
+            # одиночный '\r' - тоже перенос строки
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        join = " ".join
+        lines = [join(parts).upper() for parts in map(str.split, text.split("\n")) if parts]
+        lines = [ln[:-1].rstrip() if ln[-1] == "=" else ln for ln in lines]
+
+        if not self.replacements:
+            return lines
+
+        replace = self._replace
+        if self.skip_ascii_lines:
+            return [ln if ln.isascii() else replace(ln) for ln in lines]
+        return [replace(ln) for ln in lines]
+
+    def _replace(self, line: str) -> str:
+        for src, dst in self.replacements:
+            line = line.replace(src, dst)
+        return line
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from operator import attrgetter
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from src.meteo_parser.core.decode import month_start, decode_p_station_hpa, decode_p_sea_hpa, decode_t_mean_deviation, \
-    decode_t_daily, decode_p_water, decode_precipitation, decode_sunshine, dekad_start, decode_t_mean_deviation_decade, \
-    decode_precipitation_decade
-from src.meteo_parser.core.models import MonthlyRecord, DecadalRecord, MonthlyBlock, DecadalBlock
+from meteo_parser.core import metrics
+from meteo_parser.core.cache import ParseCache
+from meteo_parser.core.decode import month_start, dekad_start
+from meteo_parser.core.groups import MONTHLY, DECADAL, SECTION_MARKER, apply_groups
+from meteo_parser.core.models import MonthlyRecord, DecadalRecord, MonthlyBlock, DecadalBlock, Block, Record, \
+    MONTHLY_FIELDS, DECADAL_FIELDS
+from meteo_parser.core.reader import TelegramReader
+
+# меняется при любом изменении результата разбора - ключ кэша ParseCache
+PARSER_VERSION = "1"
+
+_monthly_row = attrgetter(*MONTHLY_FIELDS)
+_decadal_row = attrgetter(*DECADAL_FIELDS)
+
+# (monthly_rows, decadal_rows, first_year) - см. FileParseResult.to_rows
+FileRows = Tuple[List[tuple], List[tuple], Optional[int]]
 
 
 @dataclass
@@ -14,15 +28,76 @@ class ParseResult:
     monthly: List[MonthlyRecord]
     decadal: List[DecadalRecord]
 
+    @classmethod
+    def from_records(cls, records: Iterable[Record]) -> "ParseResult":
+        """Собирает ParseResult из потока записей (например, TelegramParser.iter_records)"""
+        monthly: List[MonthlyRecord] = []
+        decadal: List[DecadalRecord] = []
+        for rec in records:
+            if isinstance(rec, MonthlyRecord):
+                monthly.append(rec)
+            else:
+                decadal.append(rec)
+        return cls(monthly=monthly, decadal=decadal)
+
+
+@dataclass
+class FileParseResult:
+    """
+    Результат разбора одного файла
+
+    Attributes:
+        source_path: путь к файлу
+        monthly: записи CLIMAT
+        decadal: записи DEKADA, разобранные с годом по умолчанию
+            (итоговый год проставляет TelegramParser.merge_file_results)
+        first_year: год первого CLIMAT-блока файла или None
+    """
+    source_path: Path
+    monthly: List[MonthlyRecord]
+    decadal: List[DecadalRecord]
+    first_year: Optional[int]
+
+    def to_rows(self) -> FileRows:
+        """Компактное представление (кортежи полей) для передачи между процессами и хранения"""
+        return (
+            [_monthly_row(r) for r in self.monthly],
+            [_decadal_row(r) for r in self.decadal],
+            self.first_year,
+        )
+
+    @classmethod
+    def from_rows(cls, source_path: Path, rows: FileRows) -> "FileParseResult":
+        monthly_rows, decadal_rows, first_year = rows
+        return cls(
+            source_path=source_path,
+            monthly=[MonthlyRecord(*r) for r in monthly_rows],
+            decadal=[DecadalRecord(*r) for r in decadal_rows],
+            first_year=first_year,
+        )
+
 
 class TelegramParser:
     """
     Парсер блоков CLIMAT / DEKADA
     - получает на вход блоки из TelegramReader
-    - разбирает каждую строку станции, распознает коды, расшифровывает ф-ями из decode.py
+    - разбирает каждую строку станции, распознает коды по таблице groups.GROUP_TABLE,
+      расшифровывает ф-ями из decode.py
     - формирует дата-классы
+
+    cache: ParseCache - результаты parse_file() берутся из кэша по содержимому файла
+    keep_raw_line: False - raw_line записей не заполняется (строки станций не держатся в памяти после разбора)
     """
 
+    def __init__(self, cache: Optional[ParseCache] = None, keep_raw_line: bool = True) -> None:
+        self.cache = cache
+        self.keep_raw_line = keep_raw_line
+
+    @property
+    def version(self) -> str:
+        """Версия результата разбора (ключ кэша): зависит от PARSER_VERSION и keep_raw_line"""
+        return PARSER_VERSION if self.keep_raw_line else f"{PARSER_VERSION}-noraw"
+
     def parse_blocks(
             self,
             monthly_blocks: List[MonthlyBlock],
@@ -50,103 +125,147 @@ class TelegramParser:
 
         return ParseResult(monthly=monthly_records, decadal=decadal_records)
 
-    def parse_monthly_block(self, block: MonthlyBlock) -> List[MonthlyRecord]:
-        dt = month_start(block.year, block.month)
-        records: List[MonthlyRecord] = []
+    def iter_records(self, blocks: Iterable[Block], default_decadal_year: int) -> Iterator[Record]:
+        """
+        Потоковый вариант parse_blocks: разбирает блоки по одному и сразу отдаёт записи.
 
-        for raw_line in block.station_lines:
-            parts = raw_line.split()
-            if not parts:
-                continue
+        Год DEKADA выбирается так же, как в parse_blocks (год первого CLIMAT-блока).
+        Декадные блоки, пришедшие раньше первого CLIMAT, придерживаются до его появления
+        (или до конца потока - тогда берётся default_decadal_year)
 
-            station_id = int(parts[0])
-            groups = parts[1:]
+        Args:
+            blocks: поток блоков, например TelegramReader.iter_blocks()
+            default_decadal_year: год по умолчанию для DEKADA, если в данных нет CLIMAT
 
-            rec = MonthlyRecord(date=dt, station_id=station_id, raw_line=raw_line)
+        Returns:
+            итератор MonthlyRecord/DecadalRecord в порядке блоков
+        """
+        dec_year: Optional[int] = None
+        pending: List[DecadalBlock] = []
+
+        for block in blocks:
+            if isinstance(block, MonthlyBlock):
+                if dec_year is None:
+                    dec_year = block.year
+                    for b in pending:
+                        yield from self.parse_decadal_block(b, year=dec_year)
+                    pending.clear()
+                yield from self.parse_monthly_block(block)
+            elif dec_year is None:
+                pending.append(block)
+            else:
+                yield from self.parse_decadal_block(block, year=dec_year)
+
+        for b in pending:
+            yield from self.parse_decadal_block(b, year=default_decadal_year)
+
+    def parse_file_blocks(
+            self,
+            source_path: Path,
+            blocks: Iterable[Block],
+            default_decadal_year: int,
+    ) -> FileParseResult:
+        """
+        Разбирает блоки одного файла независимо от остальных файлов
+        (например, в отдельном процессе). DEKADA разбираются с default_decadal_year
+        """
+        monthly: List[MonthlyRecord] = []
+        decadal: List[DecadalRecord] = []
+        first_year: Optional[int] = None
 
-            for code in groups:
-                if not code or code == "111":
-                    continue
+        for block in blocks:
+            if isinstance(block, MonthlyBlock):
+                if first_year is None:
+                    first_year = block.year
+                monthly.extend(self.parse_monthly_block(block))
+            else:
+                decadal.extend(self.parse_decadal_block(block, year=default_decadal_year))
+
+        return FileParseResult(source_path=source_path, monthly=monthly, decadal=decadal, first_year=first_year)
+
+    def parse_file(self, reader: TelegramReader, path: Path, default_decadal_year: int) -> FileParseResult:
+        """
+        Читает и разбирает один файл; при заданном cache результат берётся/кладётся в кэш
+        """
+        if self.cache is None:
+            return self.parse_file_blocks(path, reader.iter_file_blocks(path), default_decadal_year)
 
-                lead = code[0]
+        # один и тот же файл при другой кодировке/заменах читается в другой текст
+        key = self.cache.key(path, f"{self.version}|{reader.fingerprint()}")
+        rows = self.cache.get(key)
+        if rows is not None:
+            return FileParseResult.from_rows(path, rows)
 
-                if lead == "1" and len(code) >= 5:
-                    rec.p_station_hpa = decode_p_station_hpa(code[1:5])
+        res = self.parse_file_blocks(path, reader.iter_file_blocks(path), default_decadal_year)
+        self.cache.put(key, res.to_rows())
+        return res
 
-                elif lead == "2" and len(code) >= 5:
-                    rec.p_sea_hpa = decode_p_sea_hpa(code[1:5])
+    def merge_file_results(self, results: Iterable[FileParseResult], default_decadal_year: int) -> ParseResult:
+        """
+        Склеивает результаты по файлам (в порядке файлов) в один ParseResult.
+        Год DEKADA выбирается как в parse_blocks - по первому CLIMAT-блоку среди всех файлов
+        и проставляется всем декадным записям (в т.ч. взятым из ранее сохранённых результатов)
+        """
+        monthly: List[MonthlyRecord] = []
+        decadal: List[DecadalRecord] = []
+        dec_year: Optional[int] = None
 
-                elif lead == "3" and len(code) >= 8:
-                    decoded = decode_t_mean_deviation(code[1:])
-                    if decoded is not None:
-                        rec.t_mean_c, rec.t_daily_std_c = decoded
+        for res in results:
+            if dec_year is None and res.first_year is not None:
+                dec_year = res.first_year
+            monthly.extend(res.monthly)
+            decadal.extend(res.decadal)
 
-                elif lead == "4" and len(code) == 9:
-                    decoded = decode_t_daily(code[1:])
-                    if decoded is not None:
-                        rec.t_min_daily_c, rec.t_max_daily_c = decoded
+        year = default_decadal_year if dec_year is None else dec_year
+        for rec in decadal:
+            if rec.date.year != year:
+                rec.date = dekad_start(year, rec.date.month, rec.dekad_no)
 
-                elif lead == "5" and len(code) == 4:
-                    rec.e_vapor_hpa = decode_p_water(code[1:])
+        return ParseResult(monthly=monthly, decadal=decadal)
 
-                elif lead == "6" and len(code) == 8:
-                    decoded = decode_precipitation(code[1:])
-                    if decoded is not None:
-                        rec.precip_sum_mm, rec.precip_repeatability, rec.precip_days = decoded
+    def parse_monthly_block(self, block: MonthlyBlock) -> List[MonthlyRecord]:
+        dt = month_start(block.year, block.month)
+        keep = self.keep_raw_line
+        records: List[MonthlyRecord] = []
+        rejected = 0
 
-                elif lead == "7" and len(code) == 7:
-                    decoded = decode_sunshine(code[1:])
-                    if decoded is not None:
-                        rec.sunshine_hours, rec.sunshine_pct_norm = decoded
+        with metrics.stage("decode") as st:
+            for raw_line in block.station_lines:
+                parts = raw_line.split()
+                if not parts:
+                    continue
 
-            records.append(rec)
+                rec = MonthlyRecord(date=dt, station_id=int(parts[0]), raw_line=raw_line if keep else "")
+                rejected += apply_groups(rec, MONTHLY, parts[1:])
+                records.append(rec)
 
+        if st:
+            st.count(lines=len(records), groups=_count_groups(block.station_lines), rejected=rejected)
         return records
 
     def parse_decadal_block(self, block: DecadalBlock, year: int) -> List[DecadalRecord]:
         dt = dekad_start(year, block.month, block.dekad_no)
+        keep = self.keep_raw_line
         records: List[DecadalRecord] = []
+        rejected = 0
 
-        for raw_line in block.station_lines:
-            parts = raw_line.split()
-            if not parts:
-                continue
-
-            station_id = int(parts[0])
-            groups = parts[1:]
-
-            rec = DecadalRecord(
-                date=dt,
-                dekad_no=block.dekad_no,
-                station_id=station_id,
-                raw_line=raw_line,
-            )
-
-            for code in groups:
-                if not code:
+        with metrics.stage("decode") as st:
+            for raw_line in block.station_lines:
+                parts = raw_line.split()
+                if not parts:
                     continue
 
-                lead = code[0]
-
-                if lead == "1" and len(code) == 5:
-                    rec.p_station_hpa = decode_p_station_hpa(code[1:])
-
-                elif lead == "2" and len(code) == 5:
-                    rec.p_sea_hpa = decode_p_sea_hpa(code[1:])
-
-                elif lead == "3" and len(code) == 5:
-                    rec.t_mean_c = decode_t_mean_deviation_decade(code[1:])
-
-                elif lead == "5" and len(code) == 4:
-                    rec.e_vapor_hpa = decode_p_water(code[1:])
-
-                elif lead == "6" and len(code) == 7:
-                    decoded = decode_precipitation_decade(code[1:])
-                    if decoded is not None:
-                        rec.precip_sum_mm, rec.precip_repeatability, rec.precip_days = decoded
-
-            records.append(rec)
-
+                rec = DecadalRecord(
+                    date=dt,
+                    dekad_no=block.dekad_no,
+                    station_id=int(parts[0]),
+                    raw_line=raw_line if keep else "",
+                )
+                rejected += apply_groups(rec, DECADAL, parts[1:])
+                records.append(rec)
+
+        if st:
+            st.count(lines=len(records), groups=_count_groups(block.station_lines), rejected=rejected)
         return records
 
     def _choose_decadal_year(self, monthly_blocks: List[MonthlyBlock], default_year: int) -> int:
@@ -157,3 +276,8 @@ class TelegramParser:
         - иначе возвращаем default_year
         """
         return monthly_blocks[0].year if monthly_blocks else default_year
+
+
+def _count_groups(station_lines: List[str]) -> int:
+    """Групп данных в строках станций (без индекса станции и '111') - только для metrics"""
+    return sum(1 for line in station_lines for code in line.split()[1:] if code != SECTION_MARKER)
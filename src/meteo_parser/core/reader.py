@@ -1,9 +1,24 @@
 from __future__ import annotations
 
+import json
+import mmap
+import time
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from src.meteo_parser.core.models import MonthlyBlock, DecadalBlock, NormalizedTelegram
+from meteo_parser.core import metrics
+from meteo_parser.core.bytescan import DEFAULT_ENCODINGS, ByteScanner, detect_encoding
+from meteo_parser.core.models import MonthlyBlock, DecadalBlock, NormalizedTelegram, Block
+from meteo_parser.core.normalizer import TextNormalizer
+
+
+# замены ключевых слов кириллицей на латиницу по умолчанию
+DEFAULT_REPLACEMENTS: Dict[str, str] = {
+    "КЛИМАТ": "CLIMAT",
+    "ДЕКАДА": "DEKADA",
+    "ЗЦЗЦ": "ZCZC",
+    "ЦСРС": "CSRS",
+}
 
 
 class TelegramReader:
@@ -16,7 +31,12 @@ class TelegramReader:
         - DedcadalBlock: начинается с 'DEKADA MMd'
 
     - load_blocks(): вернуть все monthly/decadal блоки из всех файлов
+    - iter_blocks(): потоково отдавать блоки по одному файлу за раз
     - load_telegrams(): вернуть все телеграммы в нормализованном виде
+
+    encoding="auto" - кодировка определяется по содержимому каждого файла (из encodings), результат кэшируется.
+    use_mmap=True - файл отображается в память, из байтов вырезаются только заголовки и строки станций,
+    декодируются только они (см. bytescan.py)
     """
 
     def __init__(
@@ -26,20 +46,34 @@ class TelegramReader:
         encoding: str = "utf-8",
         errors: str = "strict",
         replacements: Optional[Dict[str, str]] = None,
+        use_mmap: bool = False,
+        encodings: Sequence[str] = DEFAULT_ENCODINGS,
     ) -> None:
         self.directory = directory
         self.pattern = pattern
         self.encoding = encoding
         self.errors = errors
-        self.replacements = replacements or {
-            "КЛИМАТ": "CLIMAT",
-            "ДЕКАДА": "DEKADA",
-            "ЗЦЗЦ": "ZCZC",
-            "ЦСРС": "CSRS",
-        }
+        self.use_mmap = use_mmap
+        self.encodings = tuple(encodings)
+        self.replacements = replacements or dict(DEFAULT_REPLACEMENTS)
+        self._normalizer = TextNormalizer(self.replacements)
+        self._scanner = ByteScanner(self.replacements)
+        # (path, size, mtime_ns) -> кодировка, для encoding="auto"
+        self._encoding_cache: Dict[Tuple[Path, int, int], str] = {}
 
         self._validate_directory()
 
+    def fingerprint(self) -> str:
+        """
+        Настройки чтения, от которых зависит текст файла (а значит и разобранные записи):
+        кодировка, errors, список кодировок для "auto", замены ключевых слов, режим mmap.
+        Входит в ключи кэша разбора и манифеста инкрементального разбора
+        """
+        return json.dumps(
+            [self.encoding, self.errors, list(self.encodings), sorted(self.replacements.items()), self.use_mmap],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
 
     def load_blocks(self) -> Tuple[List[MonthlyBlock], List[DecadalBlock]]:
         """
@@ -52,27 +86,50 @@ class TelegramReader:
         monthly_all: List[MonthlyBlock] = []
         decadal_all: List[DecadalBlock] = []
 
-        for tel in self._read_and_normalize():
-            m, d = self._split_blocks(tel.lines)
-            monthly_all.extend(m)
-            decadal_all.extend(d)
+        for block in self.iter_blocks():
+            if isinstance(block, MonthlyBlock):
+                monthly_all.append(block)
+            else:
+                decadal_all.append(block)
 
         return monthly_all, decadal_all
 
-    def load_telegrams(self) -> List[NormalizedTelegram]:
+    def iter_blocks(self) -> Iterator[Block]:
+        """
+        Потоковый вариант load_blocks: читает файлы по одному и отдаёт блоки
+        MonthlyBlock/DecadalBlock в порядке файлов и заголовков внутри файла.
+        В памяти одновременно держится только текущий файл
+        """
+        for path in self._iter_files():
+            yield from self.iter_file_blocks(path)
+
+    def iter_file_blocks(self, path: Path) -> Iterator[Block]:
+        """Блоки одного файла в порядке заголовков"""
+        m = metrics.current
+        t0 = time.perf_counter() if m is not None else 0.0
+
+        text = self._read_relevant_text(path) if self.use_mmap else self._read_text(path)
+        lines = self._normalize_text(text)
+        if m is not None:
+            m.file(path, time.perf_counter() - t0, lines=len(lines))
+
+        yield from self._iter_segments(lines)
+
+    def load_telegrams(self, keep_raw_text: bool = True) -> List[NormalizedTelegram]:
         """
         Возвращает телеграммы в нормализованном виде без разделения на блоки
+        :param keep_raw_text: False - raw_text=None (в памяти остаются только нормализованные строки)
         :return: NormalizedTelegram
         """
-        return list(self._read_and_normalize())
+        return list(self._read_and_normalize(keep_raw_text))
 
 
-    def _read_and_normalize(self) -> Iterable[NormalizedTelegram]:
+    def _read_and_normalize(self, keep_raw_text: bool = True) -> Iterable[NormalizedTelegram]:
         """Читает файлы -> нормализует -> returns: yield NormalizedTelegram"""
         for path in self._iter_files():
             raw = self._read_text(path)
             lines = self._normalize_text(raw)
-            yield NormalizedTelegram(source_path=path, raw_text=raw, lines=lines)
+            yield NormalizedTelegram(source_path=path, raw_text=raw if keep_raw_text else None, lines=lines)
 
     def _validate_directory(self) -> None:
         """Проверяет, что directory существует и является папкой"""
@@ -87,7 +144,43 @@ class TelegramReader:
 
     def _read_text(self, path: Path) -> str:
         """Читает файл целиком в строку с заданной кодировкой"""
-        return path.read_text(encoding=self.encoding, errors=self.errors)
+        with metrics.stage("read") as st:
+            if self.encoding != "auto":
+                text = path.read_text(encoding=self.encoding, errors=self.errors)
+            else:
+                data = path.read_bytes()
+                text = data.decode(self._file_encoding(path, data), errors=self.errors)
+            st.count(files=1, chars=len(text))
+        return text
+
+    def _read_relevant_text(self, path: Path) -> str:
+        """
+        Режим mmap: отображает файл в память и декодирует только строки,
+        которые могут относиться к блокам (заголовки, строки станций, не-ASCII строки)
+        """
+        if path.stat().st_size == 0:
+            return ""
+
+        with metrics.stage("read") as st:
+            with path.open("rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = self._scanner.relevant_bytes(mm)
+                if data is None:
+                    data = mm[:]
+                encoding = self.encoding if self.encoding != "auto" else self._file_encoding(path, mm)
+
+            text = data.decode(encoding, errors=self.errors)
+            st.count(files=1, chars=len(text))
+        return text
+
+    def _file_encoding(self, path: Path, data) -> str:
+        """Кодировка файла для encoding="auto" (с кэшем по пути, размеру и mtime)"""
+        st = path.stat()
+        key = (path, st.st_size, st.st_mtime_ns)
+        enc = self._encoding_cache.get(key)
+        if enc is None:
+            enc = detect_encoding(data, self.encodings)
+            self._encoding_cache[key] = enc
+        return enc
 
     def _normalize_text(self, text: str) -> List[str]:
         """
@@ -98,46 +191,30 @@ class TelegramReader:
         - завершающий '=' удаляется
         - строка приводится в UPPERCASE
         - заменяем ключевые слова из replacements в единый формат 'КЛИМАТ' в 'CLIMAT' и тд
-        """
-        text = text.replace("\r\n", "\n").replace("\r", "\n")
-
-        out: List[str] = []
-        for raw in text.split("\n"):
-            line = raw.strip()
-            if not line:
-                continue
 
-            line = " ".join(line.split())
-            if line.endswith("="):
-                line = line[:-1].rstrip()
-
-            line = line.upper()
-            for src, dst in self.replacements.items():
-                line = line.replace(src, dst)
-
-            out.append(line)
-
-        return out
+        Нормализатор собирается один раз в __init__ (см. TextNormalizer)
+        """
+        with metrics.stage("normalize") as st:
+            lines = self._normalizer(text)
+            st.count(lines=len(lines))
+        return lines
 
-    def _split_blocks(self, lines: List[str]) -> Tuple[List[MonthlyBlock], List[DecadalBlock]]:
+    def _iter_segments(self, lines: List[str]) -> Iterator[Block]:
         """
-        Делит нормализованные строки на блоки CLIMAT и DEKADA
+        Отдаёт блоки CLIMAT и DEKADA в порядке появления заголовков
         - находим заголовки 'CLIMAT...' и 'DEKADA...'
         - открываем сегмент до следующего заголовка
         - внутри сегмента берем только строки станции (первая группа 5 цифр)
-        :param lines:
-        :return:
         """
         headers: List[Tuple[int, str]] = []
 
-        for i, line in enumerate(lines):
-            if self._parse_climat_header(line) is not None:
-                headers.append((i, "CLIMAT"))
-            elif self._parse_decade_header(line) is not None:
-                headers.append((i, "DEKADA"))
-
-        monthly: List[MonthlyBlock] = []
-        decadal: List[DecadalBlock] = []
+        with metrics.stage("split") as st:
+            for i, line in enumerate(lines):
+                if self._parse_climat_header(line) is not None:
+                    headers.append((i, "CLIMAT"))
+                elif self._parse_decade_header(line) is not None:
+                    headers.append((i, "DEKADA"))
+            st.count(lines=len(lines), blocks=len(headers))
 
         for index, (start, kind) in enumerate(headers):
             end = headers[index + 1][0] if index + 1 < len(headers) else len(lines)
@@ -151,15 +228,13 @@ class TelegramReader:
                 if parsed is None:
                     continue
                 mm, yy = parsed
-                monthly.append(MonthlyBlock(mm, yy, station_lines, header_line))
+                yield MonthlyBlock(mm, yy, station_lines, header_line)
             else:
                 parsed = self._parse_decade_header(header_line)
                 if parsed is None:
                     continue
                 mm, dek = parsed
-                decadal.append(DecadalBlock(mm, dek, station_lines, header_line))
-
-        return monthly, decadal
+                yield DecadalBlock(mm, dek, station_lines, header_line)
 
 
     def _parse_climat_header(self, line: str) -> Optional[Tuple[int, int]]:
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from meteo_parser.core import metrics
+from meteo_parser.core.columnar import ColumnarResult, DecadalColumns, MonthlyColumns, RecordColumns
+from meteo_parser.core.decode import decode_p_station_hpa, decode_p_sea_hpa, decode_t_mean_deviation, \
+    decode_t_daily, decode_p_water, decode_precipitation, decode_sunshine, decode_t_mean_deviation_decade, \
+    decode_precipitation_decade, month_start, dekad_start
+from meteo_parser.core.groups import MONTHLY, DECADAL, MAX_KEY_LEN, GROUP_TABLE, GroupRule, apply_groups
+from meteo_parser.core.models import Block, MonthlyBlock
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без неё работает только скалярный TelegramParser
+    np = None
+
+"""
+Векторный (numpy) разбор строк станций пачками.
+
+Строки станций блока (или всех блоков файла/архива) склеиваются в один буфер uint8:
+- границы групп, номер строки каждой группы и правило из groups.GROUP_TABLE находятся операциями над массивами
+- для каждого правила коды группы собираются в матрицу (k, ширина кода) и расшифровываются арифметикой над цифрами
+- '/' и прочие не-цифры дают маски пропусков
+- float-значения берутся из таблиц, построенных скалярными декодерами decode.py, поэтому округление совпадает точно
+
+Строки с не-ASCII символами и строки, где одно поле задаётся несколькими группами (важен порядок),
+разбираются скалярно через apply_groups. Результат совпадает с
+ColumnarResult.from_records(TelegramParser().iter_records(blocks, ...)).
+"""
+
+HAS_NUMPY = np is not None
+
+DEFAULT_BATCH_LINES = 200_000
+
+# (values, valid) для одного поля
+Column = Tuple["np.ndarray", "np.ndarray"]
+VectorDecode = Callable[["np.ndarray"], List[Column]]
+
+
+def _digits(m: "np.ndarray") -> "np.ndarray":
+    return (m >= 0x30) & (m <= 0x39)
+
+
+def _number(m: "np.ndarray") -> "np.ndarray":
+    """Число из столбцов-цифр матрицы (для строк с не-цифрами - мусор, отсекается масками)"""
+    out = np.zeros(len(m), dtype=np.int64)
+    for j in range(m.shape[1]):
+        out = out * 10 + (m[:, j].astype(np.int64) - 0x30)
+    return out
+
+
+@lru_cache(maxsize=None)
+def _lut(decode: Callable[[str], Optional[float]], width: int) -> "np.ndarray":
+    """Таблица decode(код) для всех кодов из width цифр (None -> nan)"""
+    values = (decode(f"{v:0{width}d}") for v in range(10 ** width))
+    return np.fromiter((np.nan if x is None else x for x in values), dtype=np.float64, count=10 ** width)
+
+
+@lru_cache(maxsize=None)
+def _t_lut() -> "np.ndarray":
+    """SnTTT: индекс (Sn == '1') * 1000 + TTT"""
+    codes = [f"{sn}{t:03d}" for sn in "01" for t in range(1000)]
+    return np.array([decode_t_mean_deviation_decade(c) for c in codes], dtype=np.float64)
+
+
+def _table_value(lut: "np.ndarray", idx: "np.ndarray", ok: "np.ndarray") -> "np.ndarray":
+    return lut[np.where(ok, idx, 0)]
+
+
+def _pressure(decode: Callable[[str], Optional[float]]) -> VectorDecode:
+    def run(m: "np.ndarray") -> List[Column]:
+        ok = _digits(m).all(axis=1)
+        return [(_table_value(_lut(decode, 4), _number(m), ok), ok)]
+
+    return run
+
+
+def _water(m: "np.ndarray") -> List[Column]:
+    ok = _digits(m).all(axis=1)
+    return [(_table_value(_lut(decode_p_water, 3), _number(m), ok), ok)]
+
+
+def _t_decade(m: "np.ndarray") -> List[Column]:
+    ok = _digits(m[:, 1:4]).all(axis=1)
+    idx = (m[:, 0] == 0x31) * 1000 + _number(m[:, 1:4])
+    return [(_table_value(_t_lut(), idx, ok), ok)]
+
+
+def _t_mean_deviation(m: "np.ndarray") -> List[Column]:
+    return _t_decade(m[:, :4]) + _water(m[:, 4:])
+
+
+def _t_daily(m: "np.ndarray") -> List[Column]:
+    ok = _digits(m).all(axis=1)
+    (t_min, min_ok), = _t_decade(m[:, 4:])
+    (t_max, max_ok), = _t_decade(m[:, :4])
+    return [(t_min, min_ok & ok), (t_max, max_ok & ok)]
+
+
+def _precipitation(m: "np.ndarray") -> List[Column]:
+    d = _digits(m)
+    ok = d[:, :4].all(axis=1) & d[:, 5:7].all(axis=1)
+    return [
+        (_number(m[:, :4]), ok),
+        (_number(m[:, 4:5]), ok & d[:, 4]),
+        (_number(m[:, 5:7]), ok),
+    ]
+
+
+def _sunshine(m: "np.ndarray") -> List[Column]:
+    d = _digits(m)
+    return [
+        (_number(m[:, :3]), d[:, :3].all(axis=1)),
+        (_number(m[:, 3:6]), d[:, 3:6].all(axis=1)),
+    ]
+
+
+def _precipitation_decade(m: "np.ndarray") -> List[Column]:
+    d = _digits(m)
+    ok = d[:, :4].all(axis=1)
+    return [
+        (_number(m[:, :4]), ok),
+        (_number(m[:, 4:5]), ok & d[:, 4]),
+        (_number(m[:, 5:6]), ok & d[:, 5]),
+    ]
+
+
+# скалярный декодер -> (ширина кода, векторный аналог); кодам другой ширины скалярный декодер даёт None
+VECTOR_DECODERS: Dict[Callable[[str], object], Tuple[int, VectorDecode]] = {
+    decode_p_station_hpa: (4, _pressure(decode_p_station_hpa)),
+    decode_p_sea_hpa: (4, _pressure(decode_p_sea_hpa)),
+    decode_t_mean_deviation: (7, _t_mean_deviation),
+    decode_t_daily: (8, _t_daily),
+    decode_p_water: (3, _water),
+    decode_precipitation: (7, _precipitation),
+    decode_sunshine: (6, _sunshine),
+    decode_t_mean_deviation_decade: (4, _t_decade),
+    decode_precipitation_decade: (6, _precipitation_decade),
+}
+
+
+class _SectionTable:
+    """Правила одного раздела GROUP_TABLE в виде массивов numpy"""
+
+    def __init__(self, section: str) -> None:
+        self.section = section
+        self.rules: List[GroupRule] = []
+        # (первый байт группы, min(длина, MAX_KEY_LEN)) -> номер правила или -1
+        self.lookup = np.full((256, MAX_KEY_LEN + 1), -1, dtype=np.int16)
+
+        for (sec, lead, n), rule in GROUP_TABLE.items():
+            if sec != section or len(lead) != 1 or not lead.isascii():
+                continue
+            if not any(rule is r for r in self.rules):
+                self.rules.append(rule)
+            self.lookup[ord(lead), n] = next(i for i, r in enumerate(self.rules) if r is rule)
+
+        # правила с общими полями - одна группа: две такие группы в строке разбираются скалярно (важен порядок)
+        self.owner = list(range(len(self.rules)))
+        for i, rule in enumerate(self.rules):
+            for j in range(i):
+                if set(rule[4]) & set(self.rules[j][4]):
+                    self._union(i, j)
+        self.owner = [self._find(i) for i in range(len(self.rules))]
+        self.vector = [rule[2] in VECTOR_DECODERS for rule in self.rules]
+        self.fields = [f for rule in self.rules for f in rule[4]]
+
+    def _find(self, i: int) -> int:
+        while self.owner[i] != i:
+            i = self.owner[i]
+        return i
+
+    def _union(self, i: int, j: int) -> None:
+        self.owner[self._find(i)] = self._find(j)
+
+
+# байты-разделители групп (как str.split())
+_WS = None if np is None else np.array([chr(b).isspace() for b in range(256)], dtype=bool)
+_NL = 0x0A
+
+
+class BatchDecoder:
+    """
+    Векторный разбор строк станций
+
+    - decode_lines(section, lines): station_id и значения полей (values, valid) для списка строк
+    - decode_blocks(blocks, default_decadal_year): ColumnarResult по потоку блоков (год DEKADA - как в TelegramParser)
+    - fallback_lines: сколько строк пришлось разобрать скалярно
+
+    Требует numpy (ImportError без него)
+    """
+
+    def __init__(self, keep_raw_line: bool = False, batch_lines: int = DEFAULT_BATCH_LINES) -> None:
+        if np is None:
+            raise ImportError("BatchDecoder requires numpy")
+        self.keep_raw_line = keep_raw_line
+        self.batch_lines = batch_lines
+        self.fallback_lines = 0
+        self._tables = {MONTHLY: _SectionTable(MONTHLY), DECADAL: _SectionTable(DECADAL)}
+
+    def decode_lines(
+            self,
+            section: str,
+            lines: Sequence[str],
+    ) -> Tuple["np.ndarray", Dict[str, Column]]:
+        """
+        Args:
+            section: groups.MONTHLY / groups.DECADAL
+            lines: непустые строки станций (первая группа - номер станции)
+
+        Returns:
+            (station_id, {поле: (values, valid)}) - массивы длины len(lines)
+        """
+        table = self._tables[section]
+        n = len(lines)
+        station = np.zeros(n, dtype=np.int64)
+        out: Dict[str, Column] = {
+            f: (np.zeros(n, dtype=np.float64), np.zeros(n, dtype=bool)) for f in table.fields
+        }
+        if n == 0:
+            return station, out
+
+        text = "\n".join(lines)
+        if text.isascii() and text.count("\n") == n - 1:
+            plain = np.ones(n, dtype=bool)
+        else:
+            plain = np.fromiter((ln.isascii() and "\n" not in ln for ln in lines), dtype=bool, count=n)
+            text = "\n".join(ln if ok else "" for ln, ok in zip(lines, plain))
+        buf = np.frombuffer((text + "\n").encode("ascii"), dtype=np.uint8)
+
+        # границы групп и номер строки каждой группы
+        sep = _WS[buf]
+        is_start = ~sep
+        is_start[1:] &= sep[:-1]
+        is_end = ~sep
+        is_end[:-1] &= sep[1:]
+        starts = np.flatnonzero(is_start)
+        ends = np.flatnonzero(is_end) + 1
+        line_of = np.cumsum(buf == _NL)[starts]
+        first = np.ones(len(starts), dtype=bool)
+        first[1:] = line_of[1:] != line_of[:-1]
+
+        fallback = ~plain
+        self._station_ids(buf, lines, starts[first], ends[first], line_of[first], station)
+
+        # правило каждой группы (-1 - нет правила или номер станции)
+        lens = ends - starts
+        rid = table.lookup[buf[starts], np.minimum(lens, MAX_KEY_LEN)].astype(np.int64)
+        rid[first] = -1
+        g = np.flatnonzero(rid >= 0)
+
+        owner = np.array(table.owner, dtype=np.int64)
+        key = line_of[g] * len(table.rules) + owner[rid[g]]
+        key.sort()
+        dup = key[1:][key[1:] == key[:-1]] // len(table.rules)
+        fallback[dup] = True
+        no_vector = np.array([not v for v in table.vector], dtype=bool)
+        fallback[line_of[g][no_vector[rid[g]]]] = True
+
+        for r, (start, stop, decode, _setter, fields) in enumerate(table.rules):
+            if not table.vector[r]:
+                continue
+            width, run = VECTOR_DECODERS[decode]
+            sel = g[rid[g] == r]
+            code_start = starts[sel] + start
+            code_end = ends[sel] if stop is None else np.minimum(ends[sel], starts[sel] + stop)
+            # кодам другой ширины скалярный декодер даёт None - в масках уже False
+            exact = (code_end - code_start) == width
+            rows = line_of[sel][exact]
+            if not len(rows):
+                continue
+
+            m = buf[code_start[exact][:, None] + np.arange(width)]
+            for name, (values, valid) in zip(fields, run(m)):
+                out_values, out_valid = out[name]
+                out_values[rows] = values
+                out_valid[rows] = valid
+
+        for i in np.flatnonzero(fallback):
+            self._decode_scalar(section, table, lines[i], i, station, out)
+        self.fallback_lines += int(fallback.sum())
+
+        return station, out
+
+    def decode_blocks(self, blocks: Iterable[Block], default_decadal_year: int) -> ColumnarResult:
+        """
+        Аналог ColumnarResult.from_records(TelegramParser().iter_records(blocks, default_decadal_year)).
+        Строки копятся до batch_lines и разбираются пачкой; DEKADA до первого CLIMAT ждут года, как в iter_records
+        """
+        res = ColumnarResult(MonthlyColumns(self.keep_raw_line), DecadalColumns(self.keep_raw_line))
+        monthly = _Pending()
+        decadal = _Pending()
+        dec_year: Optional[int] = None
+
+        for block in blocks:
+            lines = [ln for ln in block.station_lines if ln and not ln.isspace()]
+            if isinstance(block, MonthlyBlock):
+                if dec_year is None:
+                    dec_year = block.year
+                monthly.add(lines, (block.year, block.month))
+                if len(monthly.lines) >= self.batch_lines:
+                    self._flush(MONTHLY, monthly, res.monthly, None)
+            else:
+                decadal.add(lines, (block.month, block.dekad_no))
+                if dec_year is not None and len(decadal.lines) >= self.batch_lines:
+                    self._flush(DECADAL, decadal, res.decadal, dec_year)
+
+        self._flush(MONTHLY, monthly, res.monthly, None)
+        self._flush(DECADAL, decadal, res.decadal, default_decadal_year if dec_year is None else dec_year)
+        return res
+
+    def _flush(self, section: str, pending: "_Pending", columns: RecordColumns, year: Optional[int]) -> None:
+        n = len(pending.lines)
+        if n == 0:
+            return
+        m = metrics.current
+        t0 = time.perf_counter() if m is not None else 0.0
+
+        if section == MONTHLY:
+            ordinals = [month_start(yy, mm).toordinal() for yy, mm in pending.keys]
+        else:
+            ordinals = [dekad_start(year, mm, dek).toordinal() for mm, dek in pending.keys]
+        counts = np.array(pending.counts, dtype=np.int64)
+
+        station, fields = self.decode_lines(section, pending.lines)
+        values = {
+            "date": np.repeat(np.array(ordinals, dtype=np.int64), counts),
+            "station_id": station,
+        }
+        if section == DECADAL:
+            values["dekad_no"] = np.repeat(np.array([dek for _mm, dek in pending.keys], dtype=np.int64), counts)
+
+        masks: Dict[str, bytes] = {}
+        for name, code, nullable in columns.schema:
+            if nullable:
+                v, ok = fields[name]
+                values[name] = np.where(ok, v, 0)
+                masks[name] = ok.astype(np.uint8).tobytes()
+
+        columns.extend_columns(
+            n,
+            {name: values[name].astype(np.dtype(code)).tobytes() for name, code, _ in columns.schema},
+            masks,
+            raw_lines=pending.lines if self.keep_raw_line else None,
+        )
+        pending.clear()
+        if m is not None:
+            m.add("decode_vectorized", time.perf_counter() - t0, lines=n)
+
+    def _station_ids(
+            self,
+            buf: "np.ndarray",
+            lines: Sequence[str],
+            starts: "np.ndarray",
+            ends: "np.ndarray",
+            line_no: "np.ndarray",
+            out: "np.ndarray",
+    ) -> None:
+        """Первая группа строки - 5 цифр (векторно); иначе int() как в TelegramParser"""
+        five = (ends - starts) == 5
+        m = buf[starts[five][:, None] + np.arange(5)]
+        ok = _digits(m).all(axis=1)
+        out[line_no[five][ok]] = _number(m[ok])
+
+        rest = np.ones(len(starts), dtype=bool)
+        rest[np.flatnonzero(five)[ok]] = False
+        for i in line_no[rest]:
+            out[i] = int(lines[i].split()[0])
+
+    def _decode_scalar(
+            self,
+            section: str,
+            table: _SectionTable,
+            line: str,
+            i: int,
+            station: "np.ndarray",
+            out: Dict[str, Column],
+    ) -> None:
+        parts = line.split()
+        station[i] = int(parts[0])
+        rec = SimpleNamespace(**{f: None for f in table.fields})
+        apply_groups(rec, section, parts[1:])
+        for name, (values, valid) in out.items():
+            v = getattr(rec, name)
+            valid[i] = v is not None
+            values[i] = 0 if v is None else v
+
+
+class _Pending:
+    """Накопленные строки станций и (ключ блока, число строк) для np.repeat"""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.keys: List[Tuple[int, int]] = []
+        self.counts: List[int] = []
+
+    def add(self, lines: List[str], key: Tuple[int, int]) -> None:
+        if lines:
+            self.lines.extend(lines)
+            self.keys.append(key)
+            self.counts.append(len(lines))
+
+    def clear(self) -> None:
+        self.lines = []
+        self.keys.clear()
+        self.counts.clear()
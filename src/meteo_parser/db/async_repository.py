@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from meteo_parser.core import metrics as _metrics
+from meteo_parser.db.repository import month_values_buckets, month_values_stmt
+
+"""
+Async-чтение рангов: окна многих (dataset, scale, month) параллельно через пул соединений.
+
+- запрос и разбор строк - те же, что у repository.fetch_rank_values_for_month
+- на каждую задачу - своя AsyncSession (одну сессию нельзя использовать из нескольких задач)
+- одновременно выполняется не больше concurrency запросов (asyncio.Semaphore);
+  concurrency не стоит делать больше pool_size движка (make_async_engine) - лишние задачи ждут соединение
+"""
+
+DEFAULT_CONCURRENCY = 8
+
+MonthKey = tuple[str, str, int]  # (dataset, scale, month)
+
+
+async def fetch_rank_values_for_month_async(
+    session: AsyncSession,
+    *,
+    dataset: str,
+    scale: str,   # "monthly" | "decadal"
+    month: int,   # 1..12
+    metrics: tuple[str, ...] = ("warmest", "coldest", "wettest", "driest"),
+) -> dict[tuple[str, str], list[float]]:
+    """То же, что fetch_rank_values_for_month, для AsyncSession"""
+    stmt = month_values_stmt(dataset=dataset, scale=scale, month=month, metrics=metrics)
+    m = _metrics.current
+    t0 = time.perf_counter() if m is not None else 0.0
+    rows = (await session.execute(stmt)).all()
+    if m is not None:
+        # при параллельных запросах - сумма времени запросов, а не время всей пачки
+        m.add("rank_fetch", time.perf_counter() - t0, queries=1, rows=len(rows))
+    return month_values_buckets(rows)
+
+
+async def fetch_rank_values_for_months(
+    session_factory: async_sessionmaker,
+    keys: Iterable[MonthKey],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    metrics: tuple[str, ...] = ("warmest", "coldest", "wettest", "driest"),
+) -> dict[MonthKey, dict[tuple[str, str], list[float]]]:
+    """
+    Возвращает словарь:
+      key = (dataset, scale, month), например ("murmansk", "monthly", 6)
+      value = ответ fetch_rank_values_for_month для этого месяца
+
+    Повторяющиеся ключи запрашиваются один раз. Ошибка любого запроса отменяет остальные и пробрасывается.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(key: MonthKey) -> dict[tuple[str, str], list[float]]:
+        dataset, scale, month = key
+        async with semaphore:
+            async with session_factory() as session:
+                return await fetch_rank_values_for_month_async(
+                    session, dataset=dataset, scale=scale, month=month, metrics=metrics,
+                )
+
+    unique = list(dict.fromkeys(keys))
+    tasks = [asyncio.ensure_future(fetch(key)) for key in unique]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return dict(zip(unique, results))
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
+if TYPE_CHECKING:  # sqlalchemy.ext.asyncio требует greenlet - импортируется только для async-движка
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+# синхронный драйвер -> async-драйвер для того же URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
 
 def make_engine(db_url: str) -> Engine:
     return create_engine(db_url, pool_pre_ping=True)
@@ -11,3 +22,39 @@ def make_engine(db_url: str) -> Engine:
 
 def make_session_factory(engine: Engine) -> sessionmaker:
     return sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def async_db_url(db_url: str) -> str:
+    """
+    URL синхронного движка -> URL async-движка:
+      postgresql+psycopg2://... -> postgresql+asyncpg://...
+      sqlite:///ranks.db        -> sqlite+aiosqlite:///ranks.db
+    URL с async-драйвером (asyncpg, aiosqlite, psycopg) возвращается как есть
+    """
+    url = make_url(db_url)
+    if url.get_dialect(_is_async=True).is_async:
+        return db_url
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"no async driver for {url.drivername}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def make_async_engine(db_url: str, *, pool_size: int = 8) -> AsyncEngine:
+    """
+    Async-движок для db.async_repository (db_url может быть и синхронным, см. async_db_url)
+
+    pool_size: соединений в пуле; одновременных запросов разумно держать не больше (concurrency)
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_db_url(db_url)
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(url)
+    return create_async_engine(url, pool_pre_ping=True, pool_size=pool_size, max_overflow=0)
+
+
+def make_async_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    return async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
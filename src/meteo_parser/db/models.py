@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import datetime as dt
+from typing import Optional
+
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Integer, Numeric, SmallInteger
+from sqlalchemy import String, Integer, Numeric, SmallInteger, Date, Float, Index
 
 
 class Base(DeclarativeBase):
@@ -10,6 +13,15 @@ class Base(DeclarativeBase):
 
 class RankRow(Base):
     __tablename__ = "rank_rows"
+    __table_args__ = (
+        # ключ строки рангов (005_rank_rows_unique.sql); равные значения делят rank, поэтому в ключе и год
+        Index(
+            "ux_rank_rows_key",
+            "dataset", "metric", "scale", "month", "period", "rank", "year",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -22,3 +34,41 @@ class RankRow(Base):
 
     value: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class MonthlyObservation(Base):
+    """Разобранная запись CLIMAT (core.models.MonthlyRecord без raw_line)"""
+    __tablename__ = "monthly_observations"
+
+    station_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[dt.date] = mapped_column(Date, primary_key=True)   # YYYY-MM-01
+
+    p_station_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    p_sea_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    t_mean_c: Mapped[Optional[float]] = mapped_column(Float)
+    t_daily_std_c: Mapped[Optional[float]] = mapped_column(Float)
+    t_min_daily_c: Mapped[Optional[float]] = mapped_column(Float)
+    t_max_daily_c: Mapped[Optional[float]] = mapped_column(Float)
+    e_vapor_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    precip_sum_mm: Mapped[Optional[int]] = mapped_column(Integer)
+    precip_repeatability: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    precip_days: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    sunshine_hours: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    sunshine_pct_norm: Mapped[Optional[int]] = mapped_column(SmallInteger)
+
+
+class DecadalObservation(Base):
+    """Разобранная запись DEKADA (core.models.DecadalRecord без raw_line)"""
+    __tablename__ = "decadal_observations"
+
+    station_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[dt.date] = mapped_column(Date, primary_key=True)   # YYYY-MM-01 / 11 / 21
+    dekad_no: Mapped[int] = mapped_column(SmallInteger, primary_key=True)  # 1..3
+
+    p_station_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    p_sea_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    t_mean_c: Mapped[Optional[float]] = mapped_column(Float)
+    e_vapor_hpa: Mapped[Optional[float]] = mapped_column(Float)
+    precip_sum_mm: Mapped[Optional[int]] = mapped_column(Integer)
+    precip_repeatability: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    precip_days: Mapped[Optional[int]] = mapped_column(SmallInteger)
@@ -1,11 +1,16 @@
-# src/meteo_parser/db/repository.py
+# meteo_parser/db/repository.py
 from __future__ import annotations
 
 from collections import defaultdict
-from sqlalchemy import select
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Iterable, Optional
+
+from sqlalchemy import Row, Select, select, tuple_
 from sqlalchemy.orm import Session
 
-from src.meteo_parser.db.models import RankRow
+from meteo_parser.core import metrics as _metrics
+from meteo_parser.db.models import RankRow
 
 
 def fetch_rank_values_for_month(
@@ -23,7 +28,16 @@ def fetch_rank_values_for_month(
 
     Это ОДИН запрос в БД на весь месяц.
     """
-    stmt = (
+    stmt = month_values_stmt(dataset=dataset, scale=scale, month=month, metrics=metrics)
+    with _metrics.stage("rank_fetch") as st:
+        rows = session.execute(stmt).all()
+        st.count(queries=1, rows=len(rows))
+    return month_values_buckets(rows)
+
+
+def month_values_stmt(*, dataset: str, scale: str, month: int, metrics: tuple[str, ...]) -> Select:
+    """Запрос fetch_rank_values_for_month (общий для синхронного и async репозитория)"""
+    return (
         select(RankRow.metric, RankRow.period, RankRow.rank, RankRow.value)
         .where(
             RankRow.dataset == dataset,
@@ -34,8 +48,147 @@ def fetch_rank_values_for_month(
         .order_by(RankRow.metric.asc(), RankRow.period.asc(), RankRow.rank.asc(), RankRow.id.asc())
     )
 
+
+def month_values_buckets(rows: Iterable[Row]) -> dict[tuple[str, str], list[float]]:
+    """Строки month_values_stmt -> {(metric, period): [v1..v10]}"""
     buckets: dict[tuple[str, str], list[float]] = defaultdict(list)
-    for metric, period, _rank, value in session.execute(stmt).all():
+    for metric, period, _rank, value in rows:
         buckets[(metric, period)].append(float(value))
 
     return dict(buckets)
+
+
+def fetch_rank_values_for_dataset(
+    session: Session,
+    *,
+    dataset: str,
+    metrics: tuple[str, ...] = ("warmest", "coldest", "wettest", "driest"),
+) -> dict[tuple[str, int, str, str], list[float]]:
+    """
+    Все ранги датасета ОДНИМ запросом:
+      key = (scale, month, metric, period), например ("monthly", 6, "warmest", "M")
+      value = [v1..v10] отсортированные по rank
+    """
+    stmt = (
+        select(RankRow.scale, RankRow.month, RankRow.metric, RankRow.period, RankRow.value)
+        .where(
+            RankRow.dataset == dataset,
+            RankRow.metric.in_(metrics),
+        )
+        .order_by(
+            RankRow.scale.asc(), RankRow.month.asc(), RankRow.metric.asc(), RankRow.period.asc(),
+            RankRow.rank.asc(), RankRow.id.asc(),
+        )
+    )
+
+    with _metrics.stage("rank_fetch") as st:
+        rows = session.execute(stmt).all()
+        st.count(queries=1, rows=len(rows))
+
+    buckets: dict[tuple[str, int, str, str], list[float]] = defaultdict(list)
+    for scale, month, metric, period, value in rows:
+        buckets[(scale, month, metric, period)].append(float(value))
+
+    return dict(buckets)
+
+
+MonthKey = tuple[str, str, int]  # (dataset, scale, month)
+
+
+@dataclass(frozen=True)
+class WindowAgg:
+    """Окно (metric, period), агрегированное в БД"""
+    values: tuple[float, ...]   # по rank
+    min_value: Optional[float]
+    max_value: Optional[float]
+    count: int
+
+
+# Один запрос на все ключи: ключи - массивами через unnest, границы и значения окна - агрегатами.
+# Порядок array_agg - как у fetch_rank_values_for_month (rank, id); индекс ix_rank_rows_window
+# (004_rank_rows_window_index.sql) покрывает и соединение с ключами, и этот порядок.
+_WINDOW_AGGREGATES_SQL = """
+SELECT r.dataset, r.scale, r.month, r.metric, r.period,
+       min(r.value)::float8, max(r.value)::float8, count(*),
+       array_agg(r.value::float8 ORDER BY r.rank, r.id)
+FROM rank_rows r
+JOIN unnest(%s::text[], %s::text[], %s::smallint[]) AS k(dataset, scale, month)
+  ON r.dataset = k.dataset AND r.scale = k.scale AND r.month = k.month
+WHERE r.metric = ANY(%s::text[])
+GROUP BY r.dataset, r.scale, r.month, r.metric, r.period
+"""
+
+
+def fetch_window_aggregates(
+    session: Session,
+    *,
+    keys: Iterable[MonthKey],
+    metrics: tuple[str, ...] = ("warmest", "coldest", "wettest", "driest"),
+) -> dict[MonthKey, dict[tuple[str, str], WindowAgg]]:
+    """
+    Окна многих (dataset, scale, month) ОДНИМ запросом:
+      key = (dataset, scale, month), например ("murmansk", "monthly", 6)
+      value = {(metric, period): WindowAgg(values, min_value, max_value, count)}
+    Для ключа без рангов - пустой словарь.
+
+    PostgreSQL: агрегаты считает сервер, строки читаются DBAPI-курсором без ORM/Row-объектов.
+    Другие БД (SQLite): тот же ответ, группировка и min/max - в Python.
+    """
+    keys = list(dict.fromkeys(keys))
+    out: dict[MonthKey, dict[tuple[str, str], WindowAgg]] = {key: {} for key in keys}
+    if not keys:
+        return out
+
+    with _metrics.stage("rank_fetch") as st:
+        if session.get_bind().dialect.name == "postgresql":
+            rows = _window_aggregates_pg(session, keys, metrics)
+        else:
+            rows = _window_aggregates_generic(session, keys, metrics)
+        st.count(queries=1, rows=sum(count for *_key, count, _values in rows))
+
+    for dataset, scale, month, metric, period, min_value, max_value, count, values in rows:
+        out[(dataset, scale, month)][(metric, period)] = WindowAgg(
+            values=tuple(values),
+            min_value=min_value,
+            max_value=max_value,
+            count=count,
+        )
+    return out
+
+
+def _window_aggregates_pg(session: Session, keys: list[MonthKey], metrics: tuple[str, ...]) -> list[tuple]:
+    # DBAPI-соединение текущей транзакции сессии (psycopg2 / psycopg 3)
+    cur = session.connection().connection.cursor()
+    try:
+        cur.execute(
+            _WINDOW_AGGREGATES_SQL,
+            (
+                [dataset for dataset, _scale, _month in keys],
+                [scale for _dataset, scale, _month in keys],
+                [month for _dataset, _scale, month in keys],
+                list(metrics),
+            ),
+        )
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _window_aggregates_generic(session: Session, keys: list[MonthKey], metrics: tuple[str, ...]) -> list[tuple]:
+    stmt = (
+        select(RankRow.dataset, RankRow.scale, RankRow.month, RankRow.metric, RankRow.period, RankRow.value)
+        .where(
+            tuple_(RankRow.dataset, RankRow.scale, RankRow.month).in_(keys),
+            RankRow.metric.in_(metrics),
+        )
+        .order_by(
+            RankRow.dataset.asc(), RankRow.scale.asc(), RankRow.month.asc(), RankRow.metric.asc(),
+            RankRow.period.asc(), RankRow.rank.asc(), RankRow.id.asc(),
+        )
+    )
+
+    rows = []
+    for window, group in groupby(session.execute(stmt).tuples(), key=lambda r: r[:5]):
+        values = [float(r[5]) for r in group]
+        rows.append((*window, min(values), max(values), len(values), values))
+    return rows
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import struct
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+
+from meteo_parser.config import SEED_BATCH_SIZE
+from meteo_parser.db.models import Base, RankRow
+from meteo_parser.db.writer import _copy
+
+"""
+Загрузка rank_rows из docker/ranks/**/*.jsonl (замена 002_seed_rank_rows.sh для перезаливки).
+
+- JSONL читаются потоком, строки уходят в БД пачками по batch_size
+- PostgreSQL: COPY (FORMAT binary) во временную таблицу, затем для каждого датасета отдельная транзакция:
+  DELETE строк датасета + INSERT из временной таблицы. До COMMIT читатели видят старые ранги,
+  после - новые (MVCC: замена атомарна и не блокирует чтение)
+- дубли ключа (dataset, metric, scale, month, period, rank, year) схлопываются, побеждает последняя строка;
+  year в ключе потому, что ранги плотные: равные значения делят rank
+- SQLite (локальный запуск): таблица создаётся сама, та же замена через executemany
+- повторный запуск с теми же файлами даёт те же строки (идемпотентно)
+"""
+
+DEFAULT_BATCH_SIZE = SEED_BATCH_SIZE  # одно значение с config.py
+
+COLUMNS: Tuple[str, ...] = ("dataset", "metric", "scale", "month", "period", "rank", "value", "year")
+KEY: Tuple[str, ...] = ("dataset", "metric", "scale", "month", "period", "rank", "year")
+
+# (dataset, metric, scale, month, period, rank, value, year)
+RankTuple = Tuple[str, str, str, int, str, int, float, Optional[int]]
+
+_STAGE = "_stage_rank_rows"
+
+_PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_PGCOPY_TRAILER = struct.pack(">h", -1)
+_FIELDS = struct.Struct(">h")
+_NULL = struct.pack(">i", -1)
+_INT2 = struct.Struct(">ih")
+_INT4 = struct.Struct(">ii")
+_FLOAT8 = struct.Struct(">id")
+
+
+@dataclass
+class SeedStats:
+    rows: int = 0           # прочитано строк JSONL
+    written: int = 0        # записано в rank_rows
+    batches: int = 0
+    seconds: float = 0.0
+    datasets: List[str] = field(default_factory=list)
+
+    @property
+    def duplicates(self) -> int:
+        return self.rows - self.written
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def iter_rank_rows(ranks_dir: Path, datasets: Optional[Iterable[str]] = None) -> Iterator[RankTuple]:
+    """Строки всех ranks_dir/**/*.jsonl в порядке сортировки путей (как в 002_seed_rank_rows.sh)"""
+    wanted = set(datasets) if datasets is not None else None
+    for path in sorted(ranks_dir.rglob("*.jsonl")):
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                if wanted is not None and obj["dataset"] not in wanted:
+                    continue
+                year = obj.get("year")
+                yield (
+                    obj["dataset"],
+                    obj["metric"],
+                    obj["scale"],
+                    int(obj["month"]),
+                    obj["period"],
+                    int(obj["rank"]),
+                    float(obj["value"]),
+                    None if year is None else int(year),
+                )
+
+
+class RankSeeder:
+    """
+    Перезаливка rank_rows по датасетам
+
+    - seed(ranks_dir, datasets=None): все датасеты из JSONL (или только перечисленные)
+    - on_swap(dataset): вызывается после COMMIT замены датасета, например RankWindowCache.invalidate
+    - stats: счётчики последней загрузки (в т.ч. rows_per_sec)
+    """
+
+    def __init__(
+            self,
+            engine: Engine,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            on_swap: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.on_swap = on_swap
+        self.stats = SeedStats()
+
+        self._dialect = engine.dialect.name
+        if self._dialect not in ("postgresql", "sqlite"):
+            raise ValueError(f"unsupported dialect: {self._dialect}")
+        if self._dialect == "sqlite":
+            Base.metadata.create_all(engine, tables=[RankRow.__table__])
+
+    def seed(self, ranks_dir: Path, datasets: Optional[Iterable[str]] = None) -> SeedStats:
+        self.stats = SeedStats()
+        t0 = time.perf_counter()
+        rows = iter_rank_rows(ranks_dir, datasets)
+        if self._dialect == "postgresql":
+            self._seed_pg(rows)
+        else:
+            self._seed_sqlite(rows)
+        self.stats.seconds = time.perf_counter() - t0
+        return self.stats
+
+    def _seed_pg(self, rows: Iterable[RankTuple]) -> None:
+        cols = ", ".join(COLUMNS)
+        key = ", ".join(KEY)
+
+        raw = self.engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            # seq - порядок строк в файлах: из повторов ключа остаётся последняя
+            cur.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE} ("
+                "dataset text, metric text, scale text, month smallint, period text, "
+                "rank smallint, value float8, year integer, seq bigserial)"
+            )
+            cur.execute(f"TRUNCATE {_STAGE}")
+            batch: List[RankTuple] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._copy_stage(cur, batch)
+            self._copy_stage(cur, batch)
+            raw.commit()
+
+            cur.execute(f"SELECT dataset FROM {_STAGE} GROUP BY dataset ORDER BY dataset")
+            for (dataset,) in cur.fetchall():
+                cur.execute("DELETE FROM rank_rows WHERE dataset = %s", (dataset,))
+                cur.execute(
+                    f"INSERT INTO rank_rows ({cols}) "
+                    f"SELECT DISTINCT ON ({key}) {cols} FROM {_STAGE} WHERE dataset = %s "
+                    f"ORDER BY {key}, seq DESC",
+                    (dataset,),
+                )
+                written = cur.rowcount
+                raw.commit()
+                self._swapped(dataset, written)
+
+            cur.execute(f"DROP TABLE {_STAGE}")
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _copy_stage(self, cur, batch: List[RankTuple]) -> None:
+        if not batch:
+            return
+        _copy(cur, f"COPY {_STAGE} ({', '.join(COLUMNS)}) FROM STDIN (FORMAT binary)", _copy_binary(batch))
+        self.stats.rows += len(batch)
+        self.stats.batches += 1
+        batch.clear()
+
+    def _seed_sqlite(self, rows: Iterable[RankTuple]) -> None:
+        # dataset -> ключ -> строка (повтор ключа заменяет строку)
+        by_dataset: dict[str, dict[tuple, RankTuple]] = defaultdict(dict)
+        for row in rows:
+            dataset, metric, scale, month, period, rank, _value, year = row
+            by_dataset[dataset][(metric, scale, month, period, rank, year)] = row
+            self.stats.rows += 1
+
+        table = RankRow.__table__
+        for dataset in sorted(by_dataset):
+            values = list(by_dataset[dataset].values())
+            with self.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.dataset == dataset))
+                for start in range(0, len(values), self.batch_size):
+                    conn.execute(table.insert(), [dict(zip(COLUMNS, row)) for row in values[start:start + self.batch_size]])
+                    self.stats.batches += 1
+            self._swapped(dataset, len(values))
+
+    def _swapped(self, dataset: str, written: int) -> None:
+        self.stats.written += written
+        self.stats.datasets.append(dataset)
+        if self.on_swap is not None:
+            self.on_swap(dataset)
+
+
+def _copy_binary(rows: Iterable[RankTuple]) -> bytes:
+    """Строки в двоичном формате COPY (типы колонок - как у временной таблицы _stage_rank_rows)"""
+    out = bytearray(_PGCOPY_HEADER)
+    fields = _FIELDS.pack(len(COLUMNS))
+    for dataset, metric, scale, month, period, rank, value, year in rows:
+        out += fields
+        out += _text(dataset)
+        out += _text(metric)
+        out += _text(scale)
+        out += _INT2.pack(2, month)
+        out += _text(period)
+        out += _INT2.pack(2, rank)
+        out += _FLOAT8.pack(8, value)
+        out += _NULL if year is None else _INT4.pack(4, year)
+    out += _PGCOPY_TRAILER
+    return bytes(out)
+
+
+def _text(value: str) -> bytes:
+    b = value.encode("utf-8")
+    return struct.pack(">i", len(b)) + b
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from src.meteo_parser.config import AppConfig
-from src.meteo_parser.db.engine import make_engine, make_session_factory
-from src.meteo_parser.compare.loader import load_rank_window
+from meteo_parser.config import AppConfig
+from meteo_parser.db.engine import make_engine, make_session_factory
+from meteo_parser.compare.loader import load_rank_window
 
 
 def main() -> None:
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from meteo_parser.compare.loader import load_many_month_windows, load_month_windows
+from meteo_parser.config import AppConfig
+from meteo_parser.db.engine import make_async_engine, make_async_session_factory, make_engine, make_session_factory
+
+
+async def read_async(cfg: AppConfig, keys: list[tuple[str, str, int]]) -> dict:
+    engine = make_async_engine(cfg.db_url, pool_size=cfg.rank_fetch_concurrency)
+    try:
+        SessionFactory = make_async_session_factory(engine)
+        return await load_many_month_windows(SessionFactory, keys, concurrency=cfg.rank_fetch_concurrency)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    cfg = AppConfig()
+    keys = [(cfg.dataset, scale, month) for scale in ("monthly", "decadal") for month in range(1, 13)]
+
+    t0 = time.perf_counter()
+    SessionFactory = make_session_factory(make_engine(cfg.db_url))
+    with SessionFactory() as session:
+        sync = {
+            (dataset, scale, month): load_month_windows(session, dataset=dataset, scale=scale, month=month)
+            for dataset, scale, month in keys
+        }
+    t_sync = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    windows = asyncio.run(read_async(cfg, keys))
+    t_async = time.perf_counter() - t0
+
+    print(f"keys: {len(keys)}  sync: {t_sync:.3f}s  async (concurrency={cfg.rank_fetch_concurrency}): {t_async:.3f}s")
+    print("same windows:", windows == sync)
+    w = windows[(cfg.dataset, "monthly", 6)].get(("warmest", "M"))
+    if w is not None:
+        print("MONTH 6 warmest:", len(w.values), w.min_value, w.max_value)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import io
+import time
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from meteo_parser.core.columnar import ColumnarResult, RecordColumns
+from meteo_parser.core.models import MonthlyRecord, Record
+from meteo_parser.db.models import Base, DecadalObservation, MonthlyObservation
+
+"""
+Пакетная запись разобранных записей в monthly_observations / decadal_observations.
+
+- PostgreSQL: пачка строк -> COPY во временную таблицу -> INSERT ... ON CONFLICT DO UPDATE в основную
+  (повторная запись тех же телеграмм идемпотентна, неизменённые строки не перезаписываются)
+- SQLite (локальный запуск): таблицы создаются сами, пачка пишется executemany-upsert
+- каждая пачка - отдельная транзакция; при повторе в одной пачке ключа побеждает последняя запись (как в разборе)
+"""
+
+DEFAULT_BATCH_SIZE = 50_000
+
+MONTHLY_TABLE: Table = MonthlyObservation.__table__
+DECADAL_TABLE: Table = DecadalObservation.__table__
+
+
+@dataclass
+class WriteStats:
+    monthly: int = 0
+    decadal: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.monthly + self.decadal
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+class _Target:
+    """Таблица наблюдений: порядок колонок, первичный ключ, получение кортежа из записи"""
+
+    def __init__(self, table: Table) -> None:
+        self.table = table
+        self.columns: Tuple[str, ...] = tuple(c.name for c in table.columns)
+        self.key: Tuple[str, ...] = tuple(c.name for c in table.primary_key.columns)
+        self.values: Tuple[str, ...] = tuple(c for c in self.columns if c not in self.key)
+        self.row = attrgetter(*self.columns)
+
+
+class ObservationWriter:
+    """
+    Запись MonthlyRecord/DecadalRecord (или столбцов ColumnarResult) в БД
+
+    - write_records(records): поток записей, пачками по batch_size
+    - write_columns(result): столбцовый результат без сборки записей
+    - stats: счётчики последней записи (в т.ч. rows_per_sec)
+    """
+
+    def __init__(self, engine: Engine, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.stats = WriteStats()
+
+        self._dialect = engine.dialect.name
+        if self._dialect not in ("postgresql", "sqlite"):
+            raise ValueError(f"unsupported dialect: {self._dialect}")
+        if self._dialect == "sqlite":
+            Base.metadata.create_all(engine, tables=[MONTHLY_TABLE, DECADAL_TABLE])
+
+        self._monthly = _Target(MONTHLY_TABLE)
+        self._decadal = _Target(DECADAL_TABLE)
+
+    def write_records(self, records: Iterable[Record]) -> WriteStats:
+        monthly: List[tuple] = []
+        decadal: List[tuple] = []
+        m_row = self._monthly.row
+        d_row = self._decadal.row
+
+        self.stats = WriteStats()
+        t0 = time.perf_counter()
+        for rec in records:
+            if isinstance(rec, MonthlyRecord):
+                monthly.append(m_row(rec))
+                if len(monthly) >= self.batch_size:
+                    self._flush(self._monthly, monthly)
+            else:
+                decadal.append(d_row(rec))
+                if len(decadal) >= self.batch_size:
+                    self._flush(self._decadal, decadal)
+        self._flush(self._monthly, monthly)
+        self._flush(self._decadal, decadal)
+        self.stats.seconds = time.perf_counter() - t0
+        return self.stats
+
+    def write_columns(self, result: ColumnarResult) -> WriteStats:
+        self.stats = WriteStats()
+        t0 = time.perf_counter()
+        for target, columns in ((self._monthly, result.monthly), (self._decadal, result.decadal)):
+            self._write_columns(target, columns)
+        self.stats.seconds = time.perf_counter() - t0
+        return self.stats
+
+    def _write_columns(self, target: _Target, columns: RecordColumns) -> None:
+        batch: List[tuple] = []
+        for row in columns.iter_rows(target.columns):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(target, batch)
+        self._flush(target, batch)
+
+    def _flush(self, target: _Target, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        if self._dialect == "postgresql":
+            self._copy_upsert(target, rows)
+        else:
+            self._sqlite_upsert(target, rows)
+
+        if target is self._monthly:
+            self.stats.monthly += len(rows)
+        else:
+            self.stats.decadal += len(rows)
+        self.stats.batches += 1
+        rows.clear()
+
+    def _sqlite_upsert(self, target: _Target, rows: Sequence[tuple]) -> None:
+        stmt = sqlite_insert(target.table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(target.key),
+            set_={c: stmt.excluded[c] for c in target.values},
+        )
+        params = [dict(zip(target.columns, row)) for row in rows]
+        with self.engine.begin() as conn:
+            conn.execute(stmt, params)
+
+    def _copy_upsert(self, target: _Target, rows: Sequence[tuple]) -> None:
+        table = target.table.name
+        stage = f"_stage_{table}"
+        cols = ", ".join(target.columns)
+        key = ", ".join(target.key)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in target.values)
+        changed = " OR ".join(f"{table}.{c} IS DISTINCT FROM EXCLUDED.{c}" for c in target.values)
+
+        raw = self.engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            # seq - порядок строк в пачке: из повторов ключа остаётся последняя
+            cur.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table}, seq BIGSERIAL) ON COMMIT DELETE ROWS"
+            )
+            _copy(cur, f"COPY {stage} ({cols}) FROM STDIN", _copy_text(rows))
+            cur.execute(
+                f"INSERT INTO {table} ({cols}) "
+                f"SELECT DISTINCT ON ({key}) {cols} FROM {stage} ORDER BY {key}, seq DESC "
+                f"ON CONFLICT ({key}) DO UPDATE SET {updates} WHERE {changed}"
+            )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+
+def _copy_text(rows: Iterable[tuple]) -> str:
+    """Строки в текстовом формате COPY: табуляция между полями, NULL - \\N (значения без спецсимволов)"""
+    return "".join(
+        "\t".join("\\N" if v is None else str(v) for v in row) + "\n"
+        for row in rows
+    )
+
+
+def _copy(cur: Any, sql: str, data: Union[str, bytes]) -> None:
+    """COPY FROM STDIN для psycopg2 (copy_expert) и psycopg 3 (cursor.copy); bytes - для FORMAT binary"""
+    copy_expert: Optional[Any] = getattr(cur, "copy_expert", None)
+    if copy_expert is not None:
+        copy_expert(sql, io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data))
+    else:
+        with cur.copy(sql) as cp:
+            cp.write(data)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from meteo_parser.core.cache import file_sha256
+from meteo_parser.core.decode import dekad_start
+from meteo_parser.core.parser import FileParseResult, FileRows, ParseResult, TelegramParser
+from meteo_parser.core.reader import TelegramReader
+
+"""
+Инкрементальный разбор директории телеграмм.
+
+В state_dir хранятся:
+- manifest.json: для каждого файла (путь относительно directory) - size, mtime_ns, sha256, first_year
+- records/<sha256>.pickle: разобранные записи файла (FileParseResult.to_rows())
+  (манифест другой версии парсера, в т.ч. с другим keep_raw_line, или других настроек чтения -
+  кодировка, errors, замены, mmap: TelegramReader.fingerprint() - считается пустым)
+
+При повторном запуске:
+- файл с тем же size/mtime не читается вовсе
+- файл с изменённым mtime, но тем же sha256 не разбирается заново
+- новые/изменённые файлы разбираются, удалённые выпадают из результата и манифеста
+- update_delta() отдаёт только записи новых/изменённых и удалённых файлов: сохранённые записи
+  неизменных файлов не читаются; update() поверх него собирает полный результат
+"""
+
+MANIFEST_VERSION = 1
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+@dataclass
+class ManifestEntry:
+    size: int
+    mtime_ns: int
+    sha256: str
+    first_year: Optional[int]
+
+
+@dataclass
+class IngestDelta:
+    """
+    Изменения с прошлого update по файлам (ключ - путь относительно directory)
+
+    - added: записи новых и изменённых файлов
+    - removed: прежние записи удалённых и изменённых файлов (изменённый файл - в обоих)
+    - decadal_year: год DEKADA (первый CLIMAT по всем файлам); year_changed - он сменился,
+      и даты декадных записей неизменных файлов тоже другие (нужен полный update)
+    После сброса манифеста (другая версия парсера или настройки чтения) все файлы - в added, removed пуст
+    """
+    added: Dict[str, FileParseResult] = field(default_factory=dict)
+    removed: Dict[str, FileParseResult] = field(default_factory=dict)
+    decadal_year: int = 0
+    year_changed: bool = False
+
+
+@dataclass
+class IngestStats:
+    total: int = 0
+    parsed: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+class IncrementalIngest:
+    """
+    Разбор только новых и изменённых файлов с подмешиванием сохранённых результатов
+
+    - update(): обновить манифест и вернуть полный ParseResult по текущему набору файлов
+    - update_delta(): обновить манифест и вернуть только изменения (IngestDelta)
+    - stats: счётчики последнего update()
+    """
+
+    def __init__(self, reader: TelegramReader, state_dir: Path, parser: Optional[TelegramParser] = None) -> None:
+        self.reader = reader
+        self.state_dir = state_dir
+        self.parser = parser or TelegramParser()
+        self.stats = IngestStats()
+
+        self._manifest_path = state_dir / "manifest.json"
+        self._records_dir = state_dir / "records"
+        self._records_dir.mkdir(parents=True, exist_ok=True)
+        # манифест и пути последнего update_delta, в порядке файлов
+        self._entries: Dict[str, ManifestEntry] = {}
+        self._paths: Dict[str, Path] = {}
+
+    def update(self, default_decadal_year: int) -> ParseResult:
+        """Полный ParseResult по текущему набору файлов: сохранённые записи + разобранные заново"""
+        delta = self.update_delta(default_decadal_year)
+        results: List[FileParseResult] = []
+        for name, entry in self._entries.items():
+            res = delta.added.get(name)
+            if res is None:
+                res = FileParseResult.from_rows(self._paths[name], self._load_rows(entry.sha256))
+            results.append(res)
+        return self.parser.merge_file_results(results, default_decadal_year=default_decadal_year)
+
+    def update_delta(self, default_decadal_year: int) -> IngestDelta:
+        """
+        Обновить манифест и вернуть только изменения: сохранённые записи читаются лишь для изменённых
+        и удалённых файлов, у неизменных файлов - только stat (время зависит от дельты, а не от архива)
+        """
+        old = self._load_manifest()
+        new: Dict[str, ManifestEntry] = {}
+        paths: Dict[str, Path] = {}
+        added: Dict[str, FileParseResult] = {}
+        self.stats = IngestStats()
+
+        for path in self.reader._iter_files():
+            name = path.relative_to(self.reader.directory).as_posix()
+            st = path.stat()
+            prev = old.get(name)
+
+            entry: Optional[ManifestEntry] = None
+            sha: Optional[str] = None
+            if prev is not None and prev.size == st.st_size and prev.mtime_ns == st.st_mtime_ns:
+                entry = prev
+            elif prev is not None:
+                sha = file_sha256(path)
+                if sha == prev.sha256:
+                    entry = ManifestEntry(st.st_size, st.st_mtime_ns, sha, prev.first_year)
+
+            if entry is not None and self._records_path(entry.sha256).exists():
+                self.stats.reused += 1
+            else:
+                sha = sha or file_sha256(path)
+                res = self.parser.parse_file(self.reader, path, default_decadal_year)
+                self._save_rows(sha, res.to_rows())
+                entry = ManifestEntry(st.st_size, st.st_mtime_ns, sha, res.first_year)
+                added[name] = res
+                self.stats.parsed += 1
+
+            new[name] = entry
+            paths[name] = path
+
+        # прежние записи удалённых и изменённых файлов - пока их rows ещё на диске
+        removed: Dict[str, FileParseResult] = {}
+        for name, prev in old.items():
+            entry = new.get(name)
+            if entry is None or entry.sha256 != prev.sha256:
+                rows = self._load_rows(prev.sha256)
+                if rows is not None:
+                    removed[name] = FileParseResult.from_rows(self.reader.directory / name, rows)
+
+        year = _decadal_year(new.values(), default_decadal_year)
+        old_year = _decadal_year(old.values(), default_decadal_year)
+        _set_decadal_year(added.values(), year)
+        _set_decadal_year(removed.values(), old_year)
+
+        self.stats.total = len(new)
+        self.stats.removed = len(old.keys() - new.keys())
+        self._save_manifest(new)
+        self._drop_rows({e.sha256 for e in old.values()} - {e.sha256 for e in new.values()})
+        self._entries = new
+        self._paths = paths
+
+        return IngestDelta(added=added, removed=removed, decadal_year=year, year_changed=bool(old) and year != old_year)
+
+    def _load_manifest(self) -> Dict[str, ManifestEntry]:
+        if not self._manifest_path.exists():
+            return {}
+        data = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        if (
+                data.get("version") != MANIFEST_VERSION
+                or data.get("parser") != self.parser.version
+                or data.get("reader") != self.reader.fingerprint()
+        ):
+            return {}
+        return {name: ManifestEntry(**e) for name, e in data["files"].items()}
+
+    def _save_manifest(self, entries: Dict[str, ManifestEntry]) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "parser": self.parser.version,
+            "reader": self.reader.fingerprint(),
+            "files": {name: asdict(e) for name, e in entries.items()},
+        }
+        _write_atomic(self._manifest_path, json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    def _records_path(self, sha: str) -> Path:
+        return self._records_dir / f"{sha}.pickle"
+
+    def _load_rows(self, sha: str) -> Optional[FileRows]:
+        path = self._records_path(sha)
+        if not path.exists():
+            return None
+        return pickle.loads(path.read_bytes())
+
+    def _save_rows(self, sha: str, rows: FileRows) -> None:
+        _write_atomic(self._records_path(sha), pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _drop_rows(self, shas: Set[str]) -> None:
+        for sha in shas:
+            self._records_path(sha).unlink(missing_ok=True)
+
+
+def _decadal_year(entries: Iterable[ManifestEntry], default: int) -> int:
+    """Год DEKADA как в TelegramParser.merge_file_results: первый CLIMAT-блок по файлам в их порядке"""
+    return next((e.first_year for e in entries if e.first_year is not None), default)
+
+
+def _set_decadal_year(results: Iterable[FileParseResult], year: int) -> None:
+    for res in results:
+        for rec in res.decadal:
+            if rec.date.year != year:
+                rec.date = dekad_start(year, rec.date.month, rec.dekad_no)
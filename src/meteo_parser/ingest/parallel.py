@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from meteo_parser.core.cache import CacheStats, ParseCache
+from meteo_parser.core.parser import FileParseResult, FileRows, ParseResult, TelegramParser
+from meteo_parser.core.reader import TelegramReader
+
+"""
+Параллельный разбор телеграмм по процессам.
+
+- файлы из TelegramReader._iter_files() шардируются по ProcessPoolExecutor (по chunk_size файлов)
+- каждый воркер читает, нормализует и разбирает свой файл целиком
+- обратно передаются компактные кортежи полей вместо дата-классов
+- при заданном ParseCache воркеры только читают/пишут общий дисковый кэш (у каждого своя копия объекта,
+  поэтому вытеснение - одно, в родителе после пула: cache.rescan()), счётчики сводятся в cache.stats родителя
+- результаты склеиваются в исходном (отсортированном) порядке файлов
+"""
+
+# (path, rows, (hits, misses, writes, evictions) воркера по этому файлу)
+_FileRows = Tuple[Path, FileRows, Tuple[int, int, int, int]]
+
+# состояние воркера, заполняется в _init_worker
+_reader: Optional[TelegramReader] = None
+_parser: Optional[TelegramParser] = None
+_default_year: int = 0
+
+
+def _init_worker(
+        reader: TelegramReader,
+        default_decadal_year: int,
+        cache: Optional[ParseCache],
+        keep_raw_line: bool,
+) -> None:
+    global _reader, _parser, _default_year
+    if cache is not None:
+        cache.auto_evict = False  # копия кэша воркера не знает о записях остальных
+    _reader = reader
+    _parser = TelegramParser(cache=cache, keep_raw_line=keep_raw_line)
+    _default_year = default_decadal_year
+
+
+def _parse_path(path: Path) -> _FileRows:
+    cache = _parser.cache
+    before = _stats_tuple(cache.stats) if cache is not None else (0, 0, 0, 0)
+    res = _parser.parse_file(_reader, path, _default_year)
+    after = _stats_tuple(cache.stats) if cache is not None else (0, 0, 0, 0)
+    return path, res.to_rows(), tuple(a - b for a, b in zip(after, before))
+
+
+def _stats_tuple(stats: CacheStats) -> Tuple[int, int, int, int]:
+    return stats.hits, stats.misses, stats.writes, stats.evictions
+
+
+def iter_file_results_parallel(
+        reader: TelegramReader,
+        *,
+        default_decadal_year: int,
+        workers: Optional[int] = None,
+        chunk_size: int = 4,
+        cache: Optional[ParseCache] = None,
+        keep_raw_line: bool = True,
+) -> Iterator[FileParseResult]:
+    """
+    Разбирает файлы reader в пуле процессов и отдаёт FileParseResult в порядке файлов
+
+    Args:
+        reader: настроенный TelegramReader (передаётся в воркеры)
+        default_decadal_year: год по умолчанию для DEKADA
+        workers: число процессов (None - по числу ядер)
+        chunk_size: сколько файлов отдаётся воркеру за одну задачу
+        cache: дисковый кэш результатов по файлам (общий для воркеров)
+        keep_raw_line: заполнять ли raw_line записей (см. TelegramParser)
+    """
+    paths = list(reader._iter_files())
+    if not paths:
+        return
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(reader, default_decadal_year, cache, keep_raw_line),
+        ) as pool:
+            for path, rows, (hits, misses, writes, evictions) in pool.map(
+                    _parse_path, paths, chunksize=max(1, chunk_size)):
+                if cache is not None:
+                    cache.stats.hits += hits
+                    cache.stats.misses += misses
+                    cache.stats.writes += writes
+                    cache.stats.evictions += evictions
+                yield FileParseResult.from_rows(path, rows)
+    finally:
+        if cache is not None:
+            # бюджет max_bytes - на весь каталог кэша, а не на каждого воркера
+            cache.rescan()
+
+
+def parse_files_parallel(
+        reader: TelegramReader,
+        *,
+        default_decadal_year: int,
+        workers: Optional[int] = None,
+        chunk_size: int = 4,
+        cache: Optional[ParseCache] = None,
+        keep_raw_line: bool = True,
+) -> ParseResult:
+    """Параллельный аналог TelegramParser.parse_blocks(*reader.load_blocks(), ...)"""
+    results = iter_file_results_parallel(
+        reader,
+        default_decadal_year=default_decadal_year,
+        workers=workers,
+        chunk_size=chunk_size,
+        cache=cache,
+        keep_raw_line=keep_raw_line,
+    )
+    return TelegramParser().merge_file_results(results, default_decadal_year=default_decadal_year)
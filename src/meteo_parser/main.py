@@ -1,46 +1,475 @@
 from __future__ import annotations
 
-from config import AppConfig
-from core.parser import TelegramParser
-from core.reader import TelegramReader
+import argparse
+import sys
+from dataclasses import replace
+from functools import partial
+from datetime import date, timedelta
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
 
-def run(cfg: AppConfig):
-    reader = TelegramReader(
+from meteo_parser.config import AppConfig
+
+if TYPE_CHECKING:
+    from meteo_parser.core.columnar import ColumnarResult
+    from meteo_parser.core.models import Record
+    from meteo_parser.core.parser import ParseResult, TelegramParser
+    from meteo_parser.core.reader import TelegramReader
+
+"""
+CLI: meteo-parser [--metrics] <команда> ...
+
+- parse (по умолчанию): разбор DATA_DIR, записи в NDJSON/CSV (output/writers.py), в БД (--write)
+  или в столбцовый архив (--archive, core/archive.py)
+- query: записи из столбцового архива по станциям и периодам (индекс core/index.py), в NDJSON/CSV
+- check: сравнение записей с окнами рангов (БД или docker/ranks), результаты проверок в NDJSON/CSV;
+  код выхода 1 - только если у записей нет окна рангов или значения (выход за окно - не ошибка)
+- seed: перезаливка rank_rows из RANKS_DIR (старое имя - seed-ranks)
+- bench: бенчмарк стадий (аргументы - как у bench/suite.py)
+
+Модули разбора, SQLAlchemy, db/* и numpy импортируются внутри команд, которым они нужны:
+--help и parse без БД не платят за их загрузку (замер - стадия startup в bench/suite.py).
+"""
+
+
+def _make_reader(cfg: AppConfig) -> TelegramReader:
+    from meteo_parser.core.reader import TelegramReader
+
+    return TelegramReader(
         directory=cfg.data_dir,
         pattern=cfg.file_pattern,
         encoding=cfg.encoding,
         errors=cfg.errors,
+        use_mmap=cfg.use_mmap,
+        encodings=cfg.encodings,
     )
-    monthly_blocks, decadal_blocks = reader.load_blocks()
 
-    parser = TelegramParser()
 
-    return parser.parse_blocks(
-        monthly_blocks=monthly_blocks,
-        decadal_blocks=decadal_blocks,
+def _make_parser(cfg: AppConfig) -> TelegramParser:
+    from meteo_parser.core.parser import TelegramParser
+
+    if cfg.cache_dir is None:
+        return TelegramParser(keep_raw_line=cfg.keep_raw_line)
+
+    from meteo_parser.core.cache import ParseCache
+
+    cache = ParseCache(cfg.cache_dir, max_bytes=cfg.cache_max_bytes)
+    return TelegramParser(cache=cache, keep_raw_line=cfg.keep_raw_line)
+
+
+def iter_records(cfg: AppConfig) -> Iterator[Record]:
+    """Потоковый разбор: файл -> блоки -> записи, без накопления всего архива в памяти"""
+    from meteo_parser.core.parser import TelegramParser
+
+    reader = _make_reader(cfg)
+    parser = TelegramParser(keep_raw_line=cfg.keep_raw_line)
+
+    return parser.iter_records(
+        reader.iter_blocks(),
         default_decadal_year=cfg.default_decadal_year,
     )
 
 
-def main() -> None:
-    """CLI-точка входа для локального запуска."""
-    cfg = AppConfig()
-    result = run(cfg)
+def run_columnar(cfg: AppConfig, keep_raw_line: bool = False) -> ColumnarResult:
+    """
+    Потоковый разбор сразу в столбцы: записи не накапливаются, в памяти только типизированные массивы.
+    cfg.vectorized - строки станций разбираются пачками через numpy (core.vectorized.BatchDecoder)
+    """
+    if cfg.vectorized:
+        from meteo_parser.core.vectorized import BatchDecoder
 
-    print(f"MONTHLY records: {len(result.monthly)}")
-    print(f"DECADAL records: {len(result.decadal)}")
+        decoder = BatchDecoder(keep_raw_line=keep_raw_line)
+        return decoder.decode_blocks(_make_reader(cfg).iter_blocks(), cfg.default_decadal_year)
 
-    if result.monthly:
-        print("\nMonthly:")
-        for rec in result.monthly:
-            print(rec)
+    from meteo_parser.core.columnar import ColumnarResult
 
-    if result.decadal:
-        print("\nDecadal:")
-        for rec in result.decadal:
-            print(rec)
+    return ColumnarResult.from_records(iter_records(cfg), keep_raw_line=keep_raw_line)
 
 
-if __name__ == "__main__":
-    main()
+def run(cfg: AppConfig, parser: Optional[TelegramParser] = None) -> ParseResult:
+    parser = parser or _make_parser(cfg)
+    reader = _make_reader(cfg)
+    year = cfg.default_decadal_year
+
+    if cfg.incremental:
+        from meteo_parser.ingest.manifest import IncrementalIngest
+
+        return IncrementalIngest(reader, cfg.state_dir, parser).update(year)
+    if cfg.workers > 1:
+        from meteo_parser.ingest.parallel import parse_files_parallel
+
+        return parse_files_parallel(
+            reader,
+            default_decadal_year=year,
+            workers=cfg.workers,
+            chunk_size=cfg.chunk_size,
+            cache=parser.cache,
+            keep_raw_line=parser.keep_raw_line,
+        )
+
+    from meteo_parser.core.parser import ParseResult
+
+    if parser.cache is not None:
+        results = (parser.parse_file(reader, path, year) for path in reader._iter_files())
+        return parser.merge_file_results(results, default_decadal_year=year)
+    return ParseResult.from_records(iter_records(cfg))
+
+
+def seed_ranks(cfg: AppConfig, datasets: Optional[List[str]] = None) -> None:
+    """Перезаливка rank_rows из cfg.ranks_dir (все датасеты или только datasets)"""
+    from meteo_parser.db.engine import make_engine
+    from meteo_parser.db.seed import RankSeeder
+
+    seeder = RankSeeder(make_engine(cfg.db_url), batch_size=cfg.seed_batch_size)
+    stats = seeder.seed(cfg.ranks_dir, datasets or None)
+    print(f"datasets: {', '.join(stats.datasets) or '-'}")
+    print(f"read: {stats.rows} rows in {stats.batches} batches, written: {stats.written}, duplicates: {stats.duplicates}")
+    print(f"{stats.seconds:.2f}s, {stats.rows_per_sec:.0f} rows/s")
+
+
+# ---- команды ----
+
+def _records(cfg: AppConfig, parser: TelegramParser) -> Iterable[Record]:
+    if cfg.vectorized:
+        result = run_columnar(cfg, keep_raw_line=parser.keep_raw_line)
+        return chain(result.monthly, result.decadal)
+    if cfg.incremental or cfg.workers > 1 or parser.cache is not None:
+        result = run(cfg, parser)
+        return chain(result.monthly, result.decadal)
+    return iter_records(cfg)
+
+
+def cmd_parse(cfg: AppConfig, args: argparse.Namespace) -> int:
+    parser = _make_parser(cfg)
+    if cfg.archive_path is not None and not cfg.write_observations:
+        return _append_archive(cfg, parser)
+    records = _records(cfg, parser)
+
+    if cfg.write_observations:
+        from meteo_parser.db.engine import make_engine
+        from meteo_parser.db.writer import ObservationWriter
+
+        writer = ObservationWriter(make_engine(cfg.observations_db_url or cfg.db_url), batch_size=cfg.write_batch_size)
+        stats = writer.write_records(records)
+        print(f"MONTHLY records: {stats.monthly}", file=sys.stderr)
+        print(f"DECADAL records: {stats.decadal}", file=sys.stderr)
+        print(f"written: {stats.rows} rows in {stats.batches} batches, {stats.rows_per_sec:.0f} rows/s", file=sys.stderr)
+        return 0
+
+    from meteo_parser.output.writers import RecordWriter, format_for, open_output
+
+    monthly = 0
+    decadal = 0
+    fmt = args.format or format_for(cfg.output_path, cfg.output_format)
+    with open_output(None if args.quiet else cfg.output_path) as out:
+        writer = None if args.quiet else RecordWriter(out, fmt, raw_line=cfg.keep_raw_line)
+        for rec in records:
+            if hasattr(rec, "dekad_no"):
+                decadal += 1
+            else:
+                monthly += 1
+            if writer is not None:
+                writer.write(rec)
+        if writer is not None:
+            writer.close()
+
+    # итоги - в stderr: stdout может быть потоком записей
+    print(f"MONTHLY records: {monthly}", file=sys.stderr)
+    print(f"DECADAL records: {decadal}", file=sys.stderr)
+    if parser.cache is not None:
+        print(f"cache: {parser.cache.stats}", file=sys.stderr)
+    return 0
+
+
+def _append_archive(cfg: AppConfig, parser: TelegramParser) -> int:
+    from meteo_parser.core.archive import ColumnarArchive
+
+    if cfg.vectorized:
+        result = run_columnar(cfg)
+    else:
+        from meteo_parser.core.columnar import ColumnarResult
+
+        result = ColumnarResult.from_records(_records(cfg, parser))
+
+    with ColumnarArchive(cfg.archive_path) as archive:
+        stats = archive.append(result)
+        totals = archive.stats()
+    print(f"MONTHLY records: {len(result.monthly)}", file=sys.stderr)
+    print(f"DECADAL records: {len(result.decadal)}", file=sys.stderr)
+    print(
+        f"archive {cfg.archive_path}: +{stats.chunks} chunks ({stats.merged} merged), {stats.rows} rows, "
+        f"{stats.bytes} bytes; total {totals['monthly']} monthly, {totals['decadal']} decadal, "
+        f"{totals['dead_chunks']} dead chunks",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def cmd_query(cfg: AppConfig, args: argparse.Namespace) -> int:
+    """Записи архива: --station (несколько), --from/--to, --month, --dekad; код выхода 1, если ничего не нашлось"""
+    from meteo_parser.core.archive import ColumnarArchive
+    from meteo_parser.output.writers import RecordWriter, format_for, open_output
+
+    if cfg.archive_path is None or not cfg.archive_path.exists():
+        print(f"archive not found: {cfg.archive_path}", file=sys.stderr)
+        return 2
+
+    fmt = args.format or format_for(cfg.output_path, cfg.output_format)
+    with ColumnarArchive(cfg.archive_path) as archive, open_output(cfg.output_path) as out:
+        records = archive.query(
+            stations=args.stations,
+            start=args.start,
+            stop=args.stop,
+            scale=args.scale,
+            month=args.month,
+            dekad_no=args.dekad,
+        )
+        with RecordWriter(out, fmt) as writer:
+            n = writer.write_many(records)
+
+    print(f"records: {n}", file=sys.stderr)
+    return 0 if n else 1
+
+
+def _period_arg(end: bool):
+    """YYYY, YYYY-MM или YYYY-MM-DD -> date; для --to - последний день года/месяца"""
 
+    def parse(text: str) -> date:
+        parts = text.split("-")
+        try:
+            if len(parts) == 1:
+                return date(int(parts[0]), 12, 31) if end else date(int(parts[0]), 1, 1)
+            if len(parts) == 2:
+                year, month = int(parts[0]), int(parts[1])
+                if not end:
+                    return date(year, month, 1)
+                return date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+            if len(parts) == 3:
+                return date.fromisoformat(text)
+        except ValueError:
+            pass
+        raise argparse.ArgumentTypeError(f"expected YYYY, YYYY-MM or YYYY-MM-DD: {text!r}")
+
+    return parse
+
+
+def cmd_check(cfg: AppConfig, args: argparse.Namespace) -> int:
+    """
+    Проверки записей по окнам рангов.
+
+    Каждая запись сверяется с обоими краями пары (warmest/coldest, wettest/driest), поэтому выход за окно
+    одного из них - обычное дело и на код выхода не влияет. Код выхода 1 - если есть записи с проверками,
+    которые не удалось выполнить: нет окна рангов (NO_WINDOW) или нет значения поля
+    """
+    if cfg.ranks_source == "jsonl":
+        from meteo_parser.compare.rankstore import RankStore
+
+        windows_cache = RankStore.load_or_build(cfg.ranks_dir, cfg.ranks_snapshot)
+    else:
+        from meteo_parser.compare.cache import RankWindowCache
+        from meteo_parser.db.engine import make_engine, make_session_factory
+
+        windows_cache = RankWindowCache(make_session_factory(make_engine(cfg.db_url)))
+
+    from meteo_parser.output.writers import CheckResultWriter, format_for, open_output
+
+    fmt = args.format or format_for(cfg.output_path, cfg.output_format)
+    check = _check_columnar if cfg.vectorized else _check_records
+    with open_output(cfg.output_path) as out:
+        with CheckResultWriter(out, fmt) as writer:
+            records, failed, unchecked = check(cfg, windows_cache, writer, args.failures)
+
+    print(f"records: {records}, with failed checks: {failed}, with unchecked fields: {unchecked}", file=sys.stderr)
+    return 1 if unchecked else 0
+
+
+def _check_records(cfg: AppConfig, windows_cache, writer, failures_only: bool) -> Tuple[int, int, int]:
+    """Построчная проверка записей: (записей, с непрошедшими проверками, с непроверенными полями)"""
+    from meteo_parser.compare.checks import check_decadal_record_with_windows, check_monthly_record_with_windows
+
+    records = 0
+    failed = 0
+    unchecked = 0
+    for rec in _records(cfg, _make_parser(cfg)):
+        decadal = hasattr(rec, "dekad_no")
+        windows = windows_cache.month_windows(cfg.dataset, "decadal" if decadal else "monthly", rec.date.month)
+        if decadal:
+            checks = check_decadal_record_with_windows(rec=rec, windows=windows)
+        else:
+            checks = check_monthly_record_with_windows(rec=rec, windows=windows)
+        records += 1
+
+        bad = [c for c in checks if not c.ok]
+        failed += bool(bad)
+        # rng=None - проверка не выполнена (нет окна или значения), а не выход за окно
+        unchecked += any(c.rng is None for c in bad)
+        writer.write(rec, bad if failures_only else checks)
+    return records, failed, unchecked
+
+
+def _check_columnar(cfg: AppConfig, windows_cache, writer, failures_only: bool) -> Tuple[int, int, int]:
+    """
+    check --vectorized: разбор в столбцы (run_columnar) и пакетная проверка (compare/batch.py);
+    записи и CheckResult собираются только для выводимых строк. Итоги - как у _check_records
+    """
+    from meteo_parser.compare.batch import CHECKS, STATUS_NO_VALUE, STATUS_NO_WINDOW, STATUS_OK, check_columns_batch
+
+    result = run_columnar(cfg)
+    n = len(CHECKS)
+    records = 0
+    failed = 0
+    unchecked = 0
+    for scale, columns in (("monthly", result.monthly), ("decadal", result.decadal)):
+        matrix = check_columns_batch(columns=columns, windows_for=partial(windows_cache.month_windows, cfg.dataset, scale))
+        status = matrix.status
+        for i in range(len(matrix)):
+            codes = status[i * n:(i + 1) * n]
+            bad = [j for j, code in enumerate(codes) if code != STATUS_OK]
+            failed += bool(bad)
+            unchecked += any(code in (STATUS_NO_VALUE, STATUS_NO_WINDOW) for code in codes)
+            shown = bad if failures_only else range(n)
+            if shown:
+                writer.write(columns.row(i), [matrix.result(i, j) for j in shown])
+        records += len(matrix)
+    return records, failed, unchecked
+
+
+def cmd_seed(cfg: AppConfig, args: argparse.Namespace) -> int:
+    seed_ranks(cfg, args.datasets)
+    return 0
+
+
+def cmd_bench(cfg: AppConfig, args: argparse.Namespace, rest: List[str]) -> int:
+    from meteo_parser.bench.suite import main as bench_main
+
+    return bench_main(rest)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="meteo-parser", description="Разбор телеграмм CLIMAT/DEKADA")
+    ap.add_argument("--metrics", action="store_true", default=None, help="замеры стадий (core/metrics.py)")
+    ap.add_argument("--metrics-path", type=Path, help="файл замеров: *.json или *.prom; без него - JSON в stderr")
+    sub = ap.add_subparsers(dest="command", metavar="command")
+
+    p = sub.add_parser("parse", help="разбор телеграмм (по умолчанию)")
+    _add_input_args(p)
+    p.add_argument("--write", action="store_true", help="записать в БД (db/writer.py)")
+    p.add_argument("--db-url", help="БД для --write (по умолчанию OBSERVATIONS_DB_URL или DB_URL)")
+    p.add_argument("--archive", type=Path, dest="archive_path", help="дописать записи в столбцовый архив (ARCHIVE_PATH)")
+    p.add_argument("-q", "--quiet", action="store_true", help="только итоги, без записей")
+    _add_output_args(p)
+
+    p = sub.add_parser("query", help="записи из столбцового архива по станциям и периодам")
+    p.add_argument("--archive", type=Path, dest="archive_path", help="архив (по умолчанию ARCHIVE_PATH)")
+    p.add_argument("-s", "--station", type=int, action="append", dest="stations", metavar="STATION_ID", help="station_id (можно несколько)")
+    p.add_argument("--from", type=_period_arg(end=False), dest="start", metavar="DATE", help="начало: YYYY, YYYY-MM или YYYY-MM-DD")
+    p.add_argument("--to", type=_period_arg(end=True), dest="stop", metavar="DATE", help="конец включительно: YYYY, YYYY-MM или YYYY-MM-DD")
+    p.add_argument("--scale", choices=("monthly", "decadal"))
+    p.add_argument("--month", type=int, choices=range(1, 13), metavar="1..12", help="месяц в любом году")
+    p.add_argument("--dekad", type=int, choices=(1, 2, 3), help="декада месяца (только decadal)")
+    _add_output_args(p)
+
+    p = sub.add_parser("check", help="сравнение записей с окнами рангов")
+    _add_input_args(p)
+    p.add_argument("--source", choices=("db", "jsonl"), help="источник рангов (RANKS_SOURCE)")
+    p.add_argument("--dataset")
+    p.add_argument("--db-url")
+    p.add_argument("--failures", action="store_true", help="только непрошедшие проверки")
+    _add_output_args(p)
+
+    p = sub.add_parser("seed", aliases=["seed-ranks"], help="перезаливка rank_rows из RANKS_DIR")
+    p.add_argument("datasets", nargs="*", help="датасеты (по умолчанию - все)")
+    p.add_argument("--ranks-dir", type=Path)
+    p.add_argument("--db-url")
+
+    # --help и остальные аргументы разбирает bench/suite.py
+    sub.add_parser("bench", add_help=False, help="бенчмарк стадий (meteo-parser bench --help)")
+    return ap
+
+
+def _add_input_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--data-dir", type=Path)
+    p.add_argument("--pattern", dest="file_pattern")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--incremental", action="store_true", default=None)
+    p.add_argument(
+        "--vectorized", action="store_true", default=None,
+        help="разбор пачками через numpy в столбцы (VECTORIZED); без --workers/--incremental/CACHE_DIR",
+    )
+
+
+def _add_output_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("-o", "--output", type=Path, help="файл вывода (*.gz - gzip); по умолчанию OUTPUT_PATH или stdout")
+    p.add_argument("--format", choices=("ndjson", "csv"), help="по умолчанию - по расширению --output или OUTPUT_FORMAT")
+
+
+def _apply_args(cfg: AppConfig, args: argparse.Namespace) -> AppConfig:
+    """Аргументы командной строки поверх config.py (None - значение из config.py)"""
+    opts = vars(args)
+    overrides = {
+        name: opts[name]
+        for name in (
+            "data_dir", "file_pattern", "workers", "incremental", "vectorized", "dataset", "ranks_dir", "archive_path",
+        )
+        if opts.get(name) is not None
+    }
+    if opts.get("output") is not None:
+        overrides["output_path"] = opts["output"]
+    if opts.get("source") is not None:
+        overrides["ranks_source"] = opts["source"]
+    if opts.get("write"):
+        overrides["write_observations"] = True
+    if opts.get("db_url") is not None:
+        overrides["db_url"] = opts["db_url"]
+        if opts.get("write"):
+            overrides["observations_db_url"] = opts["db_url"]
+    if args.metrics or args.metrics_path is not None:
+        overrides["metrics"] = True
+    if args.metrics_path is not None:
+        overrides["metrics_path"] = args.metrics_path
+    return replace(cfg, **overrides) if overrides else cfg
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI-точка входа (meteo-parser, python -m meteo_parser)"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    ap = build_parser()
+    args, rest = ap.parse_known_args(argv)
+    if args.command is None:
+        # без команды - parse с настройками config.py, как раньше
+        args, rest = ap.parse_known_args([*argv, "parse"])
+    if rest and args.command != "bench":
+        ap.error(f"unrecognized arguments: {' '.join(rest)}")
+
+    cfg = _apply_args(AppConfig(), args)
+    if args.command in ("parse", "check") and cfg.vectorized and (
+            cfg.incremental or cfg.workers > 1 or cfg.cache_dir is not None):
+        # run_columnar читает файлы сам, мимо пула, манифеста и кэша разбора
+        ap.error("--vectorized cannot be combined with --workers, --incremental or CACHE_DIR")
+    if args.command == "bench":
+        return cmd_bench(cfg, args, rest)
+
+    command = {"parse": cmd_parse, "query": cmd_query, "check": cmd_check, "seed": cmd_seed, "seed-ranks": cmd_seed}[args.command]
+    if not cfg.metrics:
+        return command(cfg, args)
+
+    import json
+
+    # тот же модуль, что импортируют core/db/compare
+    from meteo_parser.core import metrics
+
+    metrics.enable(trace_memory=cfg.metrics_trace_memory, profile=cfg.metrics_profile)
+    try:
+        return command(cfg, args)
+    finally:
+        m = metrics.disable()
+        if cfg.metrics_path is not None:
+            m.write(cfg.metrics_path)
+            print(f"metrics: {cfg.metrics_path}", file=sys.stderr)
+        else:
+            print(json.dumps(m.to_dict(), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
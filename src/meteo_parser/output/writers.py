@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import sys
+from contextlib import contextmanager
+from datetime import date
+from functools import partial
+from operator import attrgetter, itemgetter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from meteo_parser.compare.models import CheckResult
+from meteo_parser.core import metrics
+from meteo_parser.core.columnar import DECADAL_SCHEMA, MONTHLY_SCHEMA
+from meteo_parser.core.models import DECADAL_FIELDS, MONTHLY_FIELDS, DecadalRecord, MonthlyRecord, Record
+
+"""
+Потоковый вывод записей разбора и результатов проверок в NDJSON или CSV.
+
+- кодировщик строки готовится один раз на вид записи: для NDJSON - шаблон
+  '{"scale":"monthly","date":"%s","station_id":%s,...}', для CSV - кортеж строк в порядке общих столбцов
+  (RECORD_COLUMNS; полей, которых у вида записи нет, - пусто)
+- строковый вид значений (repr чисел, isoformat дат) кэшируется: различных значений в архиве немного
+- строки копятся по batch_size и уходят в файл одним write
+- open_output: None или "-" - stdout, *.gz - gzip (уровень GZIP_LEVEL)
+"""
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_BATCH_SIZE = 10_000
+GZIP_LEVEL = 6  # 9 (по умолчанию у gzip) в разы медленнее при почти том же размере
+
+# общие столбцы CSV для monthly и decadal
+RECORD_COLUMNS: Tuple[str, ...] = (
+    "scale", "date", "dekad_no", "station_id",
+    "p_station_hpa", "p_sea_hpa", "t_mean_c", "t_daily_std_c", "t_min_daily_c", "t_max_daily_c", "e_vapor_hpa",
+    "precip_sum_mm", "precip_repeatability", "precip_days", "sunshine_hours", "sunshine_pct_norm",
+    "raw_line",
+)
+CHECK_COLUMNS: Tuple[str, ...] = (
+    "dataset", "scale", "date", "period", "station_id",
+    "metric", "field", "value", "ok", "lo", "hi", "reason",
+)
+
+_TYPECODES: Dict[str, str] = {name: tc for name, tc, _nullable in (*MONTHLY_SCHEMA, *DECADAL_SCHEMA)}
+_MAX_CACHED = 100_000
+
+_SCALES: Dict[type, Tuple[str, Tuple[str, ...]]] = {
+    MonthlyRecord: ("monthly", MONTHLY_FIELDS),
+    DecadalRecord: ("decadal", DECADAL_FIELDS),
+}
+
+
+def format_for(path: Optional[Path], default: str = "ndjson") -> str:
+    """Формат по расширению (data.csv, data.csv.gz -> csv; *.ndjson, *.jsonl -> ndjson)"""
+    if path is None or str(path) == "-":
+        return default
+    suffixes = [s for s in path.suffixes if s != ".gz"]
+    if suffixes and suffixes[-1] == ".csv":
+        return "csv"
+    if suffixes and suffixes[-1] in (".ndjson", ".jsonl", ".json"):
+        return "ndjson"
+    return default
+
+
+@contextmanager
+def open_output(path: Optional[Path], gzip_level: int = GZIP_LEVEL) -> Iterator[TextIO]:
+    """Текстовый поток для записи: None или "-" - stdout (не закрывается), *.gz - gzip"""
+    if path is None or str(path) == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".gz":
+        out = gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=gzip_level)
+    else:
+        out = open(path, "w", encoding="utf-8", newline="", buffering=1 << 20)
+    try:
+        yield out
+    finally:
+        out.close()
+
+
+class _BatchWriter:
+    """Пачки строк (NDJSON) или кортежей (CSV) -> один write в out на пачку"""
+
+    def __init__(self, out: TextIO, fmt: str, columns: Tuple[str, ...], batch_size: int) -> None:
+        if fmt not in FORMATS:
+            raise ValueError(f"format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+        self.out = out
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.rows = 0
+        self._batch: List = []
+        self._buf: Optional[io.StringIO] = None
+        if fmt == "csv":
+            self._buf = io.StringIO()
+            self._csv = csv.writer(self._buf, lineterminator="\n")
+            self._csv.writerow(columns)
+
+    def flush(self) -> None:
+        batch = self._batch
+        buf = self._buf
+        if not batch and (buf is None or not buf.tell()):
+            return
+        with metrics.stage("output") as st:
+            if buf is None:
+                self.out.write("".join(batch))
+            else:
+                self._csv.writerows(batch)
+                self.out.write(buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+        if st:
+            st.count(rows=len(batch))
+        self.rows += len(batch)
+        batch.clear()
+
+    def close(self) -> None:
+        """Дописывает накопленное; out не закрывается (им владеет open_output)"""
+        self.flush()
+        self.out.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _Strings(dict):
+    """
+    Кэш строкового вида значений: различных значений полей немного (десятые доли градуса, гПа, мм, даты блоков),
+    repr/isoformat каждого считается один раз, дальше - поиск в словаре
+    """
+
+    def __init__(self, convert: Callable[[object], str], none: str) -> None:
+        super().__init__()
+        self.convert = convert
+        self.none = none
+        self[None] = none
+
+    def __missing__(self, value: object) -> str:
+        if len(self) > _MAX_CACHED:
+            self.clear()
+            self[None] = self.none
+        s = self[value] = self.convert(value)
+        return s
+
+
+class RecordWriter(_BatchWriter):
+    """
+    MonthlyRecord/DecadalRecord -> NDJSON или CSV
+
+    raw_line: выводить исходную строку станции (столбец raw_line в CSV пустой, если False)
+    """
+
+    def __init__(
+            self,
+            out: TextIO,
+            fmt: str = "ndjson",
+            *,
+            raw_line: bool = False,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        super().__init__(out, fmt, RECORD_COLUMNS, batch_size)
+        self.raw_line = raw_line
+        none = "null" if fmt == "ndjson" else ""
+        # float и int - раздельно: 1 == 1.0 в словаре, но "1.0" != "1"
+        self._floats = _Strings(repr, none)
+        self._ints = _Strings(repr, none)
+        self._dates = _Strings(date.isoformat, none)
+        make = self._json_encoder if fmt == "ndjson" else self._csv_encoder
+        self._encoders: Dict[type, Callable[[Record], Union[str, tuple]]] = {
+            cls: make(scale, names) for cls, (scale, names) in _SCALES.items()
+        }
+
+    def write(self, rec: Record) -> None:
+        self._batch.append(self._encoders[type(rec)](rec))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, records: Iterable[Record]) -> int:
+        batch = self._batch
+        encoders = self._encoders
+        size = self.batch_size
+        n = 0
+        for rec in records:
+            batch.append(encoders[type(rec)](rec))
+            n += 1
+            if len(batch) >= size:
+                self.flush()
+        return n
+
+    def _strings(self, names: Tuple[str, ...]) -> Tuple[Callable[[Record], tuple], Tuple[str, ...]]:
+        """(rec -> строки значений полей, имена полей в порядке этих строк); raw_line не входит"""
+        floats = tuple(n for n in names if _TYPECODES.get(n) == "d")
+        ints = tuple(n for n in names if n not in floats and n not in ("date", "raw_line"))
+        get_floats = _getter(floats)
+        get_ints = _getter(ints)
+        float_str = self._floats.__getitem__
+        int_str = self._ints.__getitem__
+        date_str = self._dates.__getitem__
+
+        def strings(rec: Record) -> tuple:
+            return (date_str(rec.date), *map(float_str, get_floats(rec)), *map(int_str, get_ints(rec)))
+
+        return strings, ("date", *floats, *ints)
+
+    def _json_encoder(self, scale: str, names: Tuple[str, ...]) -> Callable[[Record], str]:
+        strings, order = self._strings(names)
+        keys = tuple(n for n in names if n != "raw_line")
+        arrange = itemgetter(*(order.index(n) for n in keys))
+        template = f'{{"scale":"{scale}",' + ",".join(
+            f'"{n}":"%s"' if n == "date" else f'"{n}":%s' for n in keys
+        )
+
+        if self.raw_line:
+            dumps = json.dumps
+
+            def encode(rec: Record) -> str:
+                return f'{template % arrange(strings(rec))},"raw_line":{dumps(rec.raw_line, ensure_ascii=False)}}}\n'
+        else:
+            def encode(rec: Record) -> str:
+                return template % arrange(strings(rec)) + "}\n"
+        return encode
+
+    def _csv_encoder(self, scale: str, names: Tuple[str, ...]) -> Callable[[Record], tuple]:
+        # (scale, строки полей..., raw_line, "") -> кортеж в порядке RECORD_COLUMNS; отсутствующие поля - ""
+        strings, order = self._strings(names)
+        columns = ("scale", *order, "raw_line")
+        missing = len(columns)
+        arrange = itemgetter(*(columns.index(c) if c in columns else missing for c in RECORD_COLUMNS))
+        head = (scale,)
+
+        if self.raw_line:
+            return lambda rec: arrange(head + strings(rec) + (rec.raw_line, ""))
+        tail = ("", "")
+        return lambda rec: arrange(head + strings(rec) + tail)
+
+
+class CheckResultWriter(_BatchWriter):
+    """Результаты проверок записи (compare.checks) -> по строке NDJSON/CSV на проверку"""
+
+    def __init__(self, out: TextIO, fmt: str = "ndjson", *, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        super().__init__(out, fmt, CHECK_COLUMNS, batch_size)
+        # dataset/scale/period/metric/field - из небольшого набора значений
+        self._strings = _Strings(partial(json.dumps, ensure_ascii=False), "null")
+        self._floats = _Strings(repr, "null")
+
+    def write(self, rec: Record, checks: Iterable[CheckResult]) -> int:
+        batch = self._batch
+        n = len(batch)
+        if self.fmt == "ndjson":
+            s = self._strings.__getitem__
+            num = self._floats.__getitem__
+            head = f'"date":"{rec.date.isoformat()}","station_id":{rec.station_id}'
+            for c in checks:
+                lo, hi = c.rng if c.rng is not None else (None, None)
+                batch.append(
+                    f'{{"dataset":{s(c.dataset)},"scale":{s(c.scale)},{head},"period":{s(c.period)},'
+                    f'"metric":{s(c.metric)},"field":{s(c.field)},"value":{num(c.value)},'
+                    f'"ok":{"true" if c.ok else "false"},"lo":{num(lo)},"hi":{num(hi)},'
+                    f'"reason":{json.dumps(c.reason, ensure_ascii=False)}}}\n'
+                )
+        else:
+            for c in checks:
+                lo, hi = c.rng if c.rng is not None else (None, None)
+                batch.append((
+                    c.dataset, c.scale, rec.date, c.period, rec.station_id,
+                    c.metric, c.field, c.value, "true" if c.ok else "false", lo, hi, c.reason,
+                ))
+        n = len(batch) - n
+        if len(batch) >= self.batch_size:
+            self.flush()
+        return n
+
+
+def _getter(names: Tuple[str, ...]) -> Callable[[Record], tuple]:
+    """attrgetter, всегда возвращающий кортеж (и для одного поля)"""
+    if len(names) == 1:
+        get = attrgetter(names[0])
+        return lambda rec: (get(rec),)
+    return attrgetter(*names)